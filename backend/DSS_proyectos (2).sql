@@ -36,12 +36,13 @@ CREATE TABLE IF NOT EXISTS Dim_Responsable (
 );
 
 CREATE TABLE IF NOT EXISTS Dim_Tiempo (
-    id_tiempo INT AUTO_INCREMENT PRIMARY KEY,
+    id_tiempo INT PRIMARY KEY, -- AAAAMMDD (clave calculada a partir de la fecha)
     fecha DATE,
     dia INT,
     mes INT,
     trimestre INT,
-    anio INT
+    anio INT,
+    UNIQUE INDEX idx_fecha (fecha)
 );
 
 CREATE TABLE IF NOT EXISTS Dim_Tarea (
@@ -57,6 +58,9 @@ CREATE TABLE IF NOT EXISTS Dim_Tarea (
 -- ==============================
 -- TABLAS DE HECHOS
 -- ==============================
+-- Nota: la carga completa del ETL construye copias con CREATE TABLE ... LIKE
+-- y las publica con RENAME TABLE; esas copias no conservan las FOREIGN KEY
+-- (la integridad la garantiza el orden de carga del ETL).
 
 -- Fact de Proyectos
 CREATE TABLE IF NOT EXISTS Fact_Proyectos (
@@ -77,6 +81,7 @@ CREATE TABLE IF NOT EXISTS Fact_Proyectos (
     tasa_defectos DECIMAL(8,4),
     satisfaccion_cliente DECIMAL(3,2),
     roi DECIMAL(8,2),
+    UNIQUE INDEX idx_fp_proyecto (id_proyecto),
     FOREIGN KEY (id_proyecto) REFERENCES Dim_Proyecto(id_proyecto),
     FOREIGN KEY (id_cliente) REFERENCES Dim_Cliente(id_cliente),
     FOREIGN KEY (id_responsable) REFERENCES Dim_Responsable(id_responsable),
@@ -94,6 +99,7 @@ CREATE TABLE IF NOT EXISTS Fact_Tareas (
     horas_reales DECIMAL(8,2),
     estado VARCHAR(20),
     desviacion_horas DECIMAL(8,2),
+    UNIQUE INDEX idx_ft_tarea (id_tarea),
     FOREIGN KEY (id_tarea) REFERENCES Dim_Tarea(id_tarea),
     FOREIGN KEY (id_proyecto) REFERENCES Dim_Proyecto(id_proyecto),
     FOREIGN KEY (id_responsable) REFERENCES Dim_Responsable(id_responsable),
@@ -103,10 +109,12 @@ CREATE TABLE IF NOT EXISTS Fact_Tareas (
 -- Fact de Tiempo de Trabajo
 CREATE TABLE IF NOT EXISTS Fact_Tiempo_Trabajo (
     id_fact_trabajo INT AUTO_INCREMENT PRIMARY KEY,
+    id_registro INT, -- id en SG (Registro_Tiempo)
     id_responsable INT,
     id_tarea INT,
     id_tiempo INT,
     horas_trabajadas DECIMAL(8,2),
+    UNIQUE INDEX idx_ftt_registro (id_registro),
     FOREIGN KEY (id_responsable) REFERENCES Dim_Responsable(id_responsable),
     FOREIGN KEY (id_tarea) REFERENCES Dim_Tarea(id_tarea),
     FOREIGN KEY (id_tiempo) REFERENCES Dim_Tiempo(id_tiempo)
@@ -115,12 +123,14 @@ CREATE TABLE IF NOT EXISTS Fact_Tiempo_Trabajo (
 -- Fact de Costos
 CREATE TABLE IF NOT EXISTS Fact_Costos (
     id_fact_costo INT AUTO_INCREMENT PRIMARY KEY,
+    id_costo INT, -- id en SG (Costos)
     id_proyecto INT,
     id_tiempo INT,
     tipo VARCHAR(50),
     proveedor VARCHAR(100),
     monto DECIMAL(12,2),
     moneda VARCHAR(10),
+    UNIQUE INDEX idx_fc_costo (id_costo),
     FOREIGN KEY (id_proyecto) REFERENCES Dim_Proyecto(id_proyecto),
     FOREIGN KEY (id_tiempo) REFERENCES Dim_Tiempo(id_tiempo)
 );
@@ -128,6 +138,7 @@ CREATE TABLE IF NOT EXISTS Fact_Costos (
 -- Fact Incidencias
 CREATE TABLE IF NOT EXISTS Fact_Incidencias (
     id_fact_incidencia INT AUTO_INCREMENT PRIMARY KEY,
+    id_incidencia INT, -- id en SG (Incidencias)
     id_proyecto INT,
     id_tarea INT,
     id_responsable INT,
@@ -135,6 +146,7 @@ CREATE TABLE IF NOT EXISTS Fact_Incidencias (
     severidad VARCHAR(20),
     estado VARCHAR(20),
     dias_resolucion INT,
+    UNIQUE INDEX idx_fi_incidencia (id_incidencia),
     FOREIGN KEY (id_proyecto) REFERENCES Dim_Proyecto(id_proyecto),
     FOREIGN KEY (id_tarea) REFERENCES Dim_Tarea(id_tarea),
     FOREIGN KEY (id_responsable) REFERENCES Dim_Responsable(id_responsable),
@@ -143,6 +155,7 @@ CREATE TABLE IF NOT EXISTS Fact_Incidencias (
 
 CREATE TABLE IF NOT EXISTS Fact_Defectos (
     id_fact_defecto INT AUTO_INCREMENT PRIMARY KEY,
+    id_defecto INT, -- id en SG (clave natural para la carga incremental)
     id_proyecto INT,
     id_tiempo INT, -- Fecha de detección
     
@@ -154,6 +167,7 @@ CREATE TABLE IF NOT EXISTS Fact_Defectos (
     etapa_deteccion VARCHAR(50), 
     dias_correccion INT,
     
+    UNIQUE INDEX idx_fd_defecto (id_defecto),
     FOREIGN KEY (id_proyecto) REFERENCES Dim_Proyecto(id_proyecto),
     FOREIGN KEY (id_tiempo) REFERENCES Dim_Tiempo(id_tiempo)
 );
@@ -161,10 +175,145 @@ CREATE TABLE IF NOT EXISTS Fact_Defectos (
 -- Tabla para almacenar parámetros del modelo Rayleigh
 CREATE TABLE IF NOT EXISTS Model_Rayleigh (
     id_model INT AUTO_INCREMENT PRIMARY KEY,
+    segmento VARCHAR(191) NOT NULL DEFAULT 'global', -- 'global' o 'metodologia=Scrum|cliente=3'
     sigma DECIMAL(10,4) NOT NULL,
     n_samples INT NOT NULL,
-    mean_sq DECIMAL(12,4),
-    trained_at DATETIME,
+    mean_sq DOUBLE,
+    sum_sq BIGINT, -- sum(x^2) exacto de la serie (los conteos son enteros)
+    histograma MEDIUMTEXT, -- serie semanal de defectos (JSON) para reentrenar en incremental
+    ultimo_id_defecto BIGINT, -- último id_defecto incluido en el ajuste
+    trained_at DATETIME(6), -- identifica la ejecución (dos en el mismo segundo no se mezclan)
     notes TEXT,
-    INDEX idx_trained_at (trained_at DESC)
-);
\ No newline at end of file
+    INDEX idx_trained_at (trained_at DESC),
+    INDEX idx_segmento (segmento, trained_at)
+);
+-- ==============================
+-- AGREGADOS OLAP
+-- ==============================
+
+-- Retícula de cuboides precalculada por el ETL (ver olap_lattice.py).
+-- Cada fila es una celda del cuboide indicado; los atributos que no forman
+-- parte del cuboide quedan en NULL.
+CREATE TABLE IF NOT EXISTS Agg_Cuboide (
+    id_celda INT AUTO_INCREMENT PRIMARY KEY,
+    cuboide VARCHAR(80) NOT NULL,
+    cliente VARCHAR(100),
+    anio INT,
+    trimestre INT,
+    mes INT,
+    metodologia VARCHAR(100),
+    etapa VARCHAR(50),
+    severidad VARCHAR(20),
+    proyectos INT DEFAULT 0,
+    ingresos DECIMAL(16,2) DEFAULT 0,
+    defectos INT DEFAULT 0,
+    INDEX idx_cuboide (cuboide)
+);
+
+-- Resúmenes del dashboard (los mantiene el ETL; /api/dashboard/summary lee
+-- unas pocas filas en lugar de recorrer Proyectos/Defectos/Evaluaciones)
+CREATE TABLE IF NOT EXISTS Agg_Dash_Proyectos_Mes (
+    mes INT NOT NULL, -- AAAAMM de fecha_inicio (0 = sin fecha)
+    estado VARCHAR(50) NOT NULL,
+    proyectos INT,
+    presupuesto DECIMAL(14,2),
+    PRIMARY KEY (mes, estado)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Defectos_Mes (
+    mes INT NOT NULL, -- AAAAMM de fecha_deteccion
+    severidad VARCHAR(20) NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    defectos INT,
+    PRIMARY KEY (mes, severidad, estado)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Satisfaccion (
+    fecha DATE PRIMARY KEY,
+    evaluaciones INT,
+    suma_calificacion DECIMAL(12,2)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Recientes (
+    id_proyecto INT PRIMARY KEY,
+    proyecto VARCHAR(100),
+    cliente VARCHAR(100),
+    estado VARCHAR(50),
+    fecha_inicio DATE,
+    fecha_fin DATE,
+    INDEX idx_recientes_fecha (fecha_inicio)
+);
+
+-- Versión de los datos del DW: el ETL la incrementa al terminar cada carga
+-- y la API la usa para invalidar sus cachés.
+CREATE TABLE IF NOT EXISTS Data_Version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    actualizado DATETIME
+);
+INSERT IGNORE INTO Data_Version (id, version, actualizado) VALUES (1, 0, NOW());
+
+-- Versión del esquema: el ETL no corre sobre un DSS anterior (ver
+-- migrar_DSS_proyectos.sql). Súbela junto con ESQUEMA_DSS en etl.py.
+CREATE TABLE IF NOT EXISTS Esquema_Version (
+    id TINYINT PRIMARY KEY,
+    version INT NOT NULL,
+    actualizado DATETIME
+);
+INSERT IGNORE INTO Esquema_Version (id, version, actualizado) VALUES (1, 2, NOW());
+
+-- Historial de ejecuciones del ETL (una fila por ejecución y por paso)
+CREATE TABLE IF NOT EXISTS ETL_Runs (
+    id_run INT AUTO_INCREMENT PRIMARY KEY,
+    inicio DATETIME,
+    fin DATETIME,
+    segundos DECIMAL(10,3),
+    modo VARCHAR(20),
+    carga VARCHAR(20),
+    workers INT,
+    estado VARCHAR(20),
+    filas BIGINT,
+    errores INT,
+    reanudaciones INT DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ETL_Steps (
+    id_step INT AUTO_INCREMENT PRIMARY KEY,
+    id_run INT NOT NULL,
+    paso VARCHAR(64),
+    desde DATETIME(3),
+    hasta DATETIME(3),
+    segundos DECIMAL(10,3),
+    filas_extraidas BIGINT,
+    filas_cargadas BIGINT,
+    filas_s DECIMAL(14,1),
+    lotes INT,
+    reintentos INT,
+    estado VARCHAR(20),
+    error TEXT,
+    hilo VARCHAR(32),
+    INDEX idx_paso_run (paso, id_run),
+    FOREIGN KEY (id_run) REFERENCES ETL_Runs(id_run)
+);
+
+-- Checkpoints por paso de una ejecución: último lote confirmado (ultimo_id
+-- en el orden de extracción) y, al terminar el paso, sus marcas de agua.
+CREATE TABLE IF NOT EXISTS ETL_Checkpoints (
+    id_run INT NOT NULL,
+    paso VARCHAR(64) NOT NULL,
+    lote INT,
+    ultimo_id BIGINT,
+    filas BIGINT,
+    estado VARCHAR(20),
+    marcas TEXT,
+    actualizado DATETIME,
+    PRIMARY KEY (id_run, paso)
+);
+
+-- Marcas de agua del ETL incremental (una fila por tabla de SG_Proyectos)
+CREATE TABLE IF NOT EXISTS ETL_Estado (
+    tabla VARCHAR(64) PRIMARY KEY,
+    ultimo_id BIGINT,
+    ultima_fecha DATE,
+    actualizado DATETIME
+);
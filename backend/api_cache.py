@@ -0,0 +1,83 @@
+"""
+api_cache.py
+-------------
+Caché de resultados en memoria para la API, invalidada por la versión de
+datos del Data Warehouse.
+
+El ETL incrementa `DSS_Proyectos.Data_Version` al terminar cada carga; las
+entradas se guardan con la versión vigente y dejan de ser válidas en cuanto
+la versión cambia, sin necesidad de TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Segundos entre lecturas de Data_Version (evita un round-trip por request)
+VERSION_TTL = 5.0
+
+
+class VersionedCache:
+    """LRU acotada cuyas claves incluyen la versión de datos."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get((version, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end((version, key))
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, version: int, value: Any) -> None:
+        with self._lock:
+            # Las entradas de versiones anteriores ya no se pueden leer
+            for k in [k for k in self._data if k[0] != version]:
+                del self._data[k]
+            self._data[(version, key)] = value
+            self._data.move_to_end((version, key))
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key: Hashable, version: int, compute: Callable[[], Any]) -> Any:
+        value = self.get(key, version)
+        if value is None:
+            value = compute()
+            self.put(key, version, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class DataVersion:
+    """Lee `Data_Version` del DW como mucho una vez cada `ttl` segundos."""
+
+    def __init__(self, ttl: float = VERSION_TTL):
+        self.ttl = ttl
+        self._version = 0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self, cursor) -> int:
+        """Versión vigente; `cursor` debe apuntar a DSS_Proyectos."""
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.ttl:
+                return self._version
+        cursor.execute("SELECT version FROM Data_Version WHERE id = 1")
+        row = cursor.fetchone()
+        version = int((row['version'] if isinstance(row, dict) else row[0]) if row else 0)
+        with self._lock:
+            self._version = version
+            self._checked_at = time.monotonic()
+        return version
@@ -0,0 +1,102 @@
+"""
+api_concurrency.py
+-------------------
+Control de concurrencia para las consultas pesadas de la API.
+
+- SingleFlight: peticiones idénticas concurrentes (misma clave canónica)
+    comparten una sola ejecución; el primero la ejecuta y el resto espera su
+    resultado (o su excepción).
+- AdmissionControl: limita cuántas ejecuciones pesadas corren a la vez en el
+    worker. Si no hay hueco tras `max_wait` segundos se lanza `Overloaded`,
+    que la API traduce a 503 + Retry-After en lugar de acumular peticiones
+    hasta que gunicorn mate el worker por timeout.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Tuple
+
+
+class Overloaded(Exception):
+    """No hay capacidad para otra consulta pesada en este momento."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Servidor ocupado, reintente en {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Una ejecución por clave en vuelo; los demás llamantes reciben su resultado."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float = None) -> Tuple[Any, bool]:
+        """Ejecuta `fn` una sola vez por `key` concurrente.
+
+        Devuelve:
+            (resultado, compartido) donde `compartido` indica si se reutilizó
+            la ejecución de otro hilo.
+
+        Lanza:
+            La excepción de `fn`, u `Overloaded` si la espera supera `timeout`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+                self.shared += 1
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise Overloaded(int(timeout or 1))
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result, False
+
+
+class AdmissionControl:
+    """Semáforo acotado con espera máxima para las consultas pesadas."""
+
+    def __init__(self, max_concurrent: int, max_wait: float, retry_after: int):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self._sem = threading.BoundedSemaphore(max_concurrent)
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self):
+        if not self._sem.acquire(timeout=self.max_wait):
+            self.rejected += 1
+            raise Overloaded(self.retry_after)
+        try:
+            yield
+        finally:
+            self._sem.release()
@@ -0,0 +1,222 @@
+"""
+api_retrain.py
+---------------
+Reentrenamiento del modelo Rayleigh en segundo plano y recarga sin cortes.
+
+- ModelHolder: referencia al modelo vigente en cada worker. Como mucho cada
+    `ttl` segundos compara el archivo del artefacto (mtime, tamaño, inodo) y,
+    si cambió, lo lee y sustituye la referencia de una vez; las peticiones en
+    curso terminan con el modelo que ya tenían. `cargador` permite artefactos
+    que no son JSON (p. ej. rayleigh_artefacto.ArtefactoModelos, mapeado en
+    memoria).
+- RetrainScheduler: hilo que lanza `train_rayleigh.py` en un subproceso cada
+    `intervalo` segundos y/o cuando cambia `Data_Version` (el ETL publicó una
+    carga). El entrenamiento escribe el artefacto con archivo temporal +
+    os.replace, así que ningún worker lee un artefacto a medias, y ninguna
+    petición espera al entrenamiento.
+
+Con gunicorn el programador corre en un solo worker, el que obtiene el lock
+de archivo RETRAIN_LOCK (`start_exclusivo`, desde post_fork); nunca en el
+maestro, que hace fork de los workers. También puede correr aparte como
+sidecar:
+
+    python api_retrain.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+import mysql.connector
+from mysql.connector import Error
+
+# Segundos entre comprobaciones del artefacto en cada worker
+MODEL_CHECK_TTL = float(os.getenv('MODEL_CHECK_TTL', '5'))
+
+# Programación: intervalo fijo (0 = desactivado) y/o tras cada carga del ETL
+RETRAIN_INTERVAL = int(os.getenv('RETRAIN_INTERVAL', '0'))
+RETRAIN_ON_ETL = os.getenv('RETRAIN_ON_ETL', '0') == '1'
+RETRAIN_POLL = float(os.getenv('RETRAIN_POLL', '60'))
+RETRAIN_ARGS = os.getenv('RETRAIN_ARGS', '--incremental').split()
+RETRAIN_TIMEOUT = int(os.getenv('RETRAIN_TIMEOUT', '1800'))
+# Lock de archivo que elige el único worker que programa (uno por máquina)
+RETRAIN_LOCK = os.getenv('RETRAIN_LOCK', os.path.join(tempfile.gettempdir(), 'rayleigh_retrain.lock'))
+
+DW_DB = {
+    'host': os.getenv('DW_HOST', 'localhost'),
+    'user': os.getenv('DW_USER', 'root'),
+    'password': os.getenv('DW_PASSWORD', ''),
+    'database': os.getenv('DW_DATABASE', 'DSS_Proyectos')
+}
+
+TRAIN_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'train_rayleigh.py')
+
+
+def _cargar_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class ModelHolder:
+    """Modelo vigente, recargado cuando el artefacto se reemplaza."""
+
+    def __init__(self, path: str, ttl: float = MODEL_CHECK_TTL, cargador: Callable[[str], Any] = _cargar_json):
+        self.path = path
+        self.ttl = ttl
+        self.cargador = cargador
+        self._modelo = None
+        self._firma = None
+        self._checked_at = float('-inf')
+        self._lock = threading.Lock()
+        self.recargas = 0
+
+    def load(self):
+        """Comprueba el artefacto ya (sin esperar al ttl) y devuelve el modelo."""
+        with self._lock:
+            self._checked_at = float('-inf')
+        return self.get()
+
+    def get(self):
+        """Modelo vigente o None si aún no hay artefacto."""
+        if time.monotonic() - self._checked_at < self.ttl:
+            return self._modelo
+        with self._lock:
+            if time.monotonic() - self._checked_at < self.ttl:
+                return self._modelo  # Otro hilo acaba de comprobarlo
+            self._checked_at = time.monotonic()
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return self._modelo
+            # os.replace cambia el inodo aunque mtime no avance
+            firma = (st.st_mtime_ns, st.st_size, st.st_ino)
+            if firma != self._firma:
+                modelo = self.cargador(self.path)
+                self._modelo, self._firma = modelo, firma
+                self.recargas += 1
+            return self._modelo
+
+
+def _leer_data_version() -> Optional[int]:
+    """Data_Version del DW, o None si no se puede leer."""
+    try:
+        conn = mysql.connector.connect(**DW_DB)
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version FROM Data_Version WHERE id = 1")
+            row = cursor.fetchone()
+            cursor.close()
+            return int(row[0]) if row else 0
+        finally:
+            conn.close()
+    except Error as e:
+        print(f"✗ Reentrenamiento: no se pudo leer Data_Version: {e}")
+        return None
+
+
+class RetrainScheduler:
+    """Lanza el entrenamiento en un subproceso según intervalo y/o Data_Version."""
+
+    def __init__(self, intervalo: int = RETRAIN_INTERVAL, con_etl: bool = RETRAIN_ON_ETL,
+                 poll: float = RETRAIN_POLL, args: List[str] = None,
+                 version_fn: Callable[[], Optional[int]] = _leer_data_version):
+        self.intervalo = intervalo
+        self.con_etl = con_etl
+        self.poll = poll
+        self.comando = [sys.executable, TRAIN_SCRIPT] + list(RETRAIN_ARGS if args is None else args)
+        self.version_fn = version_fn
+        self._stop = threading.Event()
+        self._hilo = None
+        self._lock_archivo = None
+        self.ejecuciones = 0
+        self.errores = 0
+        self.ultima = None
+
+    @property
+    def activo(self) -> bool:
+        return bool(self.intervalo) or self.con_etl
+
+    def start(self):
+        if self._hilo is None and self.activo:
+            self._hilo = threading.Thread(target=self._bucle, name='retrain-scheduler', daemon=True)
+            self._hilo.start()
+            print(f"🔁 Reentrenamiento en segundo plano (pid {os.getpid()}): "
+                  f"intervalo={self.intervalo or '-'}s, tras ETL={'sí' if self.con_etl else 'no'}")
+        return self
+
+    def start_exclusivo(self, lock_path: str = RETRAIN_LOCK):
+        """Arranca sólo si este proceso obtiene el lock de `lock_path` (sin esperar).
+
+        Entre los workers de gunicorn gana uno; el sistema operativo libera el
+        lock cuando ese proceso termina, así que el worker que lo reemplaza
+        lo vuelve a tomar. Devuelve True si este proceso quedó programando.
+        """
+        if not self.activo:
+            return False
+        import fcntl  # Sólo POSIX, como gunicorn
+        f = open(lock_path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False  # Otro proceso ya programa
+        self._lock_archivo = f  # Abierto mientras viva el proceso
+        self.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _bucle(self):
+        ultima = time.monotonic()
+        version = self.version_fn() if self.con_etl else None
+        while not self._stop.wait(self.poll):
+            motivo = None
+            if self.intervalo and time.monotonic() - ultima >= self.intervalo:
+                motivo = 'programado'
+            if self.con_etl:
+                nueva = self.version_fn()
+                if nueva is not None:
+                    if version is not None and nueva != version:
+                        motivo = f'etl (Data_Version {version} -> {nueva})'
+                    version = nueva
+            if motivo:
+                self.entrenar(motivo)
+                ultima = time.monotonic()
+
+    def entrenar(self, motivo: str = 'manual') -> bool:
+        """Ejecuta el entrenamiento y espera a que termine (sólo bloquea este hilo)."""
+        t0 = time.perf_counter()
+        try:
+            r = subprocess.run(self.comando, cwd=os.getcwd(), capture_output=True, text=True,
+                               timeout=RETRAIN_TIMEOUT)
+            ok, detalle = r.returncode == 0, (r.stderr or r.stdout).strip().splitlines()[-1:]
+        except (OSError, subprocess.TimeoutExpired) as e:
+            ok, detalle = False, [str(e)]
+        segundos = round(time.perf_counter() - t0, 1)
+        self.ejecuciones += 1
+        self.errores += not ok
+        self.ultima = {'motivo': motivo, 'ok': ok, 'segundos': segundos, 'fin': time.time()}
+        if ok:
+            print(f"✓ Reentrenamiento ({motivo}) en {segundos}s")
+        else:
+            print(f"✗ Reentrenamiento ({motivo}) falló en {segundos}s: {' '.join(detalle)}")
+        return ok
+
+
+if __name__ == '__main__':
+    programador = RetrainScheduler()
+    if not programador.activo:
+        print("Configure RETRAIN_INTERVAL (segundos) y/o RETRAIN_ON_ETL=1")
+        sys.exit(1)
+    programador.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        programador.stop()
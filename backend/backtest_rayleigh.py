@@ -0,0 +1,289 @@
+"""
+backtest_rayleigh.py
+---------------------
+Backtesting del predictor Rayleigh con cortes móviles.
+
+En cada fecha de corte se ajusta el modelo sólo con los defectos detectados
+antes del corte y se pronostican los defectos de las `horizonte` semanas
+siguientes, por segmento (global y cada metodología, el filtro principal de
+`/predict_filtered`), comparándolos con los reales.
+
+Para un proyecto con T semanas transcurridas al corte, forma (sigma) y
+volumen (K) se combinan como en la curva de Putnam/Norden:
+
+    pronóstico(semana T + h) = K * (F(T + h + 1; sigma) - F(T + h; sigma))
+
+Variantes comparadas:
+- segmento: sigma MLE del segmento sobre las semanas de detección, igual que
+    `/predict_filtered`; K = Y / F(T) (MLE de Poisson con Y defectos vistos).
+- global: lo mismo con una sola sigma para todos los proyectos.
+- proyectos: ajuste por proyecto de rayleigh_proyectos (verosimilitud
+    perfilada con préstamo de fuerza de la metodología).
+
+El histograma (proyecto, semana, defectos) se consulta una sola vez y cada
+proceso del pool lo recibe una vez (initializer); cada corte sólo aplica
+máscaras sobre esos arrays, así que los cortes se reparten sin volver a la
+base de datos.
+
+Uso:
+    python backtest_rayleigh.py --cortes 12 --paso 4 --horizonte 8 --workers 4
+"""
+
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import mysql.connector
+import numpy as np
+
+import rayleigh_proyectos
+from train_rayleigh import DW_DB, SG_DB, FUENTES, TRAIN_FUENTE, TRAIN_WORKERS, fetch_project_weeks
+
+VARIANTES = ('segmento', 'global', 'proyectos')
+HORIZONTE = 8
+
+# Histograma precalculado, uno por proceso del pool
+_DATOS = None
+
+
+def preparar_datos(proyectos, filas):
+    """Arrays del backtest a partir de fetch_project_weeks (se calculan una vez)."""
+    indice = {p[0]: i for i, p in enumerate(proyectos)}
+    metodologias = sorted({p[2] or '' for p in proyectos})
+    posicion = {m: i for i, m in enumerate(metodologias)}
+    filas = [(indice[pid], int(semana), int(defectos)) for pid, semana, defectos in filas
+             if pid in indice and semana is not None and semana >= 0]
+    proyecto_idx, semana, defectos = (np.array(c, dtype=np.int64) for c in zip(*filas)) if filas else \
+        (np.empty(0, dtype=np.int64),) * 3
+    return {
+        'segmentos': ['global'] + [f'metodologia={m}' for m in metodologias],
+        'segmento_idx': np.array([posicion[p[2] or ''] for p in proyectos], dtype=np.int64),
+        'inicio': np.array([p[4].toordinal() for p in proyectos], dtype=np.int64),
+        'fin': np.array([p[5].toordinal() if p[5] else np.iinfo(np.int64).max for p in proyectos], dtype=np.int64),
+        'proyecto_idx': proyecto_idx,
+        'semana': semana,
+        'defectos': defectos.astype(float),
+    }
+
+
+def _inicializar(datos):
+    global _DATOS
+    _DATOS = datos
+
+
+def _cdf(t, sigma):
+    return -np.expm1(-(t * t) / (2.0 * sigma * sigma))
+
+
+def _sigma_por_segmento(segmento, semana, defectos, n_seg):
+    """sigma MLE de cada segmento (y global al final) sobre las semanas de detección."""
+    n = np.bincount(segmento, weights=defectos, minlength=n_seg)
+    suma_sq = np.bincount(segmento, weights=defectos * semana * semana, minlength=n_seg)
+    n_glob, sq_glob = n.sum(), suma_sq.sum()
+    sigma_glob = np.sqrt(sq_glob / max(n_glob, 1.0) / 2.0)
+    sigma = np.where(n > 0, np.sqrt(suma_sq / np.maximum(n, 1.0) / 2.0), sigma_glob)
+    return np.maximum(sigma, 1e-6), max(sigma_glob, 1e-6)
+
+
+def evaluar_corte(args):
+    """Ajusta con lo anterior a `corte` y puntúa el horizonte; corre en el pool.
+
+    Devuelve (corte, segundos, filas) con una fila de métricas por variante y segmento.
+    """
+    corte, horizonte, variantes = args
+    t0 = time.perf_counter()
+    d = _DATOS
+    n_seg = len(d['segmentos']) - 1
+    transcurridas = (corte - d['inicio']) // 7
+    activos = np.flatnonzero(transcurridas >= 1)
+    if not len(activos):
+        return corte, time.perf_counter() - t0, []
+    local = np.full(len(d['inicio']), -1)
+    local[activos] = np.arange(len(activos))
+    T = transcurridas[activos]
+    segmento = d['segmento_idx'][activos]
+
+    p = local[d['proyecto_idx']]
+    en_corte = p >= 0
+    p, semana, defectos = p[en_corte], d['semana'][en_corte], d['defectos'][en_corte]
+    T_celda = T[p]
+    entrena = semana < T_celda
+    futuro = ~entrena & (semana < T_celda + horizonte)
+    observados = np.bincount(p[entrena], weights=defectos[entrena], minlength=len(activos))
+
+    # Defectos reales por segmento y semana del horizonte (fila 0 = global)
+    reales = np.zeros((n_seg + 1, horizonte))
+    np.add.at(reales, (segmento[p[futuro]] + 1, semana[futuro] - T_celda[futuro]), defectos[futuro])
+    reales[0] = reales[1:].sum(axis=0)
+    proyectos_seg = np.bincount(segmento + 1, minlength=n_seg + 1)
+    proyectos_seg[0] = len(activos)
+
+    h = np.arange(horizonte + 1, dtype=float)
+    filas = []
+    for variante in variantes:
+        if variante == 'proyectos':
+            res = rayleigh_proyectos.ajustar_proyectos(
+                T, p[entrena], semana[entrena], defectos[entrena], segmento, d['fin'][activos] < corte)
+            sigma, K = res['pico_semana'], res['total_esperado']
+        else:
+            sigma_seg, sigma_glob = _sigma_por_segmento(segmento[p[entrena]], semana[entrena].astype(float),
+                                                        defectos[entrena], n_seg)
+            sigma = sigma_seg[segmento] if variante == 'segmento' else np.full(len(activos), sigma_glob)
+            f_T = _cdf(T.astype(float), sigma)
+            K = np.where(observados > 0, observados / np.maximum(f_T, 1e-12), 0.0)
+        F = _cdf(T[:, None] + h[None, :], sigma[:, None])
+        pronostico = np.zeros((n_seg + 1, horizonte))
+        np.add.at(pronostico, segmento + 1, K[:, None] * np.diff(F, axis=1))
+        pronostico[0] = pronostico[1:].sum(axis=0)
+
+        error = pronostico - reales
+        error_acum = np.cumsum(pronostico, axis=1) - np.cumsum(reales, axis=1)
+        for s, nombre in enumerate(d['segmentos']):
+            if not proyectos_seg[s]:
+                continue
+            filas.append({
+                'corte': date.fromordinal(int(corte)).isoformat(),
+                'variante': variante,
+                'segmento': nombre,
+                'proyectos': int(proyectos_seg[s]),
+                'reales': float(reales[s].sum()),
+                'pronosticados': float(pronostico[s].sum()),
+                'abs_semanal': float(np.abs(error[s]).sum()),
+                'sq_semanal': float((error[s] ** 2).sum()),
+                'abs_acumulado': float(np.abs(error_acum[s]).sum()),
+                'reales_acumulados': float(np.cumsum(reales[s]).sum()),
+            })
+    return corte, time.perf_counter() - t0, filas
+
+
+def fechas_de_corte(datos, cortes, paso, horizonte, hasta=None):
+    """`cortes` fechas separadas `paso` semanas; la última deja `horizonte` semanas observadas."""
+    if hasta is None:
+        if not len(datos['semana']):
+            return []
+        ultima = (datos['inicio'][datos['proyecto_idx']] + 7 * (datos['semana'] + 1)).max()
+        hasta = date.fromordinal(int(ultima)) - timedelta(weeks=horizonte)
+    return [(hasta - timedelta(weeks=paso * i)).toordinal() for i in reversed(range(cortes))]
+
+
+def ejecutar_backtest(datos, fechas, horizonte=HORIZONTE, variantes=VARIANTES, workers=TRAIN_WORKERS):
+    """Evalúa todos los cortes (pool de procesos); devuelve (filas, segundos_por_corte, segundos_total)."""
+    t0 = time.perf_counter()
+    tareas = [(corte, horizonte, tuple(variantes)) for corte in fechas]
+    if workers <= 1 or len(tareas) <= 1:
+        _inicializar(datos)
+        resultados = list(map(evaluar_corte, tareas))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tareas)), initializer=_inicializar,
+                                 initargs=(datos,)) as pool:
+            resultados = list(pool.map(evaluar_corte, tareas))
+    filas = [fila for _, _, filas_corte in resultados for fila in filas_corte]
+    tiempos = {date.fromordinal(int(corte)).isoformat(): round(seg, 4) for corte, seg, _ in resultados}
+    return filas, tiempos, time.perf_counter() - t0
+
+
+def resumir(filas, horizonte):
+    """Métricas por variante y segmento, acumulando todos los cortes.
+
+    - mae / rmse: error por semana del horizonte.
+    - wape: sum|error semanal| / sum(reales).
+    - wape_acumulado: igual sobre la curva acumulada.
+    - sesgo: (pronosticados - reales) / reales.
+    """
+    grupos = {}
+    for f in filas:
+        g = grupos.setdefault((f['variante'], f['segmento']), dict.fromkeys(
+            ('cortes', 'reales', 'pronosticados', 'abs_semanal', 'sq_semanal', 'abs_acumulado',
+             'reales_acumulados'), 0.0))
+        g['cortes'] += 1
+        for campo in g:
+            if campo != 'cortes':
+                g[campo] += f[campo]
+    resumen = []
+    for (variante, segmento), g in sorted(grupos.items()):
+        semanas = g['cortes'] * horizonte
+        resumen.append({
+            'variante': variante,
+            'segmento': segmento,
+            'cortes': int(g['cortes']),
+            'reales': g['reales'],
+            'mae': round(g['abs_semanal'] / semanas, 4),
+            'rmse': round((g['sq_semanal'] / semanas) ** 0.5, 4),
+            'wape': round(g['abs_semanal'] / g['reales'], 4) if g['reales'] else None,
+            'wape_acumulado': round(g['abs_acumulado'] / g['reales_acumulados'], 4) if g['reales_acumulados'] else None,
+            'sesgo': round((g['pronosticados'] - g['reales']) / g['reales'], 4) if g['reales'] else None,
+        })
+    return resumen
+
+
+def imprimir_reporte(resumen, tiempos, segundos_datos, segundos_backtest, workers):
+    print(f"\n{'variante':<10} {'segmento':<28} {'cortes':>6} {'reales':>9} {'mae':>8} {'rmse':>8} "
+          f"{'wape':>7} {'wape_ac':>8} {'sesgo':>7}")
+    def formato(v):
+        return '-' if v is None else f"{v:.3f}"
+
+    for r in resumen:
+        print(f"{r['variante']:<10} {r['segmento'][:28]:<28} {r['cortes']:>6} {r['reales']:>9.0f} {r['mae']:>8.3f} "
+              f"{r['rmse']:>8.3f} {formato(r['wape']):>7} {formato(r['wape_acumulado']):>8} {formato(r['sesgo']):>7}")
+    suma = sum(tiempos.values())
+    print(f"\n⏱  Histograma: {segundos_datos:.2f}s | backtest: {segundos_backtest:.2f}s en {workers} procesos "
+          f"({len(tiempos)} cortes, {suma:.2f}s de cómputo, x{suma / max(segundos_backtest, 1e-9):.1f})")
+
+
+def main(cortes=12, paso=4, horizonte=HORIZONTE, hasta=None, variantes=VARIANTES, workers=TRAIN_WORKERS,
+         fuente=TRAIN_FUENTE, salida=None):
+    t0 = time.perf_counter()
+    conn = mysql.connector.connect(**(DW_DB if fuente == 'dss' else SG_DB))
+    proyectos, filas = fetch_project_weeks(conn, fuente)
+    conn.close()
+    datos = preparar_datos(proyectos, filas)
+    segundos_datos = time.perf_counter() - t0
+    print(f"Histograma: {len(proyectos)} proyectos, {len(datos['semana'])} celdas (proyecto, semana) "
+          f"en {segundos_datos:.2f}s")
+
+    fechas = fechas_de_corte(datos, cortes, paso, horizonte, hasta)
+    if not fechas:
+        print("No hay defectos para el backtest.")
+        return None
+    print(f"Cortes: {date.fromordinal(fechas[0])} .. {date.fromordinal(fechas[-1])} "
+          f"({len(fechas)} cada {paso} semanas, horizonte {horizonte} semanas)")
+    filas_metricas, tiempos, segundos_backtest = ejecutar_backtest(datos, fechas, horizonte, variantes, workers)
+    resumen = resumir(filas_metricas, horizonte)
+    imprimir_reporte(resumen, tiempos, segundos_datos, segundos_backtest, workers)
+
+    reporte = {
+        'fuente': fuente,
+        'horizonte': horizonte,
+        'cortes': [date.fromordinal(c).isoformat() for c in fechas],
+        'resumen': resumen,
+        'detalle': filas_metricas,
+        'tiempos': {'histograma': round(segundos_datos, 4), 'backtest': round(segundos_backtest, 4),
+                    'workers': workers, 'por_corte': tiempos},
+    }
+    if salida:
+        with open(salida, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        print(f"✓ Reporte guardado en {salida}")
+    return reporte
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtesting del predictor Rayleigh con cortes móviles')
+    parser.add_argument('--cortes', type=int, default=12, help='número de fechas de corte')
+    parser.add_argument('--paso', type=int, default=4, help='semanas entre cortes')
+    parser.add_argument('--horizonte', type=int, default=HORIZONTE, help='semanas pronosticadas tras cada corte')
+    parser.add_argument('--hasta', type=date.fromisoformat, default=None,
+                        help='último corte (AAAA-MM-DD); por defecto, último dato menos el horizonte')
+    parser.add_argument('--variantes', default=','.join(VARIANTES), help=f"subconjunto de {','.join(VARIANTES)}")
+    parser.add_argument('--workers', type=int, default=TRAIN_WORKERS, help='procesos para los cortes')
+    parser.add_argument('--fuente', choices=sorted(FUENTES), default=TRAIN_FUENTE)
+    parser.add_argument('--salida', help='archivo JSON con el reporte completo')
+    args = parser.parse_args()
+    variantes = [v.strip() for v in args.variantes.split(',') if v.strip()]
+    desconocidas = [v for v in variantes if v not in VARIANTES]
+    if desconocidas:
+        parser.error(f"Variante desconocida: {', '.join(desconocidas)}")
+    main(cortes=args.cortes, paso=args.paso, horizonte=args.horizonte, hasta=args.hasta, variantes=variantes,
+         workers=args.workers, fuente=args.fuente, salida=args.salida)
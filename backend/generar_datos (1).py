@@ -1,226 +1,614 @@
+"""
+generar_datos (1).py
+---------------------
+Generador de datos sintéticos para SG_Proyectos con factor de escala.
+
+- --sf: factor de escala (estilo TPC). SF1 = el volumen de siempre (200
+    proyectos, 1200 defectos...); SF1000 = 200.000 proyectos / 1,2 M de
+    defectos. Clientes y responsables escalan igual; los catálogos no.
+- --seed: misma semilla y mismo SF = mismos datos (ids incluidos), con
+    cualquier número de procesos.
+- Los conteos por proyecto (tareas, costos, defectos...) se sortean antes de
+    generar nada; con sus sumas acumuladas cada bloque de BLOQUE_PROYECTOS
+    proyectos es dueño de un rango de ids de cada tabla. Así varios procesos
+    insertan a la vez, con ids explícitos y claves foráneas consistentes, sin
+    coordinarse entre sí.
+- INSERT multi-fila: executemany agrupa `--lote` filas por sentencia.
+- Defectos: la fecha de detección sigue la curva Rayleigh de cada proyecto
+    (pico a `--pico` de su duración) dentro de su vida y nunca después de
+    hoy; cada proyecto recibe defectos según su volumen (sesgado, lognormal)
+    y la parte de su curva ya transcurrida. `--curva uniforme` los reparte
+    uniformemente en la vida del proyecto.
+- Con `--salida DIR` no se toca MySQL: cada bloque se escribe como una parte
+    por tabla (DIR/Tabla/part-00042.csv y/o .parquet), así que la memoria no
+    crece con el SF y las claves foráneas cuadran entre archivos. Se generan
+    también cargar_mysql.sql (LOAD DATA LOCAL INFILE, en orden de claves
+    foráneas), cargar_duckdb.sql y manifest.json.
+
+Espera el esquema recién creado (SG_proyectos (2).sql): los ids empiezan en 1.
+
+Uso:
+    python "generar_datos (1).py"                      # SF1
+    python "generar_datos (1).py" --sf 1000 --seed 7 --workers 8
+    python "generar_datos (1).py" --sf 1000 --salida datos_sf1000 --formato ambos
+    mysql --local-infile=1 SG_Proyectos < datos_sf1000/cargar_mysql.sql
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
 import mysql.connector
+import numpy as np
 from mysql.connector import Error
 from faker import Faker
-import random
-from datetime import datetime, timedelta
-import math
 
 # --- CONFIGURACIÓN DE LA BASE DE DATOS ---
 DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': '',
-    'database': 'SG_Proyectos'
+    'host': os.getenv('SG_HOST', 'localhost'),
+    'user': os.getenv('SG_USER', 'root'),
+    'password': os.getenv('SG_PASSWORD', ''),
+    'database': os.getenv('SG_DATABASE', 'SG_Proyectos')
 }
 
-# --- CONFIGURACIÓN DE VOLUMEN (AUMENTADO) ---
-NUM_CLIENTES = 50          # Antes 15
-NUM_RESPONSABLES = 20      # Antes 12
-NUM_PROYECTOS = 200        # Antes 25 (Esto llenará las gráficas)
+# --- CONFIGURACIÓN DE VOLUMEN (SF1) ---
+NUM_CLIENTES = 50
+NUM_RESPONSABLES = 20
+NUM_PROYECTOS = 200        # Esto llena las gráficas
 NUM_TAREAS_POR_PROYECTO = (10, 40)
 NUM_COSTOS_POR_PROYECTO = (5, 15)
 NUM_REGISTROS_TIEMPO_TOTAL = 3500
 NUM_INCIDENCIAS_TOTAL = 300
-NUM_CAPACITACIONES_TOTAL = 100
 NUM_TECNOLOGIAS_POR_PROYECTO = (2, 6)
-NUM_EVALUACIONES_CLIENTE = 150
+PROB_EVALUACION = 0.5      # 50% de proyectos tienen evaluación
 NUM_DEFECTOS_TOTAL = 1200  # Muchos defectos para la curva Rayleigh
 
-fake = Faker('es_MX')
-
-clientes_ids = []
-responsables_ids = []
-proyectos_ids = []
-tareas_ids = []
-
-# Pesos para simular Pareto (VIPs)
-cliente_weights = [] 
-
-def calcular_finanzas_proyecto(presupuesto):
-    # Simula desviaciones realistas
-    factor = random.triangular(0.8, 1.3, 0.95) # Normalmente se gasta lo presupuestado, a veces más
-    costo_total = round(presupuesto * factor, 2)
-    diferencia = presupuesto - costo_total
-    ganancia = round(max(0, diferencia), 2)
-    perdida = round(max(0, -diferencia), 2)
-    return costo_total, ganancia, perdida
-
-def generar_clientes(cursor):
-    print(f"Generando {NUM_CLIENTES} clientes...")
-    sql = "INSERT INTO Clientes (nombre, sector, pais, contacto_nombre, contacto_email) VALUES (%s, %s, %s, %s, %s)"
-    sectores = ['Tecnología', 'Financiero', 'Salud', 'Educación', 'Comercio', 'Gobierno', 'Manufactura', 'Logística']
-    
-    for _ in range(NUM_CLIENTES):
-        cursor.execute(sql, (fake.company(), random.choice(sectores), 'México', fake.name(), fake.email()))
-        clientes_ids.append(cursor.lastrowid)
-        
-    # Asignar pesos a los clientes: 20% son VIPs (peso 10), el resto normales (peso 1)
-    # Esto hará que las gráficas no sean planas
-    global cliente_weights
-    for _ in clientes_ids:
-        if random.random() < 0.2: # 20% probabilidad de ser VIP
-            cliente_weights.append(10)
-        else:
-            cliente_weights.append(1)
-
-def generar_responsables(cursor):
-    print(f"Generando {NUM_RESPONSABLES} responsables...")
-    sql = "INSERT INTO Responsables (nombre, rol, equipo_asignado, correo, telefono) VALUES (%s, %s, %s, %s, %s)"
-    roles = ['Project Manager', 'Tech Lead', 'Senior Developer', 'QA Lead', 'Architect']
-    for _ in range(NUM_RESPONSABLES):
-        cursor.execute(sql, (fake.name(), random.choice(roles), 'Equipo ' + random.choice(['Alpha', 'Beta', 'Gamma', 'Delta', 'Omega']), fake.email(), fake.phone_number()))
-        responsables_ids.append(cursor.lastrowid)
-
-def generar_proyectos(cursor):
-    print(f"Generando {NUM_PROYECTOS} proyectos (Dist. Pareto)...")
-    sql = """
-    INSERT INTO Proyectos (nombre, descripcion, metodologia, fecha_inicio, fecha_fin, 
-                           presupuesto, costo_total, ganancia, perdida, horas_invertidas, 
-                           progreso, entregables_count, etapas, cronograma, documentacion, 
-                           id_cliente, id_responsable, num_tecnologias_emergentes, estado)
-    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+# --- CURVA DE DEFECTOS ---
+CURVAS = ('rayleigh', 'uniforme')
+PICO_DEFECTOS = 0.4        # Semana del pico (sigma) como fracción de la duración
+DISPERSION_PICO = 0.25     # Variación lognormal del pico entre proyectos
+DISPERSION_VOLUMEN = 0.75  # Variación lognormal de los defectos totales por proyecto
+
+# --- EJECUCIÓN ---
+BLOQUE_PROYECTOS = 1000    # Proyectos por tarea del pool (fija los rangos de ids)
+LOTE_INSERT = int(os.getenv('GEN_LOTE', '1000'))
+GEN_WORKERS = int(os.getenv('GEN_WORKERS', str(os.cpu_count() or 1)))
+TAMANO_CATALOGO_TEXTO = 500  # Textos de Faker por catálogo (se eligen al azar)
+FORMATOS = {'csv': ('csv',), 'parquet': ('parquet',), 'ambos': ('csv', 'parquet')}
+NULO_CSV = '\\N'           # NULL en los CSV (distinto del texto "NULL")
+
+SECTORES = ['Tecnología', 'Financiero', 'Salud', 'Educación', 'Comercio', 'Gobierno', 'Manufactura', 'Logística']
+ROLES = ['Project Manager', 'Tech Lead', 'Senior Developer', 'QA Lead', 'Architect']
+EQUIPOS = ['Alpha', 'Beta', 'Gamma', 'Delta', 'Omega']
+ESTADOS_PROYECTO = ['Planificación', 'En Progreso', 'En Revisión', 'Completado', 'En Pausa', 'Cancelado']
+PESOS_ESTADO = [0.1, 0.3, 0.1, 0.4, 0.05, 0.05]
+# Estados posibles según las fechas: sin empezar, en curso y ya terminado
+FASES_PROYECTO = (['Planificación'], ['En Progreso', 'En Revisión', 'En Pausa'], ['Completado', 'Cancelado'])
+# Días máximos entre la detección y la corrección de un defecto
+DIAS_CORRECCION = 30
+METODOLOGIAS = ['Scrum', 'Kanban', 'Waterfall', 'Híbrida', 'SAFe']
+PREFIJOS = ['Sistema', 'Plataforma', 'App', 'Migración', 'API', 'Dashboard', 'Módulo', 'Infraestructura']
+PROVEEDORES = ['AWS', 'Azure', 'Google', 'Oracle', 'Atlassian', 'Licencia X', 'Consultora Y']
+TIPOS_COSTO = ['Infraestructura', 'Licencia', 'Consultoría']
+TECNOLOGIAS = ['React', 'Angular', 'Vue', 'Node.js', 'Python', 'Java', 'C#', 'Go', 'Docker', 'K8s', 'AWS']
+TIPOS_DEFECTO = ['Funcional', 'Interfaz', 'Seguridad', 'Rendimiento', 'Datos']
+SEVERIDADES = ['Cosmético', 'Menor', 'Mayor', 'Crítico']
+ETAPAS = ['Etapa 1', 'Etapa 2', 'Etapa 3', 'Etapa 4', 'Etapa 5']
+
+# Columnas de cada tabla, en el orden de las filas generadas
+COLUMNAS = {
+    'Clientes': ('id_cliente', 'nombre', 'sector', 'pais', 'contacto_nombre', 'contacto_email'),
+    'Responsables': ('id_responsable', 'nombre', 'rol', 'equipo_asignado', 'correo', 'telefono'),
+    'Proyectos': ('id_proyecto', 'nombre', 'descripcion', 'metodologia', 'fecha_inicio', 'fecha_fin',
+                  'presupuesto', 'costo_total', 'ganancia', 'perdida', 'horas_invertidas',
+                  'progreso', 'entregables_count', 'etapas', 'cronograma', 'documentacion',
+                  'id_cliente', 'id_responsable', 'num_tecnologias_emergentes', 'estado',
+                  'defectos_detectados'),
+    'Tareas': ('id_tarea', 'id_proyecto', 'titulo', 'descripcion', 'estado', 'prioridad',
+               'horas_estimadas', 'horas_reales', 'fecha_inicio', 'fecha_fin'),
+    'Costos': ('id_costo', 'id_proyecto', 'tipo', 'proveedor', 'monto', 'moneda', 'fecha'),
+    'Tecnologias_Proyecto': ('id', 'id_proyecto', 'tecnologia', 'es_emergente', 'version'),
+    'Evaluaciones_Cliente': ('id_evaluacion', 'id_proyecto', 'calificacion', 'comentarios', 'fecha'),
+    'Registro_Tiempo': ('id_registro', 'id_responsable', 'id_tarea', 'fecha', 'descripcion', 'horasTrabajadas'),
+    'Incidencias': ('id_incidencia', 'id_proyecto', 'id_tarea', 'id_responsable', 'severidad', 'estado',
+                    'fecha_reporte', 'notas'),
+    'Defectos': ('id_defecto', 'id_proyecto', 'tipo_defecto', 'severidad', 'estado', 'etapa_deteccion',
+                 'fecha_deteccion', 'fecha_correccion'),
+}
+# Conteos por proyecto que fijan los rangos de ids de cada tabla hija
+CONTEOS = {
+    'Tareas': 'tareas',
+    'Costos': 'costos',
+    'Tecnologias_Proyecto': 'tecnologias',
+    'Evaluaciones_Cliente': 'evaluaciones',
+    'Registro_Tiempo': 'registros',
+    'Incidencias': 'incidencias',
+    'Defectos': 'defectos',
+}
+
+# Plan compartido, uno por proceso del pool
+_PLAN = None
+
+
+def escalar(base, sf):
+    return max(1, int(round(base * sf)))
+
+
+def _cdf_rayleigh(t, sigma):
+    return -np.expm1(-(t * t) / (2.0 * sigma * sigma))
+
+
+def planificar(sf=1.0, seed=42, hoy=None, curva='rayleigh', pico=PICO_DEFECTOS):
+    """Sortea fechas y conteos por proyecto y los primeros ids de cada tabla.
+
+    Todo lo que depende de más de un bloque (pesos de clientes, totales
+    repartidos entre proyectos) se decide aquí, una sola vez.
     """
-    estados = ['Planificación', 'En Progreso', 'En Revisión', 'Completado', 'En Pausa', 'Cancelado']
-    metodologias = ['Scrum', 'Kanban', 'Waterfall', 'Híbrida', 'SAFe']
-    prefijos = ['Sistema', 'Plataforma', 'App', 'Migración', 'API', 'Dashboard', 'Módulo', 'Infraestructura']
-    
-    for i in range(NUM_PROYECTOS):
-        inicio = fake.date_between(start_date='-2y', end_date='today') # Histórico de 2 años
-        duracion = random.randint(30, 365)
-        fin = inicio + timedelta(days=duracion)
-        
-        # Presupuesto variado: Muchos pequeños, pocos gigantes (Triangular)
-        presu = round(random.triangular(50000, 5000000, 200000), 2)
-        costo, ganancia, perdida = calcular_finanzas_proyecto(presu)
-        
-        # Selección de cliente basada en pesos (Pareto)
-        cliente_asignado = random.choices(clientes_ids, weights=cliente_weights, k=1)[0]
-        
-        nombre_proy = f"{random.choice(prefijos)} {fake.word().capitalize()} ({i+1})"
-        
-        estado = random.choices(estados, weights=[0.1, 0.3, 0.1, 0.4, 0.05, 0.05], k=1)[0]
-        progreso = 100.0 if estado == 'Completado' else random.uniform(0, 99)
-
-        cursor.execute(sql, (
-            nombre_proy, fake.text(100), random.choice(metodologias), inicio, fin,
-            presu, costo, ganancia, perdida, random.randint(100, 5000), 
-            progreso, random.randint(5, 50), 'Etapa Actual', 'Cronograma Link', 'Docs Link',
-            cliente_asignado, random.choice(responsables_ids), 
-            random.randint(0, 5), estado
-        ))
-        proyectos_ids.append(cursor.lastrowid)
-
-def generar_tareas(cursor):
-    print("Generando tareas masivas...")
-    sql = """INSERT INTO Tareas (id_proyecto, titulo, descripcion, estado, prioridad, horas_estimadas, horas_reales, fecha_inicio, fecha_fin) 
-             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-    
-    for pid in proyectos_ids:
-        num_t = random.randint(*NUM_TAREAS_POR_PROYECTO)
-        for _ in range(num_t):
-            inicio = fake.date_between(start_date='-2y', end_date='today')
-            fin = inicio + timedelta(days=random.randint(1, 20))
-            estado = random.choice(['Pendiente', 'En progreso', 'Completada'])
-            est = random.randint(4, 40)
-            real = est * random.uniform(0.8, 1.5) if estado == 'Completada' else 0
-            
-            cursor.execute(sql, (pid, fake.sentence(nb_words=4), 'Desc', estado, random.choice(['Alta', 'Media', 'Baja']), est, real, inicio, fin))
-            tareas_ids.append(cursor.lastrowid)
-
-def generar_costos(cursor):
-    print("Generando costos variados...")
-    sql = "INSERT INTO Costos (id_proyecto, tipo, proveedor, monto, moneda, fecha) VALUES (%s, %s, %s, %s, %s, %s)"
-    proveedores = ['AWS', 'Azure', 'Google', 'Oracle', 'Atlassian', 'Licencia X', 'Consultora Y']
-    
-    for pid in proyectos_ids:
-        for _ in range(random.randint(*NUM_COSTOS_POR_PROYECTO)):
-            monto = random.expovariate(1/10000) # Distribución exponencial para montos (muchos pagos chicos, pocos grandes)
-            cursor.execute(sql, (pid, random.choice(['Infra', 'Licencia', 'Servicios']), random.choice(proveedores), round(monto, 2), 'MXN', fake.date_between(start_date='-2y', end_date='today')))
-
-def generar_registros_tiempo(cursor):
-    print(f"Generando {NUM_REGISTROS_TIEMPO_TOTAL} registros de tiempo...")
-    sql = "INSERT INTO Registro_Tiempo (id_responsable, id_tarea, fecha, descripcion, horasTrabajadas) VALUES (%s, %s, %s, %s, %s)"
-    for _ in range(NUM_REGISTROS_TIEMPO_TOTAL):
-        horas = random.randint(1, 9)
-        cursor.execute(sql, (random.choice(responsables_ids), random.choice(tareas_ids), fake.date_between(start_date='-1y', end_date='today'), 'Dev', f'{horas}:00:00'))
-
-def generar_incidencias(cursor):
-    print("Generando incidencias...")
-    sql = "INSERT INTO Incidencias (id_proyecto, id_tarea, id_responsable, severidad, estado, fecha_reporte, notas) VALUES (%s, %s, %s, %s, %s, %s, %s)"
-    for _ in range(NUM_INCIDENCIAS_TOTAL):
-        cursor.execute(sql, (random.choice(proyectos_ids), None, random.choice(responsables_ids), random.choice(['Alta', 'Media', 'Baja']), 'Abierto', fake.date_between(start_date='-1y', end_date='today'), 'Nota'))
-
-def generar_defectos(cursor):
-    print(f"Generando {NUM_DEFECTOS_TOTAL} defectos (Rayleigh simulado)...")
-    sql = """
-    INSERT INTO Defectos (id_proyecto, tipo_defecto, severidad, estado, etapa_deteccion, fecha_deteccion, fecha_correccion)
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    rng = np.random.default_rng([seed, 0])
+    n = escalar(NUM_PROYECTOS, sf)
+    n_clientes = escalar(NUM_CLIENTES, sf)
+    # Pareto: 20% de clientes VIP (peso 10) para que las gráficas no sean planas
+    pesos = np.where(rng.random(n_clientes) < 0.2, 10.0, 1.0)
+    reparto = np.full(n, 1.0 / n)
+
+    # Vida de cada proyecto (histórico de 2 años, algunos aún por empezar) y
+    # ventana observable hasta hoy (vacía si el proyecto no ha empezado)
+    dias_atras = rng.integers(-60, 731, n)
+    duracion = rng.integers(30, 366, n)
+    limite = np.clip(dias_atras, 0, duracion).astype(float)
+    sigma = pico * duracion * rng.lognormal(0.0, DISPERSION_PICO, n)
+    # Defectos: volumen propio (sesgado) por la parte de la curva ya transcurrida
+    volumen = rng.lognormal(0.0, DISPERSION_VOLUMEN, n)
+    visible = _cdf_rayleigh(limite, sigma) if curva == 'rayleigh' else limite / duracion
+    peso_defectos = volumen * visible
+    if peso_defectos.sum() > 0:
+        peso_defectos = peso_defectos / peso_defectos.sum()
+    else:
+        peso_defectos = reparto
+    conteos = {
+        'tareas': rng.integers(NUM_TAREAS_POR_PROYECTO[0], NUM_TAREAS_POR_PROYECTO[1] + 1, n),
+        'costos': rng.integers(NUM_COSTOS_POR_PROYECTO[0], NUM_COSTOS_POR_PROYECTO[1] + 1, n),
+        'tecnologias': rng.integers(NUM_TECNOLOGIAS_POR_PROYECTO[0], NUM_TECNOLOGIAS_POR_PROYECTO[1] + 1, n),
+        'evaluaciones': (rng.random(n) < PROB_EVALUACION).astype(np.int64),
+        'registros': rng.multinomial(escalar(NUM_REGISTROS_TIEMPO_TOTAL, sf), reparto),
+        'incidencias': rng.multinomial(escalar(NUM_INCIDENCIAS_TOTAL, sf), reparto),
+        'defectos': rng.multinomial(escalar(NUM_DEFECTOS_TOTAL, sf), peso_defectos),
+    }
+    # Primer id de cada proyecto en cada tabla hija (ids desde 1)
+    primeros = {clave: np.concatenate(([1], 1 + np.cumsum(c)[:-1])).astype(np.int64)
+                for clave, c in conteos.items()}
+    return {
+        'sf': sf,
+        'seed': seed,
+        'hoy': (hoy or date.today()).isoformat(),
+        'proyectos': n,
+        'clientes': n_clientes,
+        'responsables': escalar(NUM_RESPONSABLES, sf),
+        'pesos_clientes': pesos / pesos.sum(),
+        'curva': curva,
+        'dias_atras': dias_atras,
+        'duracion': duracion,
+        'limite': limite,
+        'sigma': sigma,
+        'conteos': conteos,
+        'primeros': primeros,
+    }
+
+
+def catalogos_texto(seed):
+    """Textos de Faker precalculados: Faker es lento por fila a gran escala."""
+    fake = Faker('es_MX')
+    fake.seed_instance(seed)
+    k = TAMANO_CATALOGO_TEXTO
+    return {
+        'empresas': [fake.company() for _ in range(k)],
+        'personas': [fake.name() for _ in range(k)],
+        'correos': [fake.email() for _ in range(k)],
+        'telefonos': [fake.phone_number() for _ in range(k)],
+        'palabras': [fake.word().capitalize() for _ in range(k)],
+        'frases': [fake.sentence(nb_words=4) for _ in range(k)],
+        'textos': [fake.text(100) for _ in range(k)],
+    }
+
+
+def _elegir(rng, opciones, n, p=None):
+    return np.asarray(opciones, dtype=object)[rng.choice(len(opciones), n, p=p)]
+
+
+def _fechas(rng, hoy, dias_atras, n):
+    """n fechas 'AAAA-MM-DD' uniformes entre hoy - dias_atras y hoy."""
+    return (np.datetime64(hoy) - rng.integers(0, dias_atras + 1, n)).astype(str)
+
+
+def _estados_proyecto(rng, dias_atras, duracion):
+    """Estado coherente con las fechas; dentro de cada fase se reparte según PESOS_ESTADO."""
+    pesos = dict(zip(ESTADOS_PROYECTO, PESOS_ESTADO))
+    fase = np.where(dias_atras < 0, 0, np.where(dias_atras >= duracion, 2, 1))
+    estado = np.empty(len(fase), dtype=object)
+    for i, opciones in enumerate(FASES_PROYECTO):
+        p = np.array([pesos[e] for e in opciones])
+        en_fase = fase == i
+        estado[en_fase] = _elegir(rng, opciones, int(en_fase.sum()), p / p.sum())
+    return estado
+
+
+def _filas(*columnas):
+    return list(zip(*(c.tolist() if isinstance(c, np.ndarray) else c for c in columnas)))
+
+
+def tablas_dimension(plan):
+    """Filas de Clientes y Responsables: (tabla, filas)."""
+    rng = np.random.default_rng([plan['seed'], 1])
+    texto = catalogos_texto(plan['seed'])
+    n = plan['clientes']
+    yield 'Clientes', _filas(np.arange(1, n + 1), _elegir(rng, texto['empresas'], n), _elegir(rng, SECTORES, n),
+                             ['México'] * n, _elegir(rng, texto['personas'], n), _elegir(rng, texto['correos'], n))
+    n = plan['responsables']
+    yield 'Responsables', _filas(np.arange(1, n + 1), _elegir(rng, texto['personas'], n), _elegir(rng, ROLES, n),
+                                 ['Equipo ' + e for e in _elegir(rng, EQUIPOS, n)],
+                                 _elegir(rng, texto['correos'], n), _elegir(rng, texto['telefonos'], n))
+
+
+def tablas_bloque(plan, bloque, texto):
+    """Filas de todas las tablas de los proyectos del bloque, en orden de claves foráneas.
+
+    Produce (tabla, filas); los ids salen de los rangos precalculados en el plan.
     """
-    tipos = ['Funcional', 'Interfaz', 'Seguridad', 'Performance', 'Datos']
-    severidades = ['Cosmético', 'Menor', 'Mayor', 'Crítico']
-    etapas = ['Etapa 1', 'Etapa 2', 'Etapa 3', 'Etapa 4', 'Etapa 5']
-    pesos_etapa = [0.05, 0.15, 0.50, 0.25, 0.05] # Pico en etapa 3
-
-    for _ in range(NUM_DEFECTOS_TOTAL):
-        pid = random.choice(proyectos_ids)
-        etapa = random.choices(etapas, weights=pesos_etapa, k=1)[0]
-        fecha = fake.date_between(start_date='-1y', end_date='today')
-        
-        # Correlación: Si es crítico, probable etapa tardía
-        sev = random.choice(severidades)
-        
-        data = (pid, random.choice(tipos), sev, random.choice(['Abierto', 'Corregido']), etapa, fecha, None)
-        cursor.execute(sql, data)
-
-def generar_tecnologias_proyecto(cursor):
-    print("Generando stack tecnológico...")
-    sql = "INSERT INTO Tecnologias_Proyecto (id_proyecto, tecnologia, es_emergente, version) VALUES (%s, %s, %s, %s)"
-    techs = ['React', 'Angular', 'Vue', 'Node.js', 'Python', 'Java', 'C#', 'Go', 'Docker', 'K8s', 'AWS']
-    for pid in proyectos_ids:
-        # Algunos proyectos tienen muchas tecnologías, otros pocas
-        count = random.randint(*NUM_TECNOLOGIAS_POR_PROYECTO)
-        mis_techs = random.sample(techs, min(count, len(techs)))
-        for t in mis_techs:
-            cursor.execute(sql, (pid, t, random.choice([True, False]), 'v1.0'))
-
-def generar_evaluaciones_cliente(cursor):
-    print("Generando feedback clientes...")
-    sql = "INSERT INTO Evaluaciones_Cliente (id_proyecto, calificacion, comentarios, fecha) VALUES (%s, %s, %s, %s)"
-    # Solo proyectos completados o avanzados
-    for pid in proyectos_ids:
-        if random.random() > 0.5: # 50% de proyectos tienen evaluación
-            calif = round(random.triangular(1, 5, 4), 2) # Tendencia a buena calificación (4)
-            cursor.execute(sql, (pid, calif, 'Comentario', fake.date_between(start_date='-1y', end_date='today')))
-
-def main():
+    rng = np.random.default_rng([plan['seed'], 2, bloque])
+    hoy = plan['hoy']
+    desde = bloque * BLOQUE_PROYECTOS
+    hasta = min(desde + BLOQUE_PROYECTOS, plan['proyectos'])
+    n = hasta - desde
+    ids = np.arange(desde + 1, hasta + 1)
+    conteos = {clave: c[desde:hasta] for clave, c in plan['conteos'].items()}
+
+    def hijos(tabla):
+        """(ids de la tabla, proyecto de cada fila) para las filas del bloque."""
+        clave = CONTEOS[tabla]
+        total = int(conteos[clave].sum())
+        primero = int(plan['primeros'][clave][desde]) if n else 1
+        return np.arange(primero, primero + total), np.repeat(ids, conteos[clave])
+
+    # Proyectos (fechas sorteadas en el plan)
+    inicio_dia = np.datetime64(hoy) - plan['dias_atras'][desde:hasta]
+    inicio = inicio_dia.astype(str)
+    fin = (inicio_dia + plan['duracion'][desde:hasta]).astype(str)
+    # Presupuesto variado: muchos pequeños, pocos gigantes (triangular)
+    presupuesto = rng.triangular(50000, 200000, 5000000, n).round(2)
+    # Normalmente se gasta lo presupuestado, a veces más
+    costo = (presupuesto * rng.triangular(0.8, 0.95, 1.3, n)).round(2)
+    diferencia = presupuesto - costo
+    dias_atras, duracion = plan['dias_atras'][desde:hasta], plan['duracion'][desde:hasta]
+    estado = _estados_proyecto(rng, dias_atras, duracion)
+    # Avance: parte del plazo transcurrida (0 sin empezar, 100 si se completó)
+    transcurrido = np.clip(dias_atras / duracion, 0.0, 1.0)
+    progreso = np.where(estado == 'Completado', 100.0, 99 * transcurrido * rng.uniform(0.7, 1.0, n)).round(2)
+    nombres = [f"{p} {w} ({i})" for p, w, i in zip(_elegir(rng, PREFIJOS, n), _elegir(rng, texto['palabras'], n),
+                                                   ids.tolist())]
+    yield 'Proyectos', _filas(
+        ids, nombres, _elegir(rng, texto['textos'], n), _elegir(rng, METODOLOGIAS, n), inicio, fin,
+        presupuesto, costo, np.maximum(diferencia, 0).round(2), np.maximum(-diferencia, 0).round(2),
+        rng.integers(100, 5001, n), progreso, rng.integers(5, 51, n), ['Etapa Actual'] * n,
+        ['Cronograma Link'] * n, ['Docs Link'] * n,
+        rng.choice(plan['clientes'], n, p=plan['pesos_clientes']) + 1,
+        rng.integers(1, plan['responsables'] + 1, n), rng.integers(0, 6, n), estado, conteos['defectos'])
+
+    # Tareas
+    id_tarea, proyecto = hijos('Tareas')
+    m = len(id_tarea)
+    estado = _elegir(rng, ['Pendiente', 'En progreso', 'Completada'], m)
+    estimadas = rng.integers(4, 41, m)
+    reales = np.where(estado == 'Completada', estimadas * rng.uniform(0.8, 1.5, m), 0).round(2)
+    inicio = _fechas(rng, hoy, 730, m)
+    fin = (inicio.astype('datetime64[D]') + rng.integers(1, 21, m)).astype(str)
+    yield 'Tareas', _filas(id_tarea, proyecto, _elegir(rng, texto['frases'], m), ['Desc'] * m, estado,
+                           _elegir(rng, ['Alta', 'Media', 'Baja'], m), estimadas, reales, inicio, fin)
+    # Primera tarea y número de tareas de cada proyecto (para Registro_Tiempo)
+    primera_tarea = plan['primeros']['tareas'][desde:hasta]
+    tareas_proyecto = conteos['tareas']
+
+    # Costos: distribución exponencial (muchos pagos chicos, pocos grandes)
+    id_costo, proyecto = hijos('Costos')
+    m = len(id_costo)
+    yield 'Costos', _filas(id_costo, proyecto, _elegir(rng, TIPOS_COSTO, m), _elegir(rng, PROVEEDORES, m),
+                           rng.exponential(10000, m).round(2), ['MXN'] * m, _fechas(rng, hoy, 730, m))
+
+    # Stack tecnológico: k tecnologías distintas por proyecto
+    id_tec, proyecto = hijos('Tecnologias_Proyecto')
+    m = len(id_tec)
+    orden = np.argsort(rng.random((n, len(TECNOLOGIAS))), axis=1)
+    elegidas = orden[np.arange(len(TECNOLOGIAS)) < conteos['tecnologias'][:, None]]
+    yield 'Tecnologias_Proyecto', _filas(id_tec, proyecto, np.asarray(TECNOLOGIAS, dtype=object)[elegidas],
+                                         rng.random(m) < 0.5, ['v1.0'] * m)
+
+    # Evaluaciones: tendencia a buena calificación (4)
+    id_eval, proyecto = hijos('Evaluaciones_Cliente')
+    m = len(id_eval)
+    yield 'Evaluaciones_Cliente', _filas(id_eval, proyecto, rng.triangular(1, 4, 5, m).round(2),
+                                         ['Comentario'] * m, _fechas(rng, hoy, 365, m))
+
+    # Registro de tiempo: sobre tareas del propio bloque
+    id_reg, proyecto = hijos('Registro_Tiempo')
+    m = len(id_reg)
+    local = proyecto - (desde + 1)
+    tarea = primera_tarea[local] + (rng.random(m) * tareas_proyecto[local]).astype(np.int64)
+    yield 'Registro_Tiempo', _filas(id_reg, rng.integers(1, plan['responsables'] + 1, m), tarea,
+                                    _fechas(rng, hoy, 365, m), ['Dev'] * m,
+                                    [f'{h}:00:00' for h in rng.integers(1, 10, m).tolist()])
+
+    # Incidencias
+    id_inc, proyecto = hijos('Incidencias')
+    m = len(id_inc)
+    yield 'Incidencias', _filas(id_inc, proyecto, [None] * m, rng.integers(1, plan['responsables'] + 1, m),
+                                _elegir(rng, ['Alta', 'Media', 'Baja'], m), ['Abierto'] * m,
+                                _fechas(rng, hoy, 365, m), ['Nota'] * m)
+
+    # Defectos: día de detección por la curva del proyecto, truncada a lo observable
+    id_def, proyecto = hijos('Defectos')
+    m = len(id_def)
+    local = proyecto - (desde + 1)
+    limite = plan['limite'][desde:hasta][local]
+    if plan['curva'] == 'rayleigh':
+        # Inversa de la CDF con u ~ U(0, F(limite)): nunca antes del inicio ni después de hoy
+        sigma = plan['sigma'][desde:hasta][local]
+        u = rng.random(m) * _cdf_rayleigh(limite, sigma)
+        dia = sigma * np.sqrt(-2.0 * np.log1p(-u))
+    else:
+        dia = rng.random(m) * limite
+    dia = np.minimum(np.floor(dia), limite).astype(np.int64)
+    # Etapa según el punto de la vida del proyecto (cinco tramos iguales)
+    etapa = np.minimum(dia * len(ETAPAS) // plan['duracion'][desde:hasta][local], len(ETAPAS) - 1)
+    # Corrección de 1 a DIAS_CORRECCION días después de la detección, nunca
+    # después de hoy: lo detectado hoy sigue abierto
+    deteccion = inicio_dia[local] + dia
+    margen = plan['dias_atras'][desde:hasta][local] - dia
+    corregido = (rng.random(m) < 0.5) & (margen > 0)
+    correccion = deteccion + np.minimum(rng.integers(1, DIAS_CORRECCION + 1, m), np.maximum(margen, 1))
+    yield 'Defectos', _filas(id_def, proyecto, _elegir(rng, TIPOS_DEFECTO, m), _elegir(rng, SEVERIDADES, m),
+                             np.where(corregido, 'Corregido', 'Abierto').astype(object),
+                             np.asarray(ETAPAS, dtype=object)[etapa], deteccion.astype(str),
+                             np.where(corregido, correccion.astype(str).astype(object), None))
+
+
+def ruta_parte(salida, tabla, parte, extension):
+    return os.path.join(salida, tabla, f"part-{parte:05d}.{extension}")
+
+
+def _valor_csv(v):
+    """NULL es \\N (el nulo nativo de LOAD DATA); la barra invertida del texto se duplica."""
+    if v is None:
+        return NULO_CSV
+    if isinstance(v, bool):
+        return int(v)
+    if isinstance(v, str):
+        # Los textos generados no llevan barras invertidas, así que DuckDB
+        # (sin carácter de escape) lee lo mismo que MySQL
+        return v.replace('\\', '\\\\')
+    return v
+
+
+def _escribir_csv(ruta, tabla, filas):
+    """CSV RFC 4180 con cabecera; NULL como \\N y booleanos como 1/0 (LOAD DATA con ESCAPED BY '\\\\')."""
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        escritor = csv.writer(f, lineterminator='\n')
+        escritor.writerow(COLUMNAS[tabla])
+        escritor.writerows(tuple(map(_valor_csv, fila)) for fila in filas)
+
+
+def _escribir_parquet(ruta, tabla, filas):
+    """Parquet con ids int64 y fechas date32 (también para columnas sólo NULL)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columnas = list(zip(*filas)) if filas else [()] * len(COLUMNAS[tabla])
+    arrays = []
+    for nombre, valores in zip(COLUMNAS[tabla], columnas):
+        if nombre.startswith('fecha'):
+            arrays.append(pa.array(np.array(valores, dtype='datetime64[D]'), type=pa.date32()))
+        elif nombre == 'id' or nombre.startswith('id_'):
+            arrays.append(pa.array(valores, type=pa.int64()))
+        else:
+            arrays.append(pa.array(valores))
+    pq.write_table(pa.Table.from_arrays(arrays, names=list(COLUMNAS[tabla])), ruta)
+
+
+def escribir_parte(salida, formatos, tabla, parte, filas):
+    """Escribe una parte de `tabla` en cada formato (un archivo por bloque)."""
+    os.makedirs(os.path.join(salida, tabla), exist_ok=True)
+    for formato in formatos:
+        escribir = _escribir_csv if formato == 'csv' else _escribir_parquet
+        escribir(ruta_parte(salida, tabla, parte, formato), tabla, filas)
+
+
+def escribir_cargadores(salida, formatos, partes, plan, totales):
+    """Scripts de carga (MySQL y DuckDB) y manifiesto, en orden de claves foráneas."""
+    salida = os.path.abspath(salida)
+    tablas = list(COLUMNAS)
+    if 'csv' in formatos:
+        sentencias = ["-- Carga masiva: mysql --local-infile=1 SG_Proyectos < cargar_mysql.sql",
+                      "-- Las claves foráneas ya son consistentes entre archivos",
+                      "SET foreign_key_checks = 0;", "SET unique_checks = 0;"]
+        for tabla in tablas:
+            for parte in partes[tabla]:
+                ruta = ruta_parte(salida, tabla, parte, 'csv').replace('\\', '/')
+                sentencias.append(
+                    f"LOAD DATA LOCAL INFILE '{ruta}' INTO TABLE {tabla} CHARACTER SET utf8mb4 "
+                    f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+                    f"LINES TERMINATED BY '\\n' IGNORE 1 LINES ({', '.join(COLUMNAS[tabla])});")
+        sentencias += ["SET unique_checks = 1;", "SET foreign_key_checks = 1;"]
+        with open(os.path.join(salida, 'cargar_mysql.sql'), 'w', encoding='utf-8') as f:
+            f.write('\n'.join(sentencias) + '\n')
+
+    formato = 'parquet' if 'parquet' in formatos else 'csv'
+    lector = "read_parquet('{}')" if formato == 'parquet' else "read_csv('{}', header = true, nullstr = '%s')" % NULO_CSV
+    with open(os.path.join(salida, 'cargar_duckdb.sql'), 'w', encoding='utf-8') as f:
+        f.write("-- Motor embebido: duckdb sg.duckdb < cargar_duckdb.sql\n")
+        for tabla in tablas:
+            patron = os.path.join(salida, tabla, f'*.{formato}').replace('\\', '/')
+            f.write(f"CREATE OR REPLACE TABLE {tabla} AS SELECT * FROM {lector.format(patron)};\n")
+
+    manifiesto = {
+        'sf': plan['sf'], 'seed': plan['seed'], 'hoy': plan['hoy'], 'curva': plan['curva'],
+        'formatos': list(formatos),
+        'tablas': {tabla: {'columnas': list(COLUMNAS[tabla]), 'filas': totales.get(tabla, 0),
+                           'partes': len(partes[tabla])} for tabla in tablas},
+    }
+    with open(os.path.join(salida, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, indent=2, ensure_ascii=False)
+
+
+def insertar(cursor, tabla, filas, lote=LOTE_INSERT):
+    """INSERT multi-fila: executemany agrupa `lote` filas en cada sentencia."""
+    columnas = COLUMNAS[tabla]
+    sql = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(['%s'] * len(columnas))})"
+    for i in range(0, len(filas), lote):
+        cursor.executemany(sql, filas[i:i + lote])
+
+
+def _inicializar(plan):
+    global _PLAN
+    _PLAN = plan
+
+
+def generar_bloque(args):
+    """Genera un bloque de proyectos con sus tablas hijas y lo inserta (o escribe); corre en el pool."""
+    bloque, lote, salida, formatos = args
+    t0 = time.perf_counter()
+    texto = catalogos_texto(_PLAN['seed'])
+    filas = {}
+    if salida:
+        # Una parte por tabla y bloque: sólo el bloque en curso está en memoria
+        for tabla, datos in tablas_bloque(_PLAN, bloque, texto):
+            escribir_parte(salida, formatos, tabla, bloque, datos)
+            filas[tabla] = len(datos)
+        return bloque, filas, time.perf_counter() - t0
+    cnx = mysql.connector.connect(**DB_CONFIG)
     try:
-        cnx = mysql.connector.connect(**DB_CONFIG)
         cursor = cnx.cursor()
-        print("✓ Conectado a BD. Iniciando generación MASIVA...")
-        
-        generar_clientes(cursor)
-        generar_responsables(cursor)
-        generar_proyectos(cursor)
-        generar_tareas(cursor)
-        generar_costos(cursor)
-        generar_registros_tiempo(cursor)
-        generar_incidencias(cursor)
-        generar_defectos(cursor)
-        generar_tecnologias_proyecto(cursor)
-        generar_evaluaciones_cliente(cursor) # Agregué esta llamada que faltaba
+        for tabla, datos in tablas_bloque(_PLAN, bloque, texto):
+            insertar(cursor, tabla, datos, lote)
+            filas[tabla] = len(datos)
+        cnx.commit()
+        cursor.close()
+    finally:
+        cnx.close()
+    return bloque, filas, time.perf_counter() - t0
+
+
+def _dimensiones_a_archivos(plan, salida, formatos):
+    if os.path.isdir(salida) and os.listdir(salida):
+        print(f"✗ {salida} no está vacío: use un directorio nuevo para no mezclar partes de otra generación.")
+        return None
+    totales = {}
+    for tabla, filas in tablas_dimension(plan):
+        escribir_parte(salida, formatos, tabla, 0, filas)
+        totales[tabla] = len(filas)
+    print(f"✓ Escribiendo SF{plan['sf']:g} (semilla {plan['seed']}) en {salida} ({', '.join(formatos)})")
+    return totales
+
 
+def _dimensiones_a_mysql(plan, lote):
+    cnx = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = cnx.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Proyectos")
+        if cursor.fetchone()[0]:
+            print("✗ SG_Proyectos ya tiene datos: recree el esquema (SG_proyectos (2).sql) antes de generar.")
+            return None
+        print(f"✓ Conectado a BD. Generando SF{plan['sf']:g} (semilla {plan['seed']})...")
+        totales = {}
+        for tabla, filas in tablas_dimension(plan):
+            insertar(cursor, tabla, filas, lote)
+            totales[tabla] = len(filas)
         cnx.commit()
-        print("\n" + "="*50)
-        print("✓ ¡DATOS GENERADOS CORRECTAMENTE!")
-        print(f"  • {NUM_PROYECTOS} Proyectos")
-        print(f"  • {NUM_CLIENTES} Clientes")
-        print(f"  • ~{len(tareas_ids)} Tareas")
-        print("="*50)
-    except Error as e:
-        print(f"Error: {e}")
+        cursor.close()
+        return totales
     finally:
-        if 'cursor' in locals(): cursor.close()
-        if 'cnx' in locals(): cnx.close()
+        cnx.close()
+
+
+def main(sf=1.0, seed=42, workers=GEN_WORKERS, lote=LOTE_INSERT, hoy=None, salida=None, formato='csv',
+         curva='rayleigh', pico=PICO_DEFECTOS):
+    t0 = time.perf_counter()
+    plan = planificar(sf, seed, hoy, curva, pico)
+    bloques = -(-plan['proyectos'] // BLOQUE_PROYECTOS)
+    formatos = FORMATOS[formato]
+    if salida and 'parquet' in formatos:
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("✗ El formato parquet necesita pyarrow (pip install pyarrow)")
+            return False
+    try:
+        if salida:
+            totales = _dimensiones_a_archivos(plan, salida, formatos)
+        else:
+            totales = _dimensiones_a_mysql(plan, lote)
+        if totales is None:
+            return False
+        print(f"  {plan['proyectos']} proyectos en {bloques} bloques, {workers} procesos...")
+
+        tareas = [(b, lote, salida, formatos) for b in range(bloques)]
+        if workers <= 1 or bloques <= 1:
+            _inicializar(plan)
+            resultados = map(generar_bloque, tareas)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=min(workers, bloques), initializer=_inicializar,
+                                       initargs=(plan,))
+            resultados = pool.map(generar_bloque, tareas)
+        try:
+            for hechos, (bloque, filas, segundos) in enumerate(resultados, 1):
+                for tabla, n in filas.items():
+                    totales[tabla] = totales.get(tabla, 0) + n
+                if bloques > 1:
+                    print(f"  bloque {bloque + 1}/{bloques} en {segundos:.1f}s ({hechos} terminados)")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+    except (Error, OSError) as e:
+        print(f"✗ Error: {e}")
+        return False
+    if salida:
+        # Dimensiones: una parte (la 0); el resto, una por bloque
+        partes = {tabla: [0] if tabla in ('Clientes', 'Responsables') else list(range(bloques))
+                  for tabla in COLUMNAS}
+        escribir_cargadores(salida, formatos, partes, plan, totales)
+
+    segundos = time.perf_counter() - t0
+    filas = sum(totales.values())
+    print("\n" + "=" * 50)
+    print("✓ ¡DATOS GENERADOS CORRECTAMENTE!")
+    for tabla, n in totales.items():
+        print(f"  • {n} {tabla}")
+    print(f"  {filas} filas en {segundos:.1f}s ({filas / max(segundos, 1e-9):,.0f} filas/s)")
+    print("=" * 50)
+    return True
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Generador de datos sintéticos para SG_Proyectos')
+    parser.add_argument('--sf', type=float, default=1.0,
+                        help='factor de escala: 1 = 200 proyectos / 1200 defectos; 1000 = 200k / 1,2M')
+    parser.add_argument('--seed', type=int, default=42, help='semilla (mismos datos con la misma semilla y SF)')
+    parser.add_argument('--workers', type=int, default=GEN_WORKERS, help='procesos que generan bloques en paralelo')
+    parser.add_argument('--lote', type=int, default=LOTE_INSERT, help='filas por INSERT multi-fila')
+    parser.add_argument('--hoy', type=date.fromisoformat, default=None,
+                        help='fecha de referencia (AAAA-MM-DD) para datos reproducibles entre días')
+    parser.add_argument('--curva', choices=CURVAS, default='rayleigh',
+                        help='forma de las fechas de detección dentro de la vida de cada proyecto')
+    parser.add_argument('--pico', type=float, default=PICO_DEFECTOS,
+                        help='pico de la curva Rayleigh como fracción de la duración del proyecto')
+    parser.add_argument('--salida', help='directorio de salida: escribe archivos por tabla en lugar de insertar')
+    parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv', help='formato de --salida')
+    args = parser.parse_args()
+    if args.sf <= 0:
+        parser.error('--sf debe ser positivo')
+    if args.pico <= 0:
+        parser.error('--pico debe ser positivo')
+    if not main(sf=args.sf, seed=args.seed, workers=args.workers, lote=args.lote, hoy=args.hoy,
+                salida=args.salida, formato=args.formato, curva=args.curva, pico=args.pico):
+        raise SystemExit(1)
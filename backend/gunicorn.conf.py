@@ -0,0 +1,52 @@
+"""
+gunicorn.conf.py
+-----------------
+Configuración de gunicorn para `rayleigh_api:APP`.
+
+- preload_app: el maestro importa la app una sola vez y en when_ready
+    carga modelo y planes sin tocar la base de datos; los workers lo heredan
+    por copy-on-write.
+- post_fork: cada worker descarta los pools heredados, abre los suyos y
+    completa el warm-up antes de recibir tráfico. Si RETRAIN_INTERVAL /
+    RETRAIN_ON_ETL están configuradas, el worker que obtiene el lock
+    RETRAIN_LOCK lanza el reentrenamiento en segundo plano (uno por máquina;
+    el maestro no crea hilos, porque hace fork de los workers). Cada worker
+    recarga el modelo al ver el artefacto nuevo (api_retrain.py).
+- gthread: varios hilos por worker, de modo que peticiones idénticas se
+    coalescen y el control de admisión limita las consultas pesadas
+    (ver api_concurrency.py). DB_POOL_SIZE debe ser >= threads.
+
+Uso: gunicorn -c gunicorn.conf.py rayleigh_api:APP
+"""
+import gc
+import os
+
+# Debe fijarse antes de que el maestro importe la app
+os.environ.setdefault('GUNICORN_PRELOAD', '1')
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+preload_app = os.environ['GUNICORN_PRELOAD'] == '1'
+
+
+def when_ready(server):
+    if preload_app:
+        # Modelo y planes en el maestro para compartirlos (sin tocar la base de datos)
+        import rayleigh_api
+        rayleigh_api.warm_up(abrir_pools=False)
+    # Congelar lo cargado en el preload evita que el GC del worker escriba en
+    # esas páginas (y rompa el copy-on-write) al recorrerlas.
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import rayleigh_api
+    rayleigh_api.reset_pools()
+    rayleigh_api.warm_up(abrir_pools=True)
+    from api_retrain import RetrainScheduler
+    worker.retrain = RetrainScheduler()
+    worker.retrain.start_exclusivo()
@@ -0,0 +1,180 @@
+-- ==============================
+-- MIGRACIÓN DE DSS_Proyectos
+-- ==============================
+-- Lleva a la versión 2 del esquema un DSS_Proyectos creado con el script
+-- anterior (Dim_Tiempo con AUTO_INCREMENT, hechos sin clave natural).
+-- "DSS_proyectos (2).sql" empieza con DROP SCHEMA y crea todo vacío: úsalo
+-- si no hace falta conservar nada. Este script conserva las dimensiones y el
+-- historial de Model_Rayleigh, y vacía los hechos, que la siguiente
+-- ejecución del ETL (carga completa, ETL_Estado vacío) vuelve a cargar.
+--
+-- Se ejecuta una sola vez: las columnas e índices ya agregados fallan con
+-- "Duplicate column/key name" si se repite.
+--
+-- Uso:
+--     mysql DSS_Proyectos < backend/migrar_DSS_proyectos.sql
+--     python backend/etl.py --modo completo
+
+USE `DSS_Proyectos`;
+
+-- Los hechos apuntan a las claves antiguas (autonuméricas) de Dim_Tiempo
+SET FOREIGN_KEY_CHECKS = 0;
+TRUNCATE TABLE Fact_Proyectos;
+TRUNCATE TABLE Fact_Tareas;
+TRUNCATE TABLE Fact_Tiempo_Trabajo;
+TRUNCATE TABLE Fact_Costos;
+TRUNCATE TABLE Fact_Incidencias;
+TRUNCATE TABLE Fact_Defectos;
+TRUNCATE TABLE Dim_Tiempo;
+
+-- id_tiempo pasa a ser AAAAMMDD calculado por el ETL
+ALTER TABLE Dim_Tiempo
+    MODIFY id_tiempo INT NOT NULL,
+    ADD UNIQUE INDEX idx_fecha (fecha);
+
+-- Claves naturales de SG para los upserts de la carga incremental
+ALTER TABLE Fact_Proyectos
+    ADD UNIQUE INDEX idx_fp_proyecto (id_proyecto);
+ALTER TABLE Fact_Tareas
+    ADD UNIQUE INDEX idx_ft_tarea (id_tarea);
+ALTER TABLE Fact_Tiempo_Trabajo
+    ADD COLUMN id_registro INT AFTER id_fact_trabajo,
+    ADD UNIQUE INDEX idx_ftt_registro (id_registro);
+ALTER TABLE Fact_Costos
+    ADD COLUMN id_costo INT AFTER id_fact_costo,
+    ADD UNIQUE INDEX idx_fc_costo (id_costo);
+ALTER TABLE Fact_Incidencias
+    ADD COLUMN id_incidencia INT AFTER id_fact_incidencia,
+    ADD UNIQUE INDEX idx_fi_incidencia (id_incidencia);
+ALTER TABLE Fact_Defectos
+    ADD COLUMN id_defecto INT AFTER id_fact_defecto,
+    ADD UNIQUE INDEX idx_fd_defecto (id_defecto);
+SET FOREIGN_KEY_CHECKS = 1;
+
+-- Modelos por segmento y reentrenamiento incremental
+ALTER TABLE Model_Rayleigh
+    ADD COLUMN segmento VARCHAR(191) NOT NULL DEFAULT 'global' AFTER id_model,
+    MODIFY mean_sq DOUBLE,
+    ADD COLUMN sum_sq BIGINT AFTER mean_sq,
+    ADD COLUMN histograma MEDIUMTEXT AFTER sum_sq,
+    ADD COLUMN ultimo_id_defecto BIGINT AFTER histograma,
+    MODIFY trained_at DATETIME(6),
+    ADD INDEX idx_segmento (segmento, trained_at);
+
+-- Tablas nuevas (mismas definiciones que DSS_proyectos (2).sql)
+CREATE TABLE IF NOT EXISTS Agg_Cuboide (
+    id_celda INT AUTO_INCREMENT PRIMARY KEY,
+    cuboide VARCHAR(80) NOT NULL,
+    cliente VARCHAR(100),
+    anio INT,
+    trimestre INT,
+    mes INT,
+    metodologia VARCHAR(100),
+    etapa VARCHAR(50),
+    severidad VARCHAR(20),
+    proyectos INT DEFAULT 0,
+    ingresos DECIMAL(16,2) DEFAULT 0,
+    defectos INT DEFAULT 0,
+    INDEX idx_cuboide (cuboide)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Proyectos_Mes (
+    mes INT NOT NULL,
+    estado VARCHAR(50) NOT NULL,
+    proyectos INT,
+    presupuesto DECIMAL(14,2),
+    PRIMARY KEY (mes, estado)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Defectos_Mes (
+    mes INT NOT NULL,
+    severidad VARCHAR(20) NOT NULL,
+    estado VARCHAR(20) NOT NULL,
+    defectos INT,
+    PRIMARY KEY (mes, severidad, estado)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Satisfaccion (
+    fecha DATE PRIMARY KEY,
+    evaluaciones INT,
+    suma_calificacion DECIMAL(12,2)
+);
+
+CREATE TABLE IF NOT EXISTS Agg_Dash_Recientes (
+    id_proyecto INT PRIMARY KEY,
+    proyecto VARCHAR(100),
+    cliente VARCHAR(100),
+    estado VARCHAR(50),
+    fecha_inicio DATE,
+    fecha_fin DATE,
+    INDEX idx_recientes_fecha (fecha_inicio)
+);
+
+CREATE TABLE IF NOT EXISTS Data_Version (
+    id TINYINT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    actualizado DATETIME
+);
+INSERT IGNORE INTO Data_Version (id, version, actualizado) VALUES (1, 0, NOW());
+
+CREATE TABLE IF NOT EXISTS ETL_Runs (
+    id_run INT AUTO_INCREMENT PRIMARY KEY,
+    inicio DATETIME,
+    fin DATETIME,
+    segundos DECIMAL(10,3),
+    modo VARCHAR(20),
+    carga VARCHAR(20),
+    workers INT,
+    estado VARCHAR(20),
+    filas BIGINT,
+    errores INT,
+    reanudaciones INT DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS ETL_Steps (
+    id_step INT AUTO_INCREMENT PRIMARY KEY,
+    id_run INT NOT NULL,
+    paso VARCHAR(64),
+    desde DATETIME(3),
+    hasta DATETIME(3),
+    segundos DECIMAL(10,3),
+    filas_extraidas BIGINT,
+    filas_cargadas BIGINT,
+    filas_s DECIMAL(14,1),
+    lotes INT,
+    reintentos INT,
+    estado VARCHAR(20),
+    error TEXT,
+    hilo VARCHAR(32),
+    INDEX idx_paso_run (paso, id_run),
+    FOREIGN KEY (id_run) REFERENCES ETL_Runs(id_run)
+);
+
+CREATE TABLE IF NOT EXISTS ETL_Checkpoints (
+    id_run INT NOT NULL,
+    paso VARCHAR(64) NOT NULL,
+    lote INT,
+    ultimo_id BIGINT,
+    filas BIGINT,
+    estado VARCHAR(20),
+    marcas TEXT,
+    actualizado DATETIME,
+    PRIMARY KEY (id_run, paso)
+);
+
+CREATE TABLE IF NOT EXISTS ETL_Estado (
+    tabla VARCHAR(64) PRIMARY KEY,
+    ultimo_id BIGINT,
+    ultima_fecha DATE,
+    actualizado DATETIME
+);
+-- Sin marcas de agua la próxima ejecución hace carga completa
+DELETE FROM ETL_Estado;
+
+CREATE TABLE IF NOT EXISTS Esquema_Version (
+    id TINYINT PRIMARY KEY,
+    version INT NOT NULL,
+    actualizado DATETIME
+);
+INSERT INTO Esquema_Version (id, version, actualizado) VALUES (1, 2, NOW())
+    ON DUPLICATE KEY UPDATE version = VALUES(version), actualizado = VALUES(actualizado);
@@ -0,0 +1,206 @@
+"""
+olap_lattice.py
+----------------
+Retícula (lattice) de cuboides para el análisis OLAP multidimensional sobre
+`DSS_Proyectos`. El ETL precalcula todos los cuboides y la API sólo tiene que
+elegir el más pequeño que responde una consulta y filtrarlo.
+
+Dimensiones:
+- cliente, metodologia             (grano de proyecto)
+- tiempo: anio > trimestre > mes   (jerarquía; un nivel incluye a los superiores)
+- etapa, severidad                 (grano de defecto)
+
+Medidas (todas aditivas): proyectos, ingresos, defectos.
+
+Notas:
+- Las celdas de proyecto llegan con etapa/severidad en None. Los cuboides que
+    incluyen etapa o severidad sólo contienen celdas de defecto, por lo que en
+    esos cortes `proyectos` e `ingresos` valen 0.
+- Cada cuboide se deriva de su padre ya calculado con menos filas en lugar de
+    volver a recorrer los hechos.
+"""
+
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Orden canónico de los atributos; define la posición de cada valor en las claves
+ATRIBUTOS = ('cliente', 'anio', 'trimestre', 'mes', 'metodologia', 'etapa', 'severidad')
+MEDIDAS = ('proyectos', 'ingresos', 'defectos')
+
+NIVELES_TIEMPO = ('anio', 'trimestre', 'mes')
+ATRIBUTOS_DEFECTO = frozenset(('etapa', 'severidad'))
+DIMENSIONES_PLANAS = ('cliente', 'metodologia', 'etapa', 'severidad')
+
+# Alias aceptados en las consultas ('tiempo' equivale al nivel más fino)
+ALIAS = {'tiempo': 'mes', 'tecnologia': 'metodologia'}
+
+APEX = '*'
+
+Cuboide = Tuple[str, ...]
+Clave = Tuple
+Celdas = Dict[Clave, List[float]]
+
+
+def _cerrar_tiempo(atributos: Iterable[str]) -> frozenset:
+    """Agrega los niveles de tiempo superiores implicados por el más fino."""
+    attrs = set(atributos)
+    for i, nivel in enumerate(NIVELES_TIEMPO):
+        if nivel in attrs:
+            attrs.update(NIVELES_TIEMPO[:i])
+    return frozenset(attrs)
+
+
+def normalizar(atributos: Iterable[str]) -> Cuboide:
+    """Devuelve el cuboide canónico (tupla ordenada) para una lista de atributos.
+
+    Lanza:
+        ValueError si algún atributo no pertenece a la retícula.
+    """
+    attrs = []
+    for a in atributos:
+        a = ALIAS.get(a, a)
+        if a not in ATRIBUTOS:
+            raise ValueError(f"Atributo OLAP desconocido: {a}")
+        attrs.append(a)
+    cerrado = _cerrar_tiempo(attrs)
+    return tuple(a for a in ATRIBUTOS if a in cerrado)
+
+
+def nombre(cuboide: Cuboide) -> str:
+    """Identificador textual del cuboide (se guarda en `Agg_Cuboide.cuboide`)."""
+    return '|'.join(cuboide) if cuboide else APEX
+
+
+def desde_nombre(texto: str) -> Cuboide:
+    return () if texto == APEX else normalizar(texto.split('|'))
+
+
+def enumerar_cuboides() -> List[Cuboide]:
+    """Todos los cuboides de la retícula: 4 niveles de tiempo x 2^4 = 64."""
+    cuboides = []
+    for nivel in (None,) + NIVELES_TIEMPO:
+        for r in range(len(DIMENSIONES_PLANAS) + 1):
+            for combo in combinations(DIMENSIONES_PLANAS, r):
+                attrs = list(combo) + ([nivel] if nivel else [])
+                cuboides.append(normalizar(attrs))
+    return cuboides
+
+
+def es_derivable(padre: Cuboide, hijo: Cuboide) -> bool:
+    """True si `hijo` puede calcularse agregando `padre`.
+
+    Un cuboide sin atributos de defecto no puede salir de uno que los tenga,
+    porque ahí ya se descartaron las celdas de proyecto.
+    """
+    if not set(hijo) <= set(padre):
+        return False
+    return bool(ATRIBUTOS_DEFECTO & set(hijo)) or not (ATRIBUTOS_DEFECTO & set(padre))
+
+
+def agregar(celdas: Celdas, padre: Cuboide, hijo: Cuboide) -> Celdas:
+    """Roll-up: proyecta las claves de `padre` sobre `hijo` y suma las medidas."""
+    conservar = set(hijo)
+    resultado: Celdas = {}
+    for clave, medidas in celdas.items():
+        nueva = tuple(v if a in conservar else None for a, v in zip(ATRIBUTOS, clave))
+        acumulado = resultado.get(nueva)
+        if acumulado is None:
+            resultado[nueva] = list(medidas)
+        else:
+            for i, v in enumerate(medidas):
+                acumulado[i] += v
+    return resultado
+
+
+def construir_lattice(celdas_base: Iterable[Sequence]) -> Dict[Cuboide, Celdas]:
+    """Materializa los 64 cuboides a partir de las celdas del grano más fino.
+
+    Args:
+        celdas_base: filas (cliente, anio, trimestre, mes, metodologia, etapa,
+            severidad, proyectos, ingresos, defectos). Las celdas de proyecto
+            traen etapa y severidad en None.
+
+    Devuelve:
+        dict cuboide -> {clave: [proyectos, ingresos, defectos]}
+    """
+    todas: Celdas = {}
+    defectos: Celdas = {}
+    n = len(ATRIBUTOS)
+    for fila in celdas_base:
+        clave = tuple(fila[:n])
+        medidas = [float(v or 0) for v in fila[n:n + len(MEDIDAS)]]
+        destinos = (todas,) if clave[5] is None and clave[6] is None else (todas, defectos)
+        for destino in destinos:
+            acumulado = destino.get(clave)
+            if acumulado is None:
+                destino[clave] = list(medidas)
+            else:
+                for i, v in enumerate(medidas):
+                    acumulado[i] += v
+
+    raiz = tuple(ATRIBUTOS)
+    raiz_proyecto = tuple(a for a in ATRIBUTOS if a not in ATRIBUTOS_DEFECTO)
+    lattice: Dict[Cuboide, Celdas] = {
+        raiz: defectos,
+        raiz_proyecto: agregar(todas, raiz, raiz_proyecto),
+    }
+
+    # De más fino a más grueso: todo padre posible ya está calculado
+    pendientes = sorted(enumerar_cuboides(), key=len, reverse=True)
+    for cuboide in pendientes:
+        if cuboide in lattice:
+            continue
+        padre = min((p for p in lattice if es_derivable(p, cuboide)), key=lambda p: len(lattice[p]))
+        lattice[cuboide] = agregar(lattice[padre], padre, cuboide)
+    return lattice
+
+
+def elegir_cuboide(requeridos: Iterable[str], tamanos: Dict[str, int]) -> Cuboide:
+    """Elige el cuboide materializado más pequeño que contiene `requeridos`.
+
+    Args:
+        requeridos: atributos de agrupación y de filtro de la consulta.
+        tamanos: filas por cuboide (`nombre(cuboide)` -> filas).
+    """
+    req = normalizar(requeridos)
+    candidatos = [c for c in enumerar_cuboides() if es_derivable(c, req)]
+    return min(candidatos, key=lambda c: (tamanos.get(nombre(c), float('inf')), len(c)))
+
+
+def roll_up(dims: Sequence[str], dim: str) -> Optional[Cuboide]:
+    """Cuboide vecino al subir un nivel en `dim` (mes -> trimestre -> anio -> fuera)."""
+    actual = normalizar(dims)
+    dim = ALIAS.get(dim, dim)
+    if dim in NIVELES_TIEMPO:
+        niveles = [a for a in actual if a in NIVELES_TIEMPO]
+        if not niveles:
+            return None
+        restantes = [a for a in actual if a not in NIVELES_TIEMPO]
+        return normalizar(restantes + niveles[:-1])
+    if dim not in actual:
+        return None
+    return normalizar(a for a in actual if a != dim)
+
+
+def drill_down(dims: Sequence[str], dim: str) -> Optional[Cuboide]:
+    """Cuboide vecino al bajar en `dim` (agrega la dimensión o un nivel de tiempo)."""
+    actual = normalizar(dims)
+    dim = ALIAS.get(dim, dim)
+    if dim in NIVELES_TIEMPO:
+        niveles = [a for a in actual if a in NIVELES_TIEMPO]
+        if len(niveles) == len(NIVELES_TIEMPO):
+            return None
+        return normalizar(list(actual) + [NIVELES_TIEMPO[len(niveles)]])
+    if dim in actual or dim not in ATRIBUTOS:
+        return None
+    return normalizar(list(actual) + [dim])
+
+
+def filas(celdas: Celdas, cuboide: Cuboide) -> List[dict]:
+    """Convierte celdas en filas tipo dict con sólo los atributos del cuboide."""
+    resultado = []
+    for clave, medidas in celdas.items():
+        fila = {a: clave[ATRIBUTOS.index(a)] for a in cuboide}
+        fila.update(zip(MEDIDAS, medidas))
+        resultado.append(fila)
+    return resultado
@@ -0,0 +1,245 @@
+"""
+olap_query.py
+--------------
+Mini-lenguaje de consultas OLAP sobre el esquema estrella de `DSS_Proyectos`.
+Una especificación JSON se valida contra una lista blanca construida a partir
+del esquema y se compila a una única sentencia SQL parametrizada.
+
+Especificación:
+    {
+      "hecho": "defectos",                         # proyectos | defectos
+      "dims": ["cliente", "anio"],                 # group-by
+      "medidas": ["count", "sum:cantidad", "distinct:id_proyecto"],
+      "filtros": {"anio": 2024,                    # igualdad
+                  "metodologia": ["Scrum", "Kanban"],   # IN
+                  "mes": {"min": 1, "max": 6}},    # rango
+      "orden": "sum_cantidad",                     # opcional (por defecto 1a medida)
+      "top": 10                                    # opcional
+    }
+
+Notas:
+- El plan compilado (SQL) depende sólo de la "forma" de la especificación
+    (dims, medidas, tipo de cada filtro, orden, top) y se guarda en caché;
+    los valores viajan siempre como parámetros.
+- Ningún identificador proviene del cliente: todos salen de `ESQUEMA`.
+"""
+
+import json
+from functools import lru_cache
+from typing import List, Tuple
+
+OPERACIONES = {
+    'sum': 'SUM({})',
+    'avg': 'AVG({})',
+    'count': 'COUNT(*)',
+    'distinct': 'COUNT(DISTINCT {})',
+}
+
+MAX_TOP = 1000
+
+# Joins disponibles (alias -> cláusula)
+_JOINS = {
+    'dp': 'LEFT JOIN Dim_Proyecto dp ON {h}.id_proyecto = dp.id_proyecto',
+    't': 'LEFT JOIN Dim_Tiempo t ON {h}.id_tiempo = t.id_tiempo',
+    'fpc': 'LEFT JOIN Fact_Proyectos fpc ON {h}.id_proyecto = fpc.id_proyecto',
+    'dc': 'LEFT JOIN Dim_Cliente dc ON {cli}.id_cliente = dc.id_cliente',
+    'dr': 'LEFT JOIN Dim_Responsable dr ON {cli}.id_responsable = dr.id_responsable',
+}
+
+_DIMS_COMUNES = {
+    'proyecto': ('dp.nombre', ('dp',)),
+    'metodologia': ('dp.metodologia', ('dp',)),
+    'estado_proyecto': ('dp.estado', ('dp',)),
+    'anio': ('t.anio', ('t',)),
+    'trimestre': ('t.trimestre', ('t',)),
+    'mes': ('t.mes', ('t',)),
+}
+
+# Lista blanca: hecho -> tabla, alias, dimensiones (expresión, joins) y columnas medibles
+ESQUEMA = {
+    'proyectos': {
+        'tabla': 'Fact_Proyectos',
+        'alias': 'fp',
+        'dims': dict(_DIMS_COMUNES, **{
+            'cliente': ('dc.nombre', ('dc',)),
+            'sector': ('dc.sector', ('dc',)),
+            'responsable': ('dr.nombre', ('dr',)),
+        }),
+        'columnas': ('presupuesto', 'costo_total', 'ganancia', 'perdida', 'progreso',
+                     'entregables_count', 'horas_invertidas', 'desviacion_presupuesto',
+                     'desviacion_tiempo', 'tasa_defectos', 'satisfaccion_cliente', 'roi',
+                     'id_proyecto', 'id_cliente', 'id_responsable'),
+    },
+    'defectos': {
+        'tabla': 'Fact_Defectos',
+        'alias': 'fd',
+        'dims': dict(_DIMS_COMUNES, **{
+            'cliente': ('dc.nombre', ('fpc', 'dc')),
+            'sector': ('dc.sector', ('fpc', 'dc')),
+            'responsable': ('dr.nombre', ('fpc', 'dr')),
+            'tipo_defecto': ('fd.tipo_defecto', ()),
+            'severidad': ('fd.severidad', ()),
+            'estado_defecto': ('fd.estado_defecto', ()),
+            'etapa': ('fd.etapa_deteccion', ()),
+        }),
+        'columnas': ('cantidad', 'dias_correccion', 'id_proyecto'),
+    },
+}
+
+
+def _forma_filtro(valor) -> str:
+    """Tipo de filtro a partir de su valor: eq, null, in:<n> o range:<min|max>."""
+    if isinstance(valor, list):
+        if not valor or not all(isinstance(v, (str, int, float)) for v in valor):
+            raise ValueError("Filtro IN vacío o con valores no escalares")
+        return f"in:{len(valor)}"
+    if isinstance(valor, dict):
+        limites = tuple(k for k in ('min', 'max') if k in valor)
+        if not limites or set(valor) - {'min', 'max'} or not all(isinstance(v, (str, int, float)) for v in valor.values()):
+            raise ValueError("Filtro de rango inválido (use 'min' y/o 'max')")
+        return 'range:' + '|'.join(limites)
+    if valor is None:
+        return 'null'
+    if isinstance(valor, (str, int, float)):
+        return 'eq'
+    raise ValueError("Valor de filtro no soportado")
+
+
+def _alias_medida(medida: str) -> str:
+    op, _, col = medida.partition(':')
+    return f"{op}_{col}" if col else op
+
+
+def validar(spec: dict) -> Tuple[tuple, List]:
+    """Valida la especificación y la separa en (forma, parámetros).
+
+    Lanza:
+        ValueError con un mensaje apto para el cliente.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError("La especificación debe ser un objeto JSON")
+    hecho = spec.get('hecho', 'proyectos')
+    if hecho not in ESQUEMA:
+        raise ValueError(f"Hecho desconocido: {hecho}")
+    esquema = ESQUEMA[hecho]
+
+    dims = spec.get('dims') or []
+    if not isinstance(dims, list) or not all(isinstance(d, str) for d in dims) or len(set(dims)) != len(dims):
+        raise ValueError("'dims' debe ser una lista sin repetidos")
+    for d in dims:
+        if d not in esquema['dims']:
+            raise ValueError(f"Dimensión no permitida para '{hecho}': {d}")
+
+    medidas = spec.get('medidas') or ['count']
+    if not isinstance(medidas, list):
+        raise ValueError("'medidas' debe ser una lista")
+    for m in medidas:
+        if not isinstance(m, str):
+            raise ValueError(f"Medida inválida: {m}")
+        op, _, col = m.partition(':')
+        if op not in OPERACIONES:
+            raise ValueError(f"Operación no soportada: {op}")
+        if (op == 'count') != (col == '') or (col and col not in esquema['columnas']):
+            raise ValueError(f"Medida inválida para '{hecho}': {m}")
+
+    filtros = spec.get('filtros') or {}
+    if not isinstance(filtros, dict):
+        raise ValueError("'filtros' debe ser un objeto")
+    forma_filtros = []
+    params = []
+    for d in sorted(filtros):
+        if d not in esquema['dims']:
+            raise ValueError(f"Filtro no permitido para '{hecho}': {d}")
+        valor = filtros[d]
+        forma = _forma_filtro(valor)
+        forma_filtros.append((d, forma))
+        if forma.startswith('in:'):
+            params.extend(valor)
+        elif forma.startswith('range:'):
+            params.extend(valor[k] for k in ('min', 'max') if k in valor)
+        elif forma == 'eq':
+            params.append(valor)
+
+    aliases = [_alias_medida(m) for m in medidas]
+    orden = spec.get('orden') or aliases[0]
+    if orden not in aliases and orden not in dims:
+        raise ValueError(f"'orden' debe ser una medida o dimensión de la consulta: {orden}")
+
+    top = spec.get('top')
+    if top is not None:
+        if not isinstance(top, int) or isinstance(top, bool) or not 0 < top <= MAX_TOP:
+            raise ValueError(f"'top' debe ser un entero entre 1 y {MAX_TOP}")
+        params.append(top)
+
+    forma = (hecho, tuple(dims), tuple(medidas), tuple(forma_filtros), orden, top is not None)
+    return forma, params
+
+
+@lru_cache(maxsize=256)
+def compilar(forma: tuple) -> str:
+    """Compila la forma de una especificación ya validada a SQL parametrizado."""
+    hecho, dims, medidas, filtros, orden, con_top = forma
+    esquema = ESQUEMA[hecho]
+    h = esquema['alias']
+    dim_expr = esquema['dims']
+
+    joins: List[str] = []
+    for d in list(dims) + [f for f, _ in filtros]:
+        for alias in dim_expr[d][1]:
+            if alias not in joins:
+                joins.append(alias)
+    # En Fact_Proyectos cliente/responsable están en el propio hecho
+    cli = 'fpc' if 'fpc' in joins else h
+
+    select = [f"{dim_expr[d][0]} AS {d}" for d in dims]
+    for m in medidas:
+        op, _, col = m.partition(':')
+        select.append(f"{OPERACIONES[op].format(f'{h}.{col}')} AS {_alias_medida(m)}")
+
+    where = []
+    for d, tipo in filtros:
+        expr = dim_expr[d][0]
+        if tipo.startswith('in:'):
+            n = int(tipo.split(':')[1])
+            where.append(f"{expr} IN ({', '.join(['%s'] * n)})")
+        elif tipo.startswith('range:'):
+            for limite in tipo.split(':')[1].split('|'):
+                where.append(f"{expr} {'>=' if limite == 'min' else '<='} %s")
+        elif tipo == 'null':
+            where.append(f"{expr} IS NULL")
+        else:
+            where.append(f"{expr} = %s")
+
+    sql = f"SELECT {', '.join(select)} FROM {esquema['tabla']} {h}"
+    for alias in joins:
+        sql += ' ' + _JOINS[alias].format(h=h, cli=cli)
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if dims:
+        sql += ' GROUP BY ' + ', '.join(dim_expr[d][0] for d in dims)
+    sql += f" ORDER BY {orden} {'ASC' if orden in dims else 'DESC'}"
+    if con_top:
+        sql += ' LIMIT %s'
+    return sql
+
+
+def clave_canonica(spec: dict) -> str:
+    """Clave estable de la especificación (para la caché de resultados)."""
+    return json.dumps(spec, sort_keys=True, separators=(',', ':'), default=str)
+
+
+def preparar(spec: dict) -> Tuple[str, List]:
+    """Valida y compila: devuelve (sql, params) listos para `cursor.execute`."""
+    forma, params = validar(spec)
+    return compilar(forma), params
+
+
+# Formas de consulta más usadas por el frontend; el warm-up las compila y
+# ejecuta para que la primera petición real ya encuentre plan y resultado.
+CONSULTAS_FRECUENTES = [
+    {'hecho': 'proyectos', 'dims': ['cliente'], 'medidas': ['count', 'sum:presupuesto']},
+    {'hecho': 'proyectos', 'dims': ['anio', 'mes'], 'medidas': ['count', 'sum:presupuesto'], 'orden': 'anio'},
+    {'hecho': 'proyectos', 'dims': ['metodologia'], 'medidas': ['count', 'sum:presupuesto']},
+    {'hecho': 'defectos', 'dims': ['etapa'], 'medidas': ['sum:cantidad', 'distinct:id_proyecto']},
+    {'hecho': 'defectos', 'dims': ['severidad'], 'medidas': ['sum:cantidad']},
+]
@@ -1,12 +1,22 @@
 import os
 import json
+import threading
+import time
+from datetime import date
+from contextlib import contextmanager
 from flask import Flask, request, jsonify, abort
 from flask_cors import CORS
 import mysql.connector
-from mysql.connector import Error
-from typing import List, Tuple
+from mysql.connector import Error, pooling
 from collections import defaultdict
+import numpy as np
 from rayleigh_model import fit_rayleigh, expected_value, percentile
+import olap_lattice
+import olap_query
+from api_cache import VersionedCache, DataVersion
+from api_concurrency import SingleFlight, AdmissionControl, Overloaded
+from api_retrain import ModelHolder, RetrainScheduler
+from rayleigh_artefacto import ArtefactoModelos
 
 APP = Flask(__name__)
 CORS(APP, resources={r"/*": {"origins": ["http://localhost:3001", "http://localhost:3000", "http://localhost:3002", "http://localhost:5173"]}})
@@ -28,9 +38,89 @@ DSS_DB = {
     'database': os.getenv('DW_DATABASE', 'DSS_Proyectos')
 }
 
-def load_model():
-    if not os.path.exists(MODEL_FILE): return None
-    with open(MODEL_FILE, 'r', encoding='utf-8') as f: return json.load(f)
+# Cachés de resultados (invalidadas por DSS_Proyectos.Data_Version)
+DATA_VERSION = DataVersion()
+OLAP_CACHE = VersionedCache(max_entries=512)
+
+# El resumen del dashboard se lee de las tablas Agg_Dash_* del DSS (caché por
+# Data_Version y día); sin ellas se calcula sobre SG con caché por ventana de tiempo
+DASHBOARD_TTL = int(os.getenv('DASHBOARD_TTL', '60'))
+DASHBOARD_CACHE = VersionedCache(max_entries=4)
+# Respaldo sobre SG: su "versión" es la ventana de DASHBOARD_TTL, así que va
+# en otra caché para no mezclarla con las versiones del DW
+DASHBOARD_SG_CACHE = VersionedCache(max_entries=1)
+
+# POOLS DE CONEXIONES (uno por proceso; se recrean tras el fork de gunicorn)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+_DB_CONFIGS = {'sg': SG_DB, 'dss': DSS_DB}
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+def get_connection(db='sg', pooled=True):
+    """Conexión a 'sg' o 'dss'. Con pool, `close()` la devuelve al pool."""
+    if not pooled:
+        return mysql.connector.connect(**_DB_CONFIGS[db])
+    pool = _POOLS.get(db)
+    if pool is None:
+        with _POOLS_LOCK:
+            pool = _POOLS.get(db)
+            if pool is None:
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"{db}_{os.getpid()}", pool_size=DB_POOL_SIZE, **_DB_CONFIGS[db]
+                )
+                _POOLS[db] = pool
+    return pool.get_connection()
+
+@contextmanager
+def db_cursor(db='sg', dictionary=False, pooled=True):
+    """Cursor sobre una conexión del pool; ambos se liberan al salir del bloque."""
+    conn = get_connection(db, pooled)
+    try:
+        cursor = conn.cursor(dictionary=dictionary)
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+    finally:
+        conn.close()
+
+def reset_pools():
+    """Olvida los pools heredados del proceso padre (llamar tras fork)."""
+    with _POOLS_LOCK:
+        _POOLS.clear()
+
+# CONSULTAS PESADAS: coalescencia (single-flight) + control de admisión por worker
+SINGLE_FLIGHT = SingleFlight()
+ADMISSION = AdmissionControl(
+    max_concurrent=int(os.getenv('HEAVY_MAX_CONCURRENT', '2')),
+    max_wait=float(os.getenv('HEAVY_MAX_WAIT', '10')),
+    retry_after=int(os.getenv('HEAVY_RETRY_AFTER', '5')),
+)
+
+def _pesado(key, fn):
+    """Ejecuta `fn` una vez por clave concurrente y sólo si hay hueco de admisión."""
+    def admitido():
+        with ADMISSION.slot():
+            return fn()
+    result, _ = SINGLE_FLIGHT.do(key, admitido, timeout=ADMISSION.max_wait + 60)
+    return result
+
+@APP.errorhandler(Overloaded)
+def _overloaded(e):
+    response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+# Modelo vigente: se recarga solo cuando train_rayleigh reemplaza el artefacto
+MODEL = ModelHolder(MODEL_FILE)
+# Modelos por segmento y pronósticos por proyecto en curso: artefactos
+# binarios mapeados en memoria (páginas compartidas entre workers)
+SEGMENT_MODEL_FILE = os.getenv('SEGMENT_MODEL_FILE', 'rayleigh_segmentos.bin')
+SEGMENTOS = ModelHolder(SEGMENT_MODEL_FILE, cargador=ArtefactoModelos)
+PRONOSTICO_FILE = os.getenv('PRONOSTICO_FILE', 'rayleigh_proyectos.bin')
+PRONOSTICOS = ModelHolder(PRONOSTICO_FILE, cargador=ArtefactoModelos)
+_PRONOSTICO_ORDEN = {'artefacto': None, 'orden': None}
 
 def _build_filters_sql(filters):
     """Construye cláusula WHERE basada en filtros del frontend"""
@@ -88,107 +178,187 @@ def _build_filters_sql(filters):
     clause = ('AND ' + ' AND '.join(where)) if where else ''
     return clause, params
 
-@APP.route('/predict_filtered', methods=['POST'])
-def predict_filtered():
-    """Aplica filtros desde frontend, consulta SG_Proyectos y ajusta Rayleigh dinámicamente"""
+def _check_auth():
     auth = request.headers.get('Authorization') or (request.json.get('auth_key') if request.is_json else None)
     if auth is None or auth != RESP_KEY:
         abort(401, 'Unauthorized: missing or invalid auth key')
-    
-    filters = request.json.get('filters') if request.is_json else None
+
+@APP.route('/predict', methods=['POST'])
+def predict():
+    """Devuelve la predicción del modelo entrenado (cargado en el warm-up)
+
+    Con `segmento` (p. ej. 'metodologia=Scrum|cliente=3') responde con el
+    modelo de ese segmento, buscado en el artefacto binario en O(log n).
+    """
+    _check_auth()
+    segmento = request.json.get('segmento') if request.is_json else None
+    if segmento:
+        segmentos = SEGMENTOS.get()
+        model = segmentos.buscar(str(segmento)) if segmentos is not None else None
+        if model is None:
+            return jsonify({'error': f'No model for segment {segmento}'}), 404
+        model['trained_at'] = segmentos.meta.get('trained_at')
+    else:
+        model = MODEL.get()
+    if model is None:
+        return jsonify({'error': 'Model not trained'}), 404
+    nd = int(request.json.get('round', 2)) if request.is_json else 2
+    respuesta = {
+        'sigma': round(model['sigma'], nd),
+        'n_samples': model['n_samples'],
+        'expected_defects': round(model['expected'], nd),
+        'p90': round(model['p90'], nd),
+        'trained_at': model.get('trained_at')
+    }
+    if segmento:
+        respuesta['segmento'] = segmento
+    return jsonify(respuesta)
+
+def _predict_filtered_data(filters):
+    """Consulta SG con los filtros y ajusta Rayleigh. Devuelve (respuesta, status)."""
     clause, params = _build_filters_sql(filters)
     
-    try:
-        conn = mysql.connector.connect(**SG_DB)
-        cursor = conn.cursor()
-        
-        query = f"""
-            SELECT 
-                p.id_proyecto,
-                p.nombre,
-                p.metodologia,
-                p.fecha_inicio,
-                p.fecha_fin,
-                d.fecha_deteccion,
-                FLOOR(DATEDIFF(d.fecha_deteccion, p.fecha_inicio) / 7) AS semana
-            FROM Proyectos p
-            INNER JOIN Defectos d ON p.id_proyecto = d.id_proyecto
-            WHERE d.fecha_deteccion >= p.fecha_inicio
-            {clause}
-            ORDER BY semana
-        """
-        
+    query = f"""
+        SELECT 
+            p.id_proyecto,
+            p.nombre,
+            p.metodologia,
+            p.fecha_inicio,
+            p.fecha_fin,
+            d.fecha_deteccion,
+            FLOOR(DATEDIFF(d.fecha_deteccion, p.fecha_inicio) / 7) AS semana
+        FROM Proyectos p
+        INNER JOIN Defectos d ON p.id_proyecto = d.id_proyecto
+        WHERE d.fecha_deteccion >= p.fecha_inicio
+        {clause}
+        ORDER BY semana
+    """
+    
+    with db_cursor('sg') as cursor:
         cursor.execute(query, params)
         rows = cursor.fetchall()
-        
-        if not rows:
-            return jsonify({'error': 'No matching data found with those filters'}), 404
-        
-        # Extraer muestras (semanas) y contar defectos por semana
-        samples = [row[6] for row in rows if row[6] is not None and row[6] >= 0]
-        if not samples:
-            return jsonify({'error': 'No valid time samples'}), 400
-        
-        # Ajustar modelo Rayleigh
-        sigma, n, mean_sq = fit_rayleigh(samples)
-        exp_val = expected_value(sigma)
-        p90 = percentile(sigma, 0.90)
-        
-        # Información de proyectos y metodologías
-        proyectos_info = [(row[0], row[2]) for row in rows]
-        proyectos_unicos = len(set([pid for pid, _ in proyectos_info]))
-        metodologias_usadas = list(set([m for _, m in proyectos_info]))
-        
-        # Calcular duración en semanas
-        max_semana = max(samples)
-        duracion_semanas = max_semana + 1
-        
-        # Construir información detallada para el frontend con defectos acumulados
-        defectos_por_semana = defaultdict(int)
-        for s in samples:
-            defectos_por_semana[s] += 1
-        
-        tiempo_info = []
-        defectos_acumulados = 0
-        for i in range(max_semana + 1):
-            defectos_en_semana = defectos_por_semana.get(i, 0)
-            defectos_acumulados += defectos_en_semana
-            tiempo_info.append({
-                'tiempo': i,
-                'defectos_esperados': defectos_en_semana,
-                'defectos_acumulados': defectos_acumulados
-            })
-        
-        result = {
-            'sigma': round(sigma, 2),
-            'n_samples': n,
-            'expected_defects': round(exp_val, 2),
-            'p90': round(p90, 2),
-            'proyectos_analizados': proyectos_unicos,
-            'metodologias': metodologias_usadas,
-            'duracion_semanas': duracion_semanas,
-            'tiempo_data': tiempo_info
-        }
-        
-        cursor.close()
-        conn.close()
-        return jsonify(result)
+    
+    if not rows:
+        return {'error': 'No matching data found with those filters'}, 404
+    
+    # Extraer muestras (semanas) y contar defectos por semana
+    samples = [row[6] for row in rows if row[6] is not None and row[6] >= 0]
+    if not samples:
+        return {'error': 'No valid time samples'}, 400
+    
+    # Ajustar modelo Rayleigh
+    sigma, n, mean_sq = fit_rayleigh(samples)
+    exp_val = expected_value(sigma)
+    p90 = percentile(sigma, 0.90)
+    
+    # Información de proyectos y metodologías
+    proyectos_info = [(row[0], row[2]) for row in rows]
+    proyectos_unicos = len(set([pid for pid, _ in proyectos_info]))
+    metodologias_usadas = list(set([m for _, m in proyectos_info]))
+    
+    # Calcular duración en semanas
+    max_semana = max(samples)
+    duracion_semanas = max_semana + 1
+    
+    # Construir información detallada para el frontend con defectos acumulados
+    defectos_por_semana = defaultdict(int)
+    for s in samples:
+        defectos_por_semana[s] += 1
+    
+    tiempo_info = []
+    defectos_acumulados = 0
+    for i in range(max_semana + 1):
+        defectos_en_semana = defectos_por_semana.get(i, 0)
+        defectos_acumulados += defectos_en_semana
+        tiempo_info.append({
+            'tiempo': i,
+            'defectos_esperados': defectos_en_semana,
+            'defectos_acumulados': defectos_acumulados
+        })
+    
+    result = {
+        'sigma': round(sigma, 2),
+        'n_samples': n,
+        'expected_defects': round(exp_val, 2),
+        'p90': round(p90, 2),
+        'proyectos_analizados': proyectos_unicos,
+        'metodologias': metodologias_usadas,
+        'duracion_semanas': duracion_semanas,
+        'tiempo_data': tiempo_info
+    }
+    
+    return result, 200
+
+@APP.route('/predict_filtered', methods=['POST'])
+def predict_filtered():
+    """Aplica filtros desde frontend, consulta SG_Proyectos y ajusta Rayleigh dinámicamente"""
+    _check_auth()
+    
+    filters = (request.json.get('filters') if request.is_json else None) or {}
+    
+    try:
+        # Peticiones idénticas simultáneas comparten una sola consulta + ajuste
+        body, status = _pesado(('predict_filtered', json.dumps(filters, sort_keys=True, default=str)),
+                               lambda: _predict_filtered_data(filters))
+        return jsonify(body), status
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
 
+def _orden_pronostico(artefacto):
+    """Posiciones del artefacto por defectos pendientes (desc); se calcula una vez por artefacto."""
+    cache = _PRONOSTICO_ORDEN
+    if cache['artefacto'] is not artefacto:
+        orden = np.argsort(-artefacto.columna('restantes'), kind='stable')
+        cache['orden'], cache['artefacto'] = orden, artefacto
+    return cache['orden']
+
+def _fila_pronostico(artefacto, i):
+    return dict(artefacto.fila(i), id_proyecto=artefacto.clave(i))
+
+@APP.route('/api/proyectos/pronostico_defectos', methods=['GET'])
+def pronostico_defectos():
+    """Defectos pendientes de los proyectos En Progreso/Testing (curva Rayleigh por proyecto).
+
+    Responde desde el artefacto precalculado; filtros opcionales: estado,
+    metodologia, id_proyecto.
+    """
+    artefacto = PRONOSTICOS.get()
+    if artefacto is None:
+        return jsonify({'error': 'Forecasts not computed (run train_rayleigh.py)'}), 404
+    id_proyecto = request.args.get('id_proyecto')
+    if id_proyecto:
+        if not id_proyecto.isdigit():
+            return jsonify({'error': 'id_proyecto must be an integer'}), 400
+        # Búsqueda binaria en el índice del artefacto
+        i = artefacto.posicion(int(id_proyecto))
+        posiciones = [] if i is None else [i]
+    else:
+        posiciones = _orden_pronostico(artefacto)
+    filtros = {campo: request.args.get(campo) for campo in ('estado', 'metodologia') if request.args.get(campo)}
+    if filtros and len(posiciones):
+        seleccion = np.ones(len(artefacto), dtype=bool)
+        for campo, valor in filtros.items():
+            seleccion &= artefacto.columna(campo) == valor.encode('utf-8')
+        posiciones = [i for i in posiciones if seleccion[i]]
+    filas = [_fila_pronostico(artefacto, i) for i in posiciones]
+    return jsonify({
+        'generado': artefacto.meta['generado'],
+        'fecha_corte': artefacto.meta['fecha_corte'],
+        'total_restantes': round(sum(f['restantes'] for f in filas), 2),
+        'proyectos': filas,
+    })
+
 @APP.route('/api/olap/cube', methods=['GET'])
 def olap_cube():
     """Endpoint OLAP para análisis multidimensional"""
     dimension = request.args.get('dimension', 'cliente')
     metric = request.args.get('metric', 'ingresos')
     year = request.args.get('year', 'all')
+    if year != 'all' and not year.isdigit():
+        return jsonify({'error': 'Invalid year'}), 400
     
     try:
-        # Usar siempre SG_Proyectos
-        conn = mysql.connector.connect(**SG_DB)
-        cursor = conn.cursor(dictionary=True)
-        
         # Construir query según dimensión
         if dimension == 'cliente':
             query = """
@@ -201,7 +371,7 @@ def olap_cube():
                 FROM Proyectos p
                 LEFT JOIN Defectos d ON p.id_proyecto = d.id_proyecto
             """
-            where_clause = f" WHERE YEAR(p.fecha_inicio) = {year}" if year != 'all' else ""
+            where_clause = " WHERE YEAR(p.fecha_inicio) = %s" if year != 'all' else ""
             query += where_clause + " GROUP BY p.cliente ORDER BY ingresos DESC"
             
         elif dimension == 'tiempo':
@@ -215,7 +385,7 @@ def olap_cube():
                 FROM Proyectos p
                 LEFT JOIN Defectos d ON p.id_proyecto = d.id_proyecto
             """
-            where_clause = f" WHERE YEAR(p.fecha_inicio) = {year}" if year != 'all' else ""
+            where_clause = " WHERE YEAR(p.fecha_inicio) = %s" if year != 'all' else ""
             query += where_clause + " GROUP BY DATE_FORMAT(p.fecha_inicio, '%Y-%m') ORDER BY periodo"
             
         elif dimension == 'etapa':
@@ -229,7 +399,7 @@ def olap_cube():
                 FROM Defectos d
                 INNER JOIN Proyectos p ON d.id_proyecto = p.id_proyecto
             """
-            where_clause = f" WHERE YEAR(p.fecha_inicio) = {year}" if year != 'all' else ""
+            where_clause = " WHERE YEAR(p.fecha_inicio) = %s" if year != 'all' else ""
             query += where_clause + " GROUP BY d.etapa_deteccion ORDER BY defectos DESC"
             
         elif dimension == 'tecnologia':
@@ -243,13 +413,15 @@ def olap_cube():
                 FROM Proyectos p
                 LEFT JOIN Defectos d ON p.id_proyecto = d.id_proyecto
             """
-            where_clause = f" WHERE YEAR(p.fecha_inicio) = {year}" if year != 'all' else ""
+            where_clause = " WHERE YEAR(p.fecha_inicio) = %s" if year != 'all' else ""
             query += where_clause + " GROUP BY p.metodologia ORDER BY proyectos DESC"
         else:
             return jsonify({'error': 'Invalid dimension'}), 400
         
-        cursor.execute(query)
-        results = cursor.fetchall()
+        # Usar siempre SG_Proyectos
+        with db_cursor('sg', dictionary=True) as cursor:
+            cursor.execute(query, (year,) if year != 'all' else ())
+            results = cursor.fetchall()
         
         # Ajustar métrica si es necesario
         if metric == 'cantidad':
@@ -259,178 +431,491 @@ def olap_cube():
             for row in results:
                 row['value'] = row.get('defectos', 0)
         
-        cursor.close()
-        conn.close()
-        
         return jsonify(results if results else [])
         
     except Error as e:
         return jsonify({'error': str(e), 'message': 'Database connection or query failed'}), 500
 
+def _tamanos_cuboides(cursor):
+    """Filas por cuboide en Agg_Cuboide (una lectura por versión de datos)."""
+    def leer():
+        cursor.execute("SELECT cuboide, COUNT(*) AS filas FROM Agg_Cuboide GROUP BY cuboide")
+        return {r['cuboide']: r['filas'] for r in cursor.fetchall()}
+    return OLAP_CACHE.get_or_compute('tamanos_cuboides', DATA_VERSION.current(cursor), leer)
+
+@APP.route('/api/olap/lattice', methods=['GET'])
+def olap_lattice_query():
+    """Consulta multidimensional sobre la retícula de cuboides precalculada.
+
+    Parámetros:
+    - dims: atributos de agrupación separados por coma
+      (cliente, tiempo|anio|trimestre|mes, metodologia, etapa, severidad)
+    - cualquier atributo como filtro de igualdad (ej. anio=2024&metodologia=Scrum)
+    """
+    dims = [d for d in request.args.get('dims', 'cliente').split(',') if d]
+    filtros = {}
+    for attr in olap_lattice.ATRIBUTOS:
+        if attr in request.args:
+            filtros[attr] = request.args[attr]
+    try:
+        agrupacion = olap_lattice.normalizar(dims)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        with db_cursor('dss', dictionary=True) as cursor:
+            # Cuboide más pequeño que contiene agrupación y filtros
+            cuboide = olap_lattice.elegir_cuboide(list(agrupacion) + list(filtros), _tamanos_cuboides(cursor))
+
+            where = ['cuboide = %s']
+            params = [olap_lattice.nombre(cuboide)]
+            for attr, valor in filtros.items():
+                where.append(f"{attr} = %s")
+                params.append(valor)
+            columnas = ', '.join(olap_lattice.ATRIBUTOS + olap_lattice.MEDIDAS)
+            cursor.execute(f"SELECT {columnas} FROM Agg_Cuboide WHERE {' AND '.join(where)}", params)
+            rows = cursor.fetchall()
+    except Error as e:
+        return jsonify({'error': str(e), 'message': 'Database connection or query failed'}), 500
+
+    celdas = {
+        tuple(r[a] for a in olap_lattice.ATRIBUTOS): [float(r[m] or 0) for m in olap_lattice.MEDIDAS]
+        for r in rows
+    }
+    # Si el cuboide trae atributos extra (sólo filtrados), se agregan fuera
+    if cuboide != agrupacion:
+        celdas = olap_lattice.agregar(celdas, cuboide, agrupacion)
+
+    nombre = olap_lattice.nombre
+    return jsonify({
+        'cuboide': nombre(agrupacion),
+        'origen': nombre(cuboide),
+        'filas': olap_lattice.filas(celdas, agrupacion),
+        'roll_up': {d: nombre(c) for d in dims if (c := olap_lattice.roll_up(agrupacion, d)) is not None},
+        'drill_down': {d: nombre(c) for d in olap_lattice.DIMENSIONES_PLANAS + ('tiempo',)
+                       if (c := olap_lattice.drill_down(agrupacion, d)) is not None},
+    })
+
+def _ejecutar_consulta_olap(cursor, spec, sql, params):
+    """Ejecuta una consulta ya compilada usando la caché de resultados."""
+    def ejecutar():
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+    version = DATA_VERSION.current(cursor)
+    clave = ('query', olap_query.clave_canonica(spec))
+    return version, OLAP_CACHE.get_or_compute(clave, version, lambda: _pesado(clave + (version,), ejecutar))
+
+@APP.route('/api/olap/query', methods=['POST'])
+def olap_query_endpoint():
+    """Consulta OLAP genérica a partir de una especificación JSON (ver olap_query.py)."""
+    spec = request.get_json(silent=True)
+    try:
+        sql, params = olap_query.preparar(spec)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        with db_cursor('dss', dictionary=True) as cursor:
+            version, results = _ejecutar_consulta_olap(cursor, spec, sql, params)
+        return jsonify({'data_version': version, 'filas': results})
+    except Error as e:
+        return jsonify({'error': str(e), 'message': 'Database connection or query failed'}), 500
+
+def _dashboard_summary_data(cursor):
+    """Calcula los KPIs y series del dashboard principal (cursor sobre SG)."""
+    # KPI 1: Proyectos Activos
+    cursor.execute("""
+        SELECT COUNT(*) as total 
+        FROM Proyectos 
+        WHERE estado IN ('En Desarrollo', 'Testing', 'En Progreso')
+    """)
+    proyectos_activos = cursor.fetchone()['total']
+
+    # Cambio vs mes anterior
+    cursor.execute("""
+        SELECT COUNT(*) as total
+        FROM Proyectos
+        WHERE estado IN ('En Desarrollo', 'Testing', 'En Progreso')
+        AND fecha_inicio >= DATE_SUB(CURDATE(), INTERVAL 2 MONTH)
+        AND fecha_inicio < DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
+    """)
+    proyectos_mes_anterior = cursor.fetchone()['total'] or 1
+
+    # KPI 2: Ingresos del mes actual
+    cursor.execute("""
+        SELECT COALESCE(SUM(presupuesto), 0) as total
+        FROM Proyectos
+        WHERE YEAR(fecha_inicio) = YEAR(CURDATE())
+        AND MONTH(fecha_inicio) = MONTH(CURDATE())
+    """)
+    ingresos = cursor.fetchone()['total']
+
+    # Cambio ingresos vs mes anterior
+    cursor.execute("""
+        SELECT COALESCE(SUM(presupuesto), 0) as total
+        FROM Proyectos
+        WHERE fecha_inicio >= DATE_SUB(CURDATE(), INTERVAL 2 MONTH)
+        AND fecha_inicio < DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
+    """)
+    ingresos_anterior = cursor.fetchone()['total'] or 1
+
+    # KPI 3: Satisfacción promedio
+    cursor.execute("""
+        SELECT COALESCE(AVG(calificacion), 4.2) as promedio
+        FROM evaluaciones_cliente
+        WHERE fecha >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)
+    """)
+    satisfaccion = cursor.fetchone()['promedio']
+
+    # KPI 4: Defectos críticos activos
+    cursor.execute("""
+        SELECT COUNT(*) as total
+        FROM Defectos
+        WHERE severidad = 'Crítico'
+        AND estado = 'Abierto'
+    """)
+    defectos_criticos = cursor.fetchone()['total']
+
+    # Cambio defectos
+    cursor.execute("""
+        SELECT COUNT(*) as total
+        FROM Defectos
+        WHERE severidad = 'Crítico'
+        AND fecha_deteccion >= DATE_SUB(CURDATE(), INTERVAL 2 MONTH)
+        AND fecha_deteccion < DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
+    """)
+    defectos_anterior = cursor.fetchone()['total'] or 1
+
+    # Proyectos por mes (últimos 6 meses)
+    cursor.execute("""
+        SELECT 
+            DATE_FORMAT(fecha_inicio, '%b') as name,
+            COUNT(*) as proyectos,
+            SUM(CASE WHEN estado = 'Completado' THEN 1 ELSE 0 END) as completados
+        FROM Proyectos
+        WHERE fecha_inicio >= DATE_SUB(CURDATE(), INTERVAL 6 MONTH)
+        GROUP BY YEAR(fecha_inicio), MONTH(fecha_inicio)
+        ORDER BY fecha_inicio
+    """)
+    proyectos_mes = cursor.fetchall()
+
+    # Defectos por severidad (activos)
+    cursor.execute("""
+        SELECT 
+            severidad as name,
+            COUNT(*) as value,
+            CASE severidad
+                WHEN 'Crítico' THEN '#ef4444'
+                WHEN 'Mayor' THEN '#f59e0b'
+                WHEN 'Menor' THEN '#10b981'
+                WHEN 'Cosmético' THEN '#6366f1'
+            END as color
+        FROM Defectos
+        WHERE estado = 'Abierto'
+        GROUP BY severidad
+        ORDER BY 
+            CASE severidad
+                WHEN 'Crítico' THEN 1
+                WHEN 'Mayor' THEN 2
+                WHEN 'Menor' THEN 3
+                WHEN 'Cosmético' THEN 4
+            END
+    """)
+    defectos_severidad = cursor.fetchall()
+
+    # Proyectos recientes (últimos 5)
+    cursor.execute("""
+        SELECT 
+            p.nombre as proyecto,
+            c.nombre as cliente,
+            p.estado,
+            CASE 
+                WHEN p.fecha_fin IS NULL OR p.fecha_inicio IS NULL THEN 0
+                WHEN DATEDIFF(p.fecha_fin, p.fecha_inicio) = 0 THEN 100
+                ELSE LEAST(100, GREATEST(0, ROUND((DATEDIFF(CURDATE(), p.fecha_inicio) / 
+                       DATEDIFF(p.fecha_fin, p.fecha_inicio)) * 100)))
+            END as progreso
+        FROM Proyectos p
+        LEFT JOIN Clientes c ON p.id_cliente = c.id_cliente
+        ORDER BY p.fecha_inicio DESC
+        LIMIT 5
+    """)
+    proyectos_recientes = cursor.fetchall()
+
+    return _dashboard_respuesta(proyectos_activos, proyectos_mes_anterior, ingresos, ingresos_anterior,
+                                satisfaccion, defectos_criticos, defectos_anterior,
+                                proyectos_mes, defectos_severidad, proyectos_recientes)
+
+ESTADOS_ACTIVOS = ('En Desarrollo', 'Testing', 'En Progreso')
+
+def _clave_mes(hoy, meses_atras=0):
+    """AAAAMM del mes `meses_atras` meses antes de `hoy`."""
+    n = hoy.year * 12 + hoy.month - 1 - meses_atras
+    return (n // 12) * 100 + n % 12 + 1
+
+def _dashboard_summary_dss(cursor):
+    """KPIs y series del dashboard desde los resúmenes Agg_Dash_* (cursor sobre DSS).
+
+    Los cambios "vs mes anterior" usan el mes calendario anterior.
+    """
+    hoy = date.today()
+    mes_actual, mes_anterior = _clave_mes(hoy), _clave_mes(hoy, 1)
+    activos = ', '.join(['%s'] * len(ESTADOS_ACTIVOS))
+
+    cursor.execute(f"""
+        SELECT CAST(COALESCE(SUM(CASE WHEN estado IN ({activos}) THEN proyectos END), 0) AS SIGNED) AS activos,
+               CAST(COALESCE(SUM(CASE WHEN estado IN ({activos}) AND mes = %s THEN proyectos END), 0) AS SIGNED) AS activos_anterior,
+               COALESCE(SUM(CASE WHEN mes = %s THEN presupuesto END), 0) AS ingresos,
+               COALESCE(SUM(CASE WHEN mes = %s THEN presupuesto END), 0) AS ingresos_anterior
+        FROM Agg_Dash_Proyectos_Mes
+    """, ESTADOS_ACTIVOS + ESTADOS_ACTIVOS + (mes_anterior, mes_actual, mes_anterior))
+    proyectos = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT COALESCE(SUM(suma_calificacion) / SUM(evaluaciones), 4.2) AS promedio
+        FROM Agg_Dash_Satisfaccion
+        WHERE fecha >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)
+    """)
+    satisfaccion = cursor.fetchone()['promedio']
+
+    cursor.execute("""
+        SELECT CAST(COALESCE(SUM(CASE WHEN estado = 'Abierto' THEN defectos END), 0) AS SIGNED) AS abiertos,
+               CAST(COALESCE(SUM(CASE WHEN mes = %s THEN defectos END), 0) AS SIGNED) AS anterior
+        FROM Agg_Dash_Defectos_Mes
+        WHERE severidad = 'Crítico'
+    """, (mes_anterior,))
+    criticos = cursor.fetchone()
+
+    cursor.execute("""
+        SELECT DATE_FORMAT(STR_TO_DATE(CONCAT(mes, '01'), '%%Y%%m%%d'), '%%b') as name,
+               CAST(SUM(proyectos) AS SIGNED) as proyectos,
+               CAST(SUM(CASE WHEN estado = 'Completado' THEN proyectos ELSE 0 END) AS SIGNED) as completados
+        FROM Agg_Dash_Proyectos_Mes
+        WHERE mes >= %s
+        GROUP BY mes
+        ORDER BY mes
+    """, (_clave_mes(hoy, 6),))
+    proyectos_mes = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT 
+            severidad as name,
+            CAST(SUM(defectos) AS SIGNED) as value,
+            CASE severidad
+                WHEN 'Crítico' THEN '#ef4444'
+                WHEN 'Mayor' THEN '#f59e0b'
+                WHEN 'Menor' THEN '#10b981'
+                WHEN 'Cosmético' THEN '#6366f1'
+            END as color
+        FROM Agg_Dash_Defectos_Mes
+        WHERE estado = 'Abierto'
+        GROUP BY severidad
+        ORDER BY 
+            CASE severidad
+                WHEN 'Crítico' THEN 1
+                WHEN 'Mayor' THEN 2
+                WHEN 'Menor' THEN 3
+                WHEN 'Cosmético' THEN 4
+            END
+    """)
+    defectos_severidad = cursor.fetchall()
+
+    cursor.execute("""
+        SELECT 
+            proyecto,
+            cliente,
+            estado,
+            CASE 
+                WHEN fecha_fin IS NULL OR fecha_inicio IS NULL THEN 0
+                WHEN DATEDIFF(fecha_fin, fecha_inicio) = 0 THEN 100
+                ELSE LEAST(100, GREATEST(0, ROUND((DATEDIFF(CURDATE(), fecha_inicio) / 
+                       DATEDIFF(fecha_fin, fecha_inicio)) * 100)))
+            END as progreso
+        FROM Agg_Dash_Recientes
+        ORDER BY fecha_inicio DESC
+        LIMIT 5
+    """)
+    proyectos_recientes = cursor.fetchall()
+
+    return _dashboard_respuesta(proyectos['activos'], proyectos['activos_anterior'] or 1,
+                                proyectos['ingresos'], proyectos['ingresos_anterior'] or 1,
+                                satisfaccion, criticos['abiertos'], criticos['anterior'] or 1,
+                                proyectos_mes, defectos_severidad, proyectos_recientes)
+
+def _dashboard_respuesta(proyectos_activos, proyectos_mes_anterior, ingresos, ingresos_anterior,
+                         satisfaccion, defectos_criticos, defectos_anterior,
+                         proyectos_mes, defectos_severidad, proyectos_recientes):
+    """Arma el JSON del dashboard (los valores "anterior" ya vienen con `or 1`)."""
+    cambio_proyectos = round(((proyectos_activos - proyectos_mes_anterior) / proyectos_mes_anterior) * 100)
+    cambio_ingresos = round(((ingresos - ingresos_anterior) / ingresos_anterior) * 100)
+    cambio_defectos = round(((defectos_criticos - defectos_anterior) / defectos_anterior) * 100)
+    return {
+        'kpis': {
+            'proyectos_activos': {
+                'value': proyectos_activos,
+                'change': cambio_proyectos,
+                'trend': 'up' if cambio_proyectos >= 0 else 'down'
+            },
+            'ingresos_mensuales': {
+                'value': ingresos,
+                'change': cambio_ingresos,
+                'trend': 'up' if cambio_ingresos >= 0 else 'down'
+            },
+            'satisfaccion': {
+                'value': round(satisfaccion, 1),
+                'change': 5,  # Placeholder, podrías calcular vs periodo anterior
+                'trend': 'up'
+            },
+            'defectos_criticos': {
+                'value': defectos_criticos,
+                'change': cambio_defectos,
+                'trend': 'down' if cambio_defectos <= 0 else 'up'
+            }
+        },
+        'proyectos_mes': proyectos_mes,
+        'defectos_severidad': defectos_severidad,
+        'proyectos_recientes': proyectos_recientes
+    }
+
+def _dashboard_summary_cached(pooled=True):
+    """Resumen del dashboard desde los resúmenes del DSS que mantiene el ETL.
+
+    Si aún no existen (DSS sin el esquema nuevo), se calcula sobre SG y sólo
+    cuando la ventana de caché expiró.
+    """
+    try:
+        with db_cursor('dss', dictionary=True, pooled=pooled) as cursor:
+            version = DATA_VERSION.current(cursor)
+            # El día forma parte de la clave: las ventanas (mes actual, 3 meses) dependen de CURDATE()
+            clave = ('summary', date.today())
+            return DASHBOARD_CACHE.get_or_compute(
+                clave, version, lambda: _pesado(('dashboard_dss', version) + clave, lambda: _dashboard_summary_dss(cursor)))
+    except Error as e:
+        if e.errno not in (1049, 1146):  # Base o tabla inexistente
+            raise
+
+    def calcular():
+        with db_cursor('sg', dictionary=True, pooled=pooled) as cursor:
+            return _dashboard_summary_data(cursor)
+    ventana = int(time.time() // DASHBOARD_TTL)
+    return DASHBOARD_SG_CACHE.get_or_compute('summary', ventana, lambda: _pesado(('dashboard_sg', ventana), calcular))
+
 @APP.route('/api/dashboard/summary', methods=['GET'])
 def dashboard_summary():
     """Endpoint para datos del dashboard principal"""
     try:
-        conn = mysql.connector.connect(**SG_DB)
-        cursor = conn.cursor(dictionary=True)
-        
-        # KPI 1: Proyectos Activos
-        cursor.execute("""
-            SELECT COUNT(*) as total 
-            FROM Proyectos 
-            WHERE estado IN ('En Desarrollo', 'Testing', 'En Progreso')
-        """)
-        proyectos_activos = cursor.fetchone()['total']
-        
-        # Cambio vs mes anterior
-        cursor.execute("""
-            SELECT COUNT(*) as total
-            FROM Proyectos
-            WHERE estado IN ('En Desarrollo', 'Testing', 'En Progreso')
-            AND fecha_inicio >= DATE_SUB(CURDATE(), INTERVAL 2 MONTH)
-            AND fecha_inicio < DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
-        """)
-        proyectos_mes_anterior = cursor.fetchone()['total'] or 1
-        cambio_proyectos = round(((proyectos_activos - proyectos_mes_anterior) / proyectos_mes_anterior) * 100)
-        
-        # KPI 2: Ingresos del mes actual
-        cursor.execute("""
-            SELECT COALESCE(SUM(presupuesto), 0) as total
-            FROM Proyectos
-            WHERE YEAR(fecha_inicio) = YEAR(CURDATE())
-            AND MONTH(fecha_inicio) = MONTH(CURDATE())
-        """)
-        ingresos = cursor.fetchone()['total']
-        
-        # Cambio ingresos vs mes anterior
-        cursor.execute("""
-            SELECT COALESCE(SUM(presupuesto), 0) as total
-            FROM Proyectos
-            WHERE fecha_inicio >= DATE_SUB(CURDATE(), INTERVAL 2 MONTH)
-            AND fecha_inicio < DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
-        """)
-        ingresos_anterior = cursor.fetchone()['total'] or 1
-        cambio_ingresos = round(((ingresos - ingresos_anterior) / ingresos_anterior) * 100)
-        
-        # KPI 3: Satisfacción promedio
-        cursor.execute("""
-            SELECT COALESCE(AVG(calificacion), 4.2) as promedio
-            FROM evaluaciones_cliente
-            WHERE fecha >= DATE_SUB(CURDATE(), INTERVAL 3 MONTH)
-        """)
-        satisfaccion = cursor.fetchone()['promedio']
-        
-        # KPI 4: Defectos críticos activos
-        cursor.execute("""
-            SELECT COUNT(*) as total
-            FROM Defectos
-            WHERE severidad = 'Crítico'
-            AND estado = 'Abierto'
-        """)
-        defectos_criticos = cursor.fetchone()['total']
-        
-        # Cambio defectos
-        cursor.execute("""
-            SELECT COUNT(*) as total
-            FROM Defectos
-            WHERE severidad = 'Crítico'
-            AND fecha_deteccion >= DATE_SUB(CURDATE(), INTERVAL 2 MONTH)
-            AND fecha_deteccion < DATE_SUB(CURDATE(), INTERVAL 1 MONTH)
-        """)
-        defectos_anterior = cursor.fetchone()['total'] or 1
-        cambio_defectos = round(((defectos_criticos - defectos_anterior) / defectos_anterior) * 100)
-        
-        # Proyectos por mes (últimos 6 meses)
-        cursor.execute("""
-            SELECT 
-                DATE_FORMAT(fecha_inicio, '%b') as name,
-                COUNT(*) as proyectos,
-                SUM(CASE WHEN estado = 'Completado' THEN 1 ELSE 0 END) as completados
-            FROM Proyectos
-            WHERE fecha_inicio >= DATE_SUB(CURDATE(), INTERVAL 6 MONTH)
-            GROUP BY YEAR(fecha_inicio), MONTH(fecha_inicio)
-            ORDER BY fecha_inicio
-        """)
-        proyectos_mes = cursor.fetchall()
-        
-        # Defectos por severidad (activos)
-        cursor.execute("""
-            SELECT 
-                severidad as name,
-                COUNT(*) as value,
-                CASE severidad
-                    WHEN 'Crítico' THEN '#ef4444'
-                    WHEN 'Mayor' THEN '#f59e0b'
-                    WHEN 'Menor' THEN '#10b981'
-                    WHEN 'Cosmético' THEN '#6366f1'
-                END as color
-            FROM Defectos
-            WHERE estado = 'Abierto'
-            GROUP BY severidad
-            ORDER BY 
-                CASE severidad
-                    WHEN 'Crítico' THEN 1
-                    WHEN 'Mayor' THEN 2
-                    WHEN 'Menor' THEN 3
-                    WHEN 'Cosmético' THEN 4
-                END
-        """)
-        defectos_severidad = cursor.fetchall()
-        
-        # Proyectos recientes (últimos 5)
-        cursor.execute("""
-            SELECT 
-                p.nombre as proyecto,
-                c.nombre as cliente,
-                p.estado,
-                CASE 
-                    WHEN p.fecha_fin IS NULL OR p.fecha_inicio IS NULL THEN 0
-                    WHEN DATEDIFF(p.fecha_fin, p.fecha_inicio) = 0 THEN 100
-                    ELSE LEAST(100, GREATEST(0, ROUND((DATEDIFF(CURDATE(), p.fecha_inicio) / 
-                           DATEDIFF(p.fecha_fin, p.fecha_inicio)) * 100)))
-                END as progreso
-            FROM Proyectos p
-            LEFT JOIN Clientes c ON p.id_cliente = c.id_cliente
-            ORDER BY p.fecha_inicio DESC
-            LIMIT 5
-        """)
-        proyectos_recientes = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
-            'kpis': {
-                'proyectos_activos': {
-                    'value': proyectos_activos,
-                    'change': cambio_proyectos,
-                    'trend': 'up' if cambio_proyectos >= 0 else 'down'
-                },
-                'ingresos_mensuales': {
-                    'value': ingresos,
-                    'change': cambio_ingresos,
-                    'trend': 'up' if cambio_ingresos >= 0 else 'down'
-                },
-                'satisfaccion': {
-                    'value': round(satisfaccion, 1),
-                    'change': 5,  # Placeholder, podrías calcular vs periodo anterior
-                    'trend': 'up'
-                },
-                'defectos_criticos': {
-                    'value': defectos_criticos,
-                    'change': cambio_defectos,
-                    'trend': 'down' if cambio_defectos <= 0 else 'up'
-                }
-            },
-            'proyectos_mes': proyectos_mes,
-            'defectos_severidad': defectos_severidad,
-            'proyectos_recientes': proyectos_recientes
-        })
+        data = _dashboard_summary_cached()
+        return jsonify(data)
         
     except Error as e:
         return jsonify({'error': str(e), 'message': 'Database query failed'}), 500
 
+# ==============================
+# ARRANQUE EN CALIENTE (warm-up) Y SALUD
+# ==============================
+
+# gunicorn.conf.py marca el preload: el maestro no toca la base de datos (los
+# sockets no sobreviven al fork); sólo deja en memoria lo que los workers compartirán.
+PRELOADED = os.getenv('GUNICORN_PRELOAD') == '1'
+# Segundos mínimos entre reintentos del warm-up lanzados por /readyz
+WARMUP_REINTENTO_S = float(os.getenv('WARMUP_REINTENTO_S', '5'))
+_ESTADO = {'inicio': time.time(), 'listo': False, 'pasos': {}, 'error': None, 'intento': 0.0}
+_WARMUP_LOCK = threading.Lock()
+
+def _precalentar_cubos(pooled):
+    with db_cursor('dss', dictionary=True, pooled=pooled) as cursor:
+        _tamanos_cuboides(cursor)
+        for spec in olap_query.CONSULTAS_FRECUENTES:
+            _ejecutar_consulta_olap(cursor, spec, *olap_query.preparar(spec))
+
+def _abrir_pools():
+    for db in _DB_CONFIGS:
+        get_connection(db).close()
+
+def warm_up(abrir_pools=True):
+    """Prepara el proceso antes de atender tráfico.
+
+    Carga el modelo, compila las consultas frecuentes y, con abrir_pools,
+    abre los pools y llena las cachés de cubos y dashboard (sin él, como en
+    el maestro del preload, no se toca la base de datos). Un fallo de BD no
+    impide arrancar: queda registrado y `/readyz` responde 503 hasta que
+    un nuevo intento tenga éxito. Devuelve True si el proceso quedó listo.
+    """
+    if not _WARMUP_LOCK.acquire(blocking=False):
+        return False  # Otro hilo ya está calentando
+    try:
+        _ESTADO['intento'] = time.time()
+        pasos = {}
+        def paso(nombre, fn):
+            t0 = time.perf_counter()
+            fn()
+            pasos[nombre] = round((time.perf_counter() - t0) * 1000, 1)
+
+        paso('modelo', MODEL.load)
+        paso('segmentos', SEGMENTOS.load)
+        paso('pronosticos', PRONOSTICOS.load)
+        paso('planes', lambda: [olap_query.preparar(spec) for spec in olap_query.CONSULTAS_FRECUENTES])
+        try:
+            if abrir_pools:
+                paso('pools', _abrir_pools)
+                paso('cubos', lambda: _precalentar_cubos(True))
+                paso('dashboard', lambda: _dashboard_summary_cached(True))
+            _ESTADO['error'] = None
+        except (Error, Overloaded) as e:
+            _ESTADO['error'] = str(e)
+
+        _ESTADO['pasos'] = pasos
+        _ESTADO['listo'] = abrir_pools and _ESTADO['error'] is None
+        print(f"🔥 Warm-up (pid {os.getpid()}): {pasos}" + (f" ✗ {_ESTADO['error']}" if _ESTADO['error'] else ""))
+        return _ESTADO['listo']
+    finally:
+        _WARMUP_LOCK.release()
+
+def _reintentar_warm_up():
+    """Relanza el warm-up en segundo plano (uno a la vez, como mucho cada WARMUP_REINTENTO_S)."""
+    if _WARMUP_LOCK.locked() or time.time() - _ESTADO['intento'] < WARMUP_REINTENTO_S:
+        return
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+@APP.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: el proceso responde (no toca la base de datos)"""
+    return jsonify({'status': 'alive', 'pid': os.getpid(), 'uptime_s': round(time.time() - _ESTADO['inicio'], 1)})
+
+@APP.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: warm-up completado y ambas bases de datos accesibles.
+
+    Si el proceso aún no está listo responde 503 enseguida y reintenta el
+    warm-up en segundo plano: la sonda nunca espera a la base de datos.
+    """
+    if not _ESTADO['listo']:
+        _reintentar_warm_up()
+    listo = _ESTADO['listo']
+    if listo:
+        try:
+            for db in _DB_CONFIGS:
+                with db_cursor(db) as cursor:
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+        except Error as e:
+            _ESTADO['error'] = str(e)
+            listo = False
+    body = {'status': 'ready' if listo else 'not_ready', 'pid': os.getpid(),
+            'model_loaded': MODEL.get() is not None, 'warmup_ms': _ESTADO['pasos'], 'error': _ESTADO['error']}
+    return jsonify(body), (200 if listo else 503)
+
+# Importar el módulo no toca la base de datos: el warm-up lo lanzan
+# gunicorn.conf.py (post_fork), run_flask.py y __main__. WARMUP_ON_LOAD=1
+# lo hace además al importar (p. ej. otros servidores WSGI).
+if os.getenv('WARMUP_ON_LOAD', '0') == '1':
+    warm_up(abrir_pools=not PRELOADED)
+
 if __name__ == '__main__':
+    # Con gunicorn el programador corre en un solo worker (gunicorn.conf.py)
+    RetrainScheduler().start()
+    warm_up()
     print("🚀 Starting Flask server on port 5000...")
     try:
         APP.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
@@ -0,0 +1,176 @@
+"""
+rayleigh_artefacto.py
+----------------------
+Artefacto binario para miles de modelos (segmentos o proyectos) con índice
+ordenado por clave.
+
+Formato (un solo archivo, little-endian):
+
+    MAGIA (8 bytes) | longitud de la cabecera (uint64) | cabecera JSON
+    | relleno | claves | relleno | registros
+
+- claves: array contiguo y ordenado (int64 o texto UTF-8 de ancho fijo).
+- registros: array estructurado de NumPy, una fila por clave y en su orden.
+- cabecera: dtypes, filas, desplazamientos y metadatos libres (trained_at...).
+
+Los workers lo abren con np.memmap: ni se parsea ni se copia, las páginas
+salen de la caché del sistema operativo y las comparten todos los workers de
+gunicorn. `buscar` es una búsqueda binaria (np.searchsorted) sobre las
+claves: O(log n) y sólo lee las páginas que visita.
+
+Se publica con temporal + os.replace; un worker que aún tenga mapeado el
+archivo anterior sigue leyendo su inodo hasta que recarga.
+
+Uso:
+    escribir_artefacto('rayleigh_segmentos.bin', claves, {'sigma': [...], ...}, meta={...})
+    art = ArtefactoModelos('rayleigh_segmentos.bin')
+    art.buscar('metodologia=Scrum')  # {'sigma': ..., ...} o None
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+
+MAGIA = b'RAYMOD1\n'
+ALINEACION = 64
+
+
+def _alinear(n):
+    return -(-n // ALINEACION) * ALINEACION
+
+
+def _columna(valores):
+    """Array con el dtype del artefacto: texto -> UTF-8 de ancho fijo, números -> 64 bits."""
+    arr = np.asarray(valores)
+    if arr.dtype.kind in 'UO':
+        codificados = [str(v).encode('utf-8') for v in valores]
+        ancho = max((len(v) for v in codificados), default=0)
+        return np.array(codificados, dtype=f'S{max(ancho, 1)}')
+    if arr.dtype.kind == 'b':
+        return arr.astype('?')
+    if arr.dtype.kind in 'iu':
+        return arr.astype('<i8')
+    return arr.astype('<f8')
+
+
+def escribir_artefacto(path, claves, columnas, meta=None):
+    """Escribe el artefacto ordenado por clave (escritura atómica).
+
+    Args:
+        claves: enteros o textos únicos, en cualquier orden.
+        columnas: {campo: valores} alineados con `claves`.
+        meta: metadatos serializables en JSON para la cabecera.
+
+    Lanza:
+        ValueError si hay claves repetidas o columnas de otra longitud.
+    """
+    claves = _columna(claves)
+    n = len(claves)
+    columnas = {campo: _columna(valores) for campo, valores in columnas.items()}
+    if any(len(valores) != n for valores in columnas.values()):
+        raise ValueError("Todas las columnas deben tener una fila por clave")
+    orden = np.argsort(claves, kind='stable')
+    claves = claves[orden]
+    if n > 1 and (claves[1:] == claves[:-1]).any():
+        raise ValueError("Claves repetidas en el artefacto")
+    registros = np.empty(n, dtype=[(campo, valores.dtype) for campo, valores in columnas.items()])
+    for campo, valores in columnas.items():
+        registros[campo] = valores[orden]
+
+    # Los desplazamientos dependen del tamaño de la cabecera: se fija con relleno
+    cabecera = {'filas': n, 'dtype_claves': claves.dtype.str, 'dtype_registros': registros.dtype.descr,
+                'meta': meta or {}}
+    largo = len(json.dumps(dict(cabecera, offset_claves=0, offset_registros=0)).encode('utf-8')) + 40
+    cabecera['offset_claves'] = _alinear(16 + largo)
+    cabecera['offset_registros'] = _alinear(cabecera['offset_claves'] + claves.nbytes)
+    texto = json.dumps(cabecera).encode('utf-8').ljust(largo)
+
+    directorio = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.bin', dir=directorio)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIA + len(texto).to_bytes(8, 'little') + texto)
+            f.write(b'\0' * (cabecera['offset_claves'] - f.tell()))
+            f.write(claves.tobytes())
+            f.write(b'\0' * (cabecera['offset_registros'] - f.tell()))
+            f.write(registros.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class ArtefactoModelos:
+    """Vista de sólo lectura (memmap) de un artefacto escrito con `escribir_artefacto`."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIA)) != MAGIA:
+                raise ValueError(f"{path} no es un artefacto de modelos")
+            largo = int.from_bytes(f.read(8), 'little')
+            cabecera = json.loads(f.read(largo))
+        self.path = path
+        self.meta = cabecera['meta']
+        n = cabecera['filas']
+        dtype_claves = np.dtype(cabecera['dtype_claves'])
+        dtype_registros = np.dtype([tuple(campo) for campo in cabecera['dtype_registros']])
+        if n:
+            self.claves = np.memmap(path, mode='r', dtype=dtype_claves,
+                                    offset=cabecera['offset_claves'], shape=(n,))
+            self.registros = np.memmap(path, mode='r', dtype=dtype_registros,
+                                       offset=cabecera['offset_registros'], shape=(n,))
+        else:
+            # np.memmap no admite longitud 0
+            self.claves = np.empty(0, dtype=dtype_claves)
+            self.registros = np.empty(0, dtype=dtype_registros)
+        self.campos = dtype_registros.names
+
+    def __len__(self):
+        return len(self.claves)
+
+    def __contains__(self, clave):
+        return self.posicion(clave) is not None
+
+    def _clave(self, clave):
+        if self.claves.dtype.kind == 'S':
+            return clave.encode('utf-8') if isinstance(clave, str) else bytes(clave)
+        return int(clave)
+
+    def posicion(self, clave):
+        """Fila de `clave` (búsqueda binaria) o None si no está."""
+        if not len(self.claves):
+            return None  # Sin claves tampoco hay tipo de clave al que convertir
+        k = self._clave(clave)
+        if isinstance(k, bytes) and len(k) > self.claves.dtype.itemsize:
+            return None  # Más larga que cualquier clave: se truncaría al comparar
+        i = int(np.searchsorted(self.claves, k))
+        if i < len(self.claves) and self.claves[i] == k:
+            return i
+        return None
+
+    def fila(self, i):
+        """Registro i como dict de tipos de Python (textos decodificados)."""
+        registro = self.registros[i]
+        return {campo: _python(registro[campo]) for campo in self.campos}
+
+    def clave(self, i):
+        return _python(self.claves[i])
+
+    def buscar(self, clave):
+        """Parámetros de `clave` como dict, o None si no hay modelo para ella."""
+        i = self.posicion(clave)
+        return None if i is None else self.fila(i)
+
+    def columna(self, campo):
+        """Columna completa (vista sobre el memmap; los textos quedan en bytes)."""
+        return self.registros[campo]
+
+
+def _python(valor):
+    if isinstance(valor, bytes):
+        return valor.decode('utf-8')
+    return valor.item() if hasattr(valor, 'item') else valor
@@ -8,6 +8,8 @@ empleada por el script de entrenamiento y por el servidor API.
 Funciones:
 - fit_rayleigh(samples): devuelve la sigma (MLE), número de muestras y
     la media de los cuadrados.
+- update_rayleigh(n, mean_sq, counts, new_counts): actualiza el ajuste con
+    conteos nuevos a partir de los estadísticos suficientes (n, mean_sq).
 - expected_value(sigma): esperanza de la Rayleigh.
 - percentile(sigma, p): cuantiles de la Rayleigh.
 - summary_from_samples(samples): resumen con métricas clave.
@@ -19,7 +21,7 @@ Notas:
 """
 
 import math
-from typing import Sequence, Tuple
+from typing import List, Mapping, Sequence, Tuple
 
 
 def fit_rayleigh(samples: Sequence[float]) -> Tuple[float, int, float]:
@@ -46,6 +48,41 @@ def fit_rayleigh(samples: Sequence[float]) -> Tuple[float, int, float]:
     return sigma, n, mean_sq
 
 
+def update_rayleigh(n: int, mean_sq: float, counts: List[int],
+                    new_counts: Mapping[int, int]) -> Tuple[float, int, float, List[int]]:
+    """Actualiza el ajuste MLE sin recorrer toda la serie.
+
+    Al MLE sólo le importan n y sum(x^2) = n * mean_sq: sumar d defectos a
+    una semana con c cambia sum(x^2) en (c + d)^2 - c^2. Las semanas más allá
+    de la serie la extienden con ceros (re-binning): n crece y los ceros no
+    aportan a sum(x^2).
+
+    Args:
+        n, mean_sq: estadísticos del ajuste anterior (0, 0.0 si no lo hay).
+        counts: serie semanal anterior (len == n); se devuelve extendida.
+        new_counts: {semana: defectos nuevos}.
+
+    Devuelve:
+        (sigma, n_samples, mean_sq, counts)
+
+    Lanza:
+        ValueError si la serie resultante está vacía.
+    """
+    counts = list(counts)
+    sum_sq = n * mean_sq
+    for semana, d in new_counts.items():
+        if semana >= len(counts):
+            counts.extend([0] * (semana + 1 - len(counts)))
+        c = counts[semana]
+        sum_sq += (c + d) * (c + d) - c * c
+        counts[semana] = c + d
+    n = len(counts)
+    if n == 0:
+        raise ValueError("No samples provided")
+    mean_sq = sum_sq / n
+    return math.sqrt(mean_sq / 2.0), n, mean_sq, counts
+
+
 def pdf(x: float, sigma: float) -> float:
     """Densidad de probabilidad de Rayleigh.
 
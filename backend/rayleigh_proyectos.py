@@ -0,0 +1,140 @@
+"""
+rayleigh_proyectos.py
+----------------------
+Ajuste vectorizado de la curva Rayleigh de defectos de cada proyecto y
+pronóstico de los defectos que le quedan.
+
+Modelo (curva de Putnam/Norden): los defectos esperados en la semana w son
+
+    K * (F(w + 1; tm) - F(w; tm)),   F(t; tm) = 1 - exp(-t^2 / (2 tm^2))
+
+con K = defectos totales del proyecto y tm = semana del pico. Con T semanas
+observadas, el MLE de Poisson de K para un tm dado es Y / F(T; tm) (Y =
+defectos observados), así que K se elimina y sólo hay que buscar tm: la
+verosimilitud perfilada de todos los proyectos en una rejilla de tm sale de
+un producto de matrices (proyectos x semanas) @ (semanas x rejilla).
+
+Préstamo de fuerza del segmento (p. ej. metodología):
+- Forma: a cada proyecto se le suman `prior` defectos "ficticios" repartidos
+    como la curva media de su segmento; con pocos defectos manda el segmento,
+    con muchos, los datos propios.
+- Escala: K = (Y + prior) / (F(T; tm) + prior / K_seg), con K_seg = media de
+    defectos de los proyectos cerrados del segmento (posterior Gamma-Poisson).
+    Al empezar (F ~ 0) el pronóstico es K_seg; con la curva casi completa
+    y muchos defectos, se acerca a Y.
+
+Uso:
+    res = ajustar_proyectos(semanas_obs, proyecto_idx, semana_idx, defectos, segmento_idx, cerrado)
+    res['restantes']  # defectos pendientes por proyecto
+"""
+
+import numpy as np
+
+# Fuerza del préstamo del segmento (en defectos equivalentes)
+PRIOR_DEFECTOS = 10.0
+# Rejilla de semanas del pico
+PUNTOS_REJILLA = 160
+# Proyectos por bloque (acota la memoria a BLOQUE x PUNTOS_REJILLA floats)
+BLOQUE = 4096
+
+_EPS = 1e-300
+
+
+def rejilla_pico(max_semanas):
+    """Rejilla geométrica de tm entre media semana y el doble del horizonte observado."""
+    return np.geomspace(0.5, max(2.0 * max_semanas, 4.0), PUNTOS_REJILLA)
+
+
+def _cdf(t, tm):
+    """F(t; tm) con broadcasting."""
+    return -np.expm1(-(t * t) / (2.0 * tm * tm))
+
+
+def _verosimilitud_perfilada(semanas_obs, proyecto_idx, semana_idx, defectos, rejilla):
+    """Genera (inicio, fin, log L(tm)) por bloques de BLOQUE proyectos, con K ya maximizado.
+
+    Es la verosimilitud multinomial de las semanas de detección dentro de la
+    ventana observada: sum_w y_w log p_w(tm) - Y log F(T; tm). Cada bloque
+    es una matriz (proyectos del bloque x rejilla); nunca se materializa la
+    de todos los proyectos.
+    """
+    n = len(semanas_obs)
+    ancho = int(max(semanas_obs.max(initial=1), semana_idx.max(initial=0) + 1))
+    bordes = np.arange(ancho + 1, dtype=float)
+    F = _cdf(bordes[:, None], rejilla[None, :])               # (ancho + 1) x G
+    log_p = np.log(np.maximum(np.diff(F, axis=0), _EPS))       # ancho x G
+
+    orden = np.argsort(proyecto_idx, kind='stable')
+    proyecto_idx, semana_idx, defectos = proyecto_idx[orden], semana_idx[orden], defectos[orden]
+    cortes = np.searchsorted(proyecto_idx, np.arange(0, n + BLOQUE, BLOQUE))
+    for b, inicio in enumerate(range(0, n, BLOQUE)):
+        fin = min(inicio + BLOQUE, n)
+        a, z = cortes[b], cortes[b + 1]
+        Y = np.zeros((fin - inicio, ancho))
+        np.add.at(Y, (proyecto_idx[a:z] - inicio, semana_idx[a:z]), defectos[a:z])
+        F_T = _cdf(semanas_obs[inicio:fin, None].astype(float), rejilla[None, :])
+        ll = Y @ log_p
+        ll -= Y.sum(axis=1)[:, None] * np.log(np.maximum(F_T, _EPS))
+        yield inicio, fin, ll
+
+
+def ajustar_proyectos(semanas_obs, proyecto_idx, semana_idx, defectos, segmento_idx, cerrado,
+                      prior=PRIOR_DEFECTOS):
+    """Ajusta (K, tm) de todos los proyectos a la vez y pronostica lo pendiente.
+
+    Args:
+        semanas_obs: semanas observadas T de cada proyecto (n,).
+        proyecto_idx, semana_idx, defectos: histograma disperso (una entrada
+            por proyecto y semana con defectos; semana < T).
+        segmento_idx: segmento de cada proyecto, 0..S-1 (n,).
+        cerrado: proyectos terminados (n,) bool; definen K_seg.
+        prior: defectos equivalentes que aporta el segmento.
+
+    Devuelve:
+        dict de arrays (n,): total_esperado (K), pico_semana (tm),
+        observados (Y), restantes (K - Y) y fraccion_observada (F(T)).
+    """
+    semanas_obs = np.maximum(np.asarray(semanas_obs, dtype=np.int64), 1)
+    proyecto_idx = np.asarray(proyecto_idx, dtype=np.int64)
+    semana_idx = np.asarray(semana_idx, dtype=np.int64)
+    defectos = np.asarray(defectos, dtype=float)
+    segmento_idx = np.asarray(segmento_idx, dtype=np.int64)
+    cerrado = np.asarray(cerrado, dtype=bool)
+    n = len(semanas_obs)
+    n_seg = int(segmento_idx.max(initial=-1)) + 1
+
+    rejilla = rejilla_pico(int(semanas_obs.max(initial=1)))
+    totales = np.bincount(proyecto_idx, weights=defectos, minlength=n)
+
+    # Forma del segmento: log L medio por defecto (global si el segmento no tiene defectos).
+    # Depende de todos los proyectos, así que la verosimilitud se recorre dos
+    # veces por bloques (suma por segmento y luego el pico de cada proyecto)
+    # en lugar de guardarla entera.
+    ll_seg = np.zeros((n_seg, len(rejilla)))
+    for inicio, fin, ll in _verosimilitud_perfilada(semanas_obs, proyecto_idx, semana_idx, defectos, rejilla):
+        np.add.at(ll_seg, segmento_idx[inicio:fin], ll)
+    defectos_seg = np.bincount(segmento_idx, weights=totales, minlength=n_seg)
+    ll_global = ll_seg.sum(axis=0) / max(totales.sum(), 1.0)
+    forma_seg = np.where(defectos_seg[:, None] > 0, ll_seg / np.maximum(defectos_seg, 1.0)[:, None], ll_global)
+
+    pico = np.empty(n)
+    for inicio, fin, ll in _verosimilitud_perfilada(semanas_obs, proyecto_idx, semana_idx, defectos, rejilla):
+        pico[inicio:fin] = rejilla[np.argmax(ll + prior * forma_seg[segmento_idx[inicio:fin]], axis=1)]
+
+    # Escala del segmento: media de defectos de sus proyectos cerrados
+    cerrados_seg = np.bincount(segmento_idx, weights=cerrado, minlength=n_seg)
+    suma_seg = np.bincount(segmento_idx, weights=totales * cerrado, minlength=n_seg)
+    k_global = totales[cerrado].mean() if cerrado.any() else max(totales.mean(), 1.0) if n else 1.0
+    k_seg = np.where(cerrados_seg > 0, suma_seg / np.maximum(cerrados_seg, 1.0), k_global)
+    k_seg = np.maximum(k_seg, 1e-9)
+
+    f_obs = _cdf(semanas_obs.astype(float), pico)
+    total = (totales + prior) / (f_obs + prior / k_seg[segmento_idx])
+    total = np.maximum(total, totales)
+    return {
+        'total_esperado': total,
+        'pico_semana': pico,
+        'observados': totales,
+        'restantes': total - totales,
+        'fraccion_observada': f_obs,
+    }
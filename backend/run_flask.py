@@ -3,10 +3,13 @@ import traceback
 
 try:
     import os
-    from rayleigh_api import APP
+    from rayleigh_api import APP, warm_up
+    from api_retrain import RetrainScheduler
     print("✅ Flask app imported successfully")
     print("🚀 Starting Flask server...")
     port = int(os.getenv('PORT', 5000))
+    RetrainScheduler().start()
+    warm_up()
     APP.run(host='0.0.0.0', port=port, debug=False)
 except Exception as e:
     print(f"❌ Error starting Flask:")
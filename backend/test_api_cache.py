@@ -0,0 +1,75 @@
+"""Pruebas de la caché versionada: python -m pytest test_api_cache.py"""
+
+from api_cache import DataVersion, VersionedCache
+
+
+class CursorFalso:
+    def __init__(self, fila):
+        self.fila = fila
+        self.consultas = 0
+
+    def execute(self, sql, params=()):
+        self.consultas += 1
+
+    def fetchone(self):
+        return self.fila
+
+
+def test_acierto_y_fallo():
+    cache = VersionedCache()
+    assert cache.get('a', 1) is None
+    cache.put('a', 1, [1, 2])
+    assert cache.get('a', 1) == [1, 2]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_una_version_nueva_invalida_y_purga():
+    cache = VersionedCache()
+    cache.put('a', 1, 'viejo')
+    assert cache.get('a', 2) is None
+    cache.put('b', 2, 'nuevo')
+    # Al guardar con la versión 2 desaparecen las entradas de la 1
+    assert cache.get('a', 1) is None
+    assert cache.get('b', 2) == 'nuevo'
+
+
+def test_lru_acotada():
+    cache = VersionedCache(max_entries=2)
+    cache.put('a', 1, 'A')
+    cache.put('b', 1, 'B')
+    cache.get('a', 1)
+    cache.put('c', 1, 'C')
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) == 'A' and cache.get('c', 1) == 'C'
+
+
+def test_get_or_compute_calcula_una_vez_por_version():
+    cache = VersionedCache()
+    llamadas = []
+
+    def calcular():
+        llamadas.append(1)
+        return len(llamadas)
+
+    assert cache.get_or_compute('k', 1, calcular) == 1
+    assert cache.get_or_compute('k', 1, calcular) == 1
+    assert cache.get_or_compute('k', 2, calcular) == 2
+    assert len(llamadas) == 2
+
+
+def test_version_con_ttl():
+    dv = DataVersion(ttl=60)
+    cur = CursorFalso({'version': 7})
+    assert dv.current(cur) == 7
+    cur.fila = {'version': 8}
+    assert dv.current(cur) == 7
+    assert cur.consultas == 1
+
+
+def test_version_sin_ttl_y_filas_tupla():
+    dv = DataVersion(ttl=0)
+    cur = CursorFalso((3,))
+    assert dv.current(cur) == 3
+    cur.fila = None
+    assert dv.current(cur) == 0
+    assert cur.consultas == 2
@@ -0,0 +1,132 @@
+"""Pruebas de la coalescencia y el control de admisión: python -m pytest test_api_concurrency.py"""
+
+import threading
+import time
+
+import pytest
+
+from api_concurrency import AdmissionControl, Overloaded, SingleFlight
+
+
+def _en_paralelo(n, fn):
+    """Lanza fn(i) en n hilos que arrancan a la vez; devuelve resultados o excepciones."""
+    barrera = threading.Barrier(n)
+    salida = [None] * n
+
+    def correr(i):
+        barrera.wait()
+        try:
+            salida[i] = fn(i)
+        except Exception as e:
+            salida[i] = e
+
+    hilos = [threading.Thread(target=correr, args=(i,)) for i in range(n)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    return salida
+
+
+def test_llamadas_identicas_ejecutan_una_vez():
+    sf = SingleFlight()
+    llamadas = []
+    liberar = threading.Event()
+
+    def pesada():
+        llamadas.append(1)
+        liberar.wait(5)
+        return {'filas': 42}
+
+    def pedir(i):
+        if i == 0:
+            return sf.do('clave', pesada)
+        # Los demás llegan mientras la primera está en vuelo
+        while not llamadas:
+            time.sleep(0.001)
+        threading.Timer(0.05, liberar.set).start()
+        return sf.do('clave', pesada)
+
+    salida = _en_paralelo(8, pedir)
+    assert len(llamadas) == 1
+    assert all(r[0] == {'filas': 42} for r in salida)
+    assert sorted(compartido for _, compartido in salida) == [False] + [True] * 7
+    assert sf.shared == 7
+
+
+def test_la_excepcion_llega_a_todos_y_no_queda_en_vuelo():
+    sf = SingleFlight()
+    empezo, liberar = threading.Event(), threading.Event()
+
+    def falla():
+        empezo.set()
+        liberar.wait(5)
+        raise KeyError('x')
+
+    def pedir(i):
+        if i:
+            empezo.wait(5)
+            threading.Timer(0.05, liberar.set).start()
+        return sf.do('clave', falla)
+
+    salida = _en_paralelo(4, pedir)
+    assert all(isinstance(r, KeyError) for r in salida)
+    # La siguiente llamada vuelve a ejecutar
+    assert sf.do('clave', lambda: 1) == (1, False)
+
+
+def test_claves_distintas_no_se_comparten():
+    sf = SingleFlight()
+    assert [sf.do(k, lambda k=k: k * 2) for k in (1, 2, 1)] == [(2, False), (4, False), (2, False)]
+    assert sf.shared == 0
+
+
+def test_espera_de_un_seguidor_con_timeout():
+    sf = SingleFlight()
+    empezo, liberar = threading.Event(), threading.Event()
+
+    def lenta():
+        empezo.set()
+        liberar.wait(5)
+        return 1
+
+    lider = threading.Thread(target=sf.do, args=('clave', lenta))
+    lider.start()
+    empezo.wait(5)
+    with pytest.raises(Overloaded):
+        sf.do('clave', lenta, timeout=0.01)
+    liberar.set()
+    lider.join()
+
+
+def test_una_por_encima_de_la_capacidad_es_rechazada():
+    ac = AdmissionControl(max_concurrent=2, max_wait=0.01, retry_after=7)
+    with ac.slot(), ac.slot():
+        with pytest.raises(Overloaded) as e:
+            with ac.slot():
+                pass
+        assert e.value.retry_after == 7
+    assert ac.rejected == 1
+    # Los huecos se devuelven al salir (también con excepción)
+    with pytest.raises(ValueError):
+        with ac.slot():
+            raise ValueError
+    with ac.slot(), ac.slot():
+        pass
+
+
+def test_limita_la_concurrencia():
+    ac = AdmissionControl(max_concurrent=3, max_wait=5, retry_after=1)
+    dentro, maximo, lock = [0], [0], threading.Lock()
+
+    def pedir(i):
+        with ac.slot():
+            with lock:
+                dentro[0] += 1
+                maximo[0] = max(maximo[0], dentro[0])
+            time.sleep(0.02)
+            with lock:
+                dentro[0] -= 1
+
+    _en_paralelo(10, pedir)
+    assert maximo[0] == 3 and ac.rejected == 0
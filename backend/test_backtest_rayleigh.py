@@ -0,0 +1,104 @@
+"""Pruebas del backtesting con cortes móviles: python -m pytest test_backtest_rayleigh.py"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip('mysql.connector')
+
+import backtest_rayleigh
+from backtest_rayleigh import ejecutar_backtest, fechas_de_corte, preparar_datos, resumir
+
+INICIO = date(2023, 1, 2)
+
+
+def _proyectos_sinteticos(semanas=40, K=3000.0):
+    """Proyectos escalonados cada 2 semanas cuyas detecciones siguen la curva exacta."""
+    proyectos, filas = [], []
+    for i, (metodologia, sigma) in enumerate([('Scrum', 6.0), ('Scrum', 6.0), ('Cascada', 10.0),
+                                              ('Cascada', 10.0), (None, 8.0)]):
+        inicio = INICIO + timedelta(weeks=2 * i)
+        proyectos.append((i + 1, f'P{i}', metodologia, 'En Progreso', inicio, None))
+        w = np.arange(semanas + 1, dtype=float)
+        y = np.round(K * np.diff(backtest_rayleigh._cdf(w, sigma))).astype(int)
+        filas.extend((i + 1, s, int(d)) for s, d in enumerate(y) if d)
+    return proyectos, filas
+
+
+def test_preparar_datos():
+    proyectos = [(10, 'A', 'Scrum', 'Cerrado', date(2024, 1, 1), date(2024, 6, 1)),
+                 (20, 'B', None, 'En Progreso', date(2024, 2, 5), None)]
+    filas = [(10, 0, 3), (20, 2, 5), (10, -1, 9), (99, 1, 1), (20, None, 4)]
+    d = preparar_datos(proyectos, filas)
+    assert d['segmentos'] == ['global', 'metodologia=', 'metodologia=Scrum']
+    assert d['segmento_idx'].tolist() == [1, 0]
+    assert d['inicio'].tolist() == [date(2024, 1, 1).toordinal(), date(2024, 2, 5).toordinal()]
+    assert d['fin'][0] == date(2024, 6, 1).toordinal() and d['fin'][1] == np.iinfo(np.int64).max
+    # Se descartan semanas negativas o nulas y proyectos desconocidos
+    assert d['proyecto_idx'].tolist() == [0, 1]
+    assert d['semana'].tolist() == [0, 2]
+    assert d['defectos'].tolist() == [3.0, 5.0]
+
+
+def test_fechas_de_corte():
+    d = preparar_datos(*_proyectos_sinteticos(semanas=20))
+    fechas = fechas_de_corte(d, cortes=3, paso=4, horizonte=8)
+    # Última semana con datos: proyecto 5 (inicio + 8 semanas), semana 19
+    ultima = INICIO + timedelta(weeks=8 + 20)
+    assert [date.fromordinal(f) for f in fechas] == [ultima - timedelta(weeks=8 + 4 * i) for i in (2, 1, 0)]
+    assert fechas_de_corte(d, 2, 1, 4, hasta=date(2024, 1, 1)) == [
+        date(2023, 12, 25).toordinal(), date(2024, 1, 1).toordinal()]
+    assert fechas_de_corte(preparar_datos([], []), 3, 4, 8) == []
+
+
+def test_ajuste_por_proyecto_pronostica_la_curva_a_mitad_de_camino():
+    d = preparar_datos(*_proyectos_sinteticos())
+    fechas = fechas_de_corte(d, cortes=3, paso=2, horizonte=6, hasta=INICIO + timedelta(weeks=20))
+    filas, tiempos, _ = ejecutar_backtest(d, fechas, horizonte=6, workers=1)
+    assert len(tiempos) == 3
+    resumen = {(r['variante'], r['segmento']): r for r in resumir(filas, 6)}
+    assert {s for _, s in resumen} == {'global', 'metodologia=', 'metodologia=Cascada', 'metodologia=Scrum'}
+    for (variante, segmento), r in resumen.items():
+        assert r['cortes'] == 3
+        if variante == 'proyectos':
+            assert r['wape'] < 0.05 and abs(r['sesgo']) < 0.05
+            # Las sigmas agrupadas ignoran el truncamiento al corte y subestiman
+            assert r['wape'] < resumen[('segmento', segmento)]['wape']
+
+
+def test_sin_fuga_de_datos_posteriores_al_horizonte():
+    proyectos, filas = _proyectos_sinteticos()
+    corte = (INICIO + timedelta(weeks=16)).toordinal()
+    base, _, _ = ejecutar_backtest(preparar_datos(proyectos, filas), [corte], horizonte=4, workers=1)
+    # Semanas posteriores a corte + horizonte no influyen en nada
+    tarde = [(p, s, d * 10 if INICIO.toordinal() + 7 * (2 * (p - 1) + s) >= corte + 28 else d)
+             for p, s, d in filas]
+    otro, _, _ = ejecutar_backtest(preparar_datos(proyectos, tarde), [corte], horizonte=4, workers=1)
+    assert otro == base
+
+
+def test_pool_igual_que_serie():
+    d = preparar_datos(*_proyectos_sinteticos())
+    fechas = fechas_de_corte(d, cortes=4, paso=3, horizonte=5)
+    serie, _, _ = ejecutar_backtest(d, fechas, horizonte=5, workers=1)
+    pool, tiempos, _ = ejecutar_backtest(d, fechas, horizonte=5, workers=2)
+    assert pool == serie
+    assert len(tiempos) == 4
+    assert {f['variante'] for f in serie} == set(backtest_rayleigh.VARIANTES)
+
+
+def test_resumir():
+    filas = [
+        {'variante': 'global', 'segmento': 'global', 'reales': 10.0, 'pronosticados': 12.0,
+         'abs_semanal': 4.0, 'sq_semanal': 8.0, 'abs_acumulado': 6.0, 'reales_acumulados': 20.0},
+        {'variante': 'global', 'segmento': 'global', 'reales': 30.0, 'pronosticados': 24.0,
+         'abs_semanal': 8.0, 'sq_semanal': 24.0, 'abs_acumulado': 14.0, 'reales_acumulados': 60.0},
+        {'variante': 'global', 'segmento': 'metodologia=Scrum', 'reales': 0.0, 'pronosticados': 1.0,
+         'abs_semanal': 1.0, 'sq_semanal': 1.0, 'abs_acumulado': 1.0, 'reales_acumulados': 0.0},
+    ]
+    r_global, r_scrum = resumir(filas, horizonte=2)
+    assert r_global == {'variante': 'global', 'segmento': 'global', 'cortes': 2, 'reales': 40.0,
+                        'mae': 3.0, 'rmse': pytest.approx(8 ** 0.5, abs=1e-4), 'wape': 0.3,
+                        'wape_acumulado': 0.25, 'sesgo': -0.1}
+    assert r_scrum['wape'] is None and r_scrum['sesgo'] is None and r_scrum['wape_acumulado'] is None
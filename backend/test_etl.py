@@ -0,0 +1,86 @@
+"""Pruebas de las utilidades del ETL: python -m pytest test_etl.py"""
+
+from datetime import date, datetime
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+
+import etl
+
+
+def test_upsert_excluye_la_clave():
+    sql = etl._sql_upsert('Dim_Cliente', ['id_cliente', 'nombre', 'sector'])
+    assert sql == ("INSERT INTO Dim_Cliente (id_cliente, nombre, sector) VALUES (%s, %s, %s) "
+                   "ON DUPLICATE KEY UPDATE nombre = VALUES(nombre), sector = VALUES(sector)")
+
+
+def test_upsert_con_clave_explicita():
+    sql = etl._sql_upsert('T', ['a', 'b', 'c'], clave='b')
+    assert sql.endswith("ON DUPLICATE KEY UPDATE a = VALUES(a), c = VALUES(c)")
+
+
+def _procesador(modo, marcas):
+    proc = etl.ETLProcessor({})
+    proc.modo = modo
+    proc.marcas = marcas
+    return proc
+
+
+def test_filtro_completo_lee_todo():
+    proc = _procesador('completo', {'Proyectos': {'ultimo_id': 9}})
+    assert proc._filtro_incremental('Proyectos', 'id') == ('', [])
+
+
+def test_filtro_incremental_desde_la_marca():
+    proc = _procesador('incremental', {'Proyectos': {'ultimo_id': 9}})
+    assert proc._filtro_incremental('Proyectos', 'p.id') == ('WHERE p.id > %s', [9])
+    assert proc._filtro_incremental('Tareas', 't.id') == ('WHERE t.id > %s', [0])
+
+
+def test_filtro_incremental_con_condicion_extra():
+    proc = _procesador('incremental', {'Proyectos': {'ultimo_id': 9}})
+    where, params = proc._filtro_incremental('Proyectos', 'p.id', "p.estado <> 'Cerrado'")
+    assert where == "WHERE (p.id > %s OR p.estado <> 'Cerrado')"
+    assert params == [9]
+
+
+@pytest.mark.parametrize('tabla', etl.TABLAS_COMPLETAS_SG)
+def test_catalogos_se_leen_enteros_en_incremental(tabla):
+    proc = _procesador('incremental', {tabla: {'ultimo_id': 50}})
+    assert proc._filtro_incremental(tabla, 'id') == ('', [])
+
+
+@pytest.mark.parametrize('valor, esperado', [
+    (None, '\\N'),
+    (True, '1'),
+    (False, '0'),
+    (7, '7'),
+    (1.5, '1.5'),
+    ('a\tb\nc\rd\0e', 'a\\tb\\nc\\rd\\0e'),
+    ('C:\\ruta', 'C:\\\\ruta'),
+    (b'bytes\t', 'bytes\\t'),
+])
+def test_valor_tsv_escapa(valor, esperado):
+    assert etl._valor_tsv(valor) == esperado
+
+
+def test_valor_tsv_fechas():
+    assert etl._valor_tsv(date(2024, 3, 5)) == '2024-03-05'
+    assert etl._valor_tsv(datetime(2024, 3, 5, 8, 9, 10)) == '2024-03-05 08:09:10'
+
+
+def test_clave_tiempo():
+    assert etl.clave_tiempo(date(2024, 3, 5)) == 20240305
+    assert etl.clave_tiempo(datetime(1999, 12, 31, 23, 59)) == 19991231
+    assert etl.clave_tiempo(None) is None
+
+
+def test_claves_ordenan_como_las_fechas():
+    fechas = [date(2023, 12, 31), date(2024, 1, 1), date(2024, 2, 10), date(2024, 10, 1)]
+    assert sorted(fechas, key=etl.clave_tiempo) == fechas
+
+
+def test_clave_tiempo_sql():
+    assert etl._sql_clave_tiempo('p.fecha_inicio') == (
+        "(YEAR(p.fecha_inicio) * 10000 + MONTH(p.fecha_inicio) * 100 + DAY(p.fecha_inicio))")
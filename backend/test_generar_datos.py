@@ -0,0 +1,126 @@
+"""Pruebas del generador de datos sintéticos: python -m pytest test_generar_datos.py"""
+
+import importlib.util
+import os
+from datetime import date
+
+import numpy as np
+import pytest
+
+pytest.importorskip('mysql.connector')
+pytest.importorskip('faker')
+
+_spec = importlib.util.spec_from_file_location(
+    'generar_datos', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'generar_datos (1).py'))
+gen = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gen)
+
+HOY = date(2025, 6, 30)
+
+
+@pytest.fixture(scope='module')
+def texto():
+    return gen.catalogos_texto(7)
+
+
+def _generar(plan, texto):
+    """Todas las tablas del plan, bloque por bloque, como {tabla: filas}."""
+    tablas = dict(gen.tablas_dimension(plan))
+    for bloque in range(-(-plan['proyectos'] // gen.BLOQUE_PROYECTOS)):
+        for tabla, filas in gen.tablas_bloque(plan, bloque, texto):
+            tablas.setdefault(tabla, []).extend(filas)
+    return tablas
+
+
+def test_misma_semilla_mismo_plan():
+    a, b = gen.planificar(0.5, seed=7, hoy=HOY), gen.planificar(0.5, seed=7, hoy=HOY)
+    c = gen.planificar(0.5, seed=8, hoy=HOY)
+    assert a['proyectos'] == gen.escalar(gen.NUM_PROYECTOS, 0.5) == 100
+    for clave in ('dias_atras', 'duracion', 'sigma'):
+        assert np.array_equal(a[clave], b[clave])
+    assert not np.array_equal(a['dias_atras'], c['dias_atras'])
+    assert a['conteos']['defectos'].sum() == gen.escalar(gen.NUM_DEFECTOS_TOTAL, 0.5)
+
+
+def test_bloques_deterministas(texto):
+    plan = gen.planificar(0.5, seed=7, hoy=HOY)
+    # Cada bloque depende sólo de (semilla, bloque): da igual qué proceso lo genere
+    assert list(gen.tablas_bloque(plan, 0, texto)) == list(gen.tablas_bloque(plan, 0, texto))
+
+
+@pytest.mark.parametrize('bloque', [1000, 30])
+def test_ids_contiguos_entre_bloques(monkeypatch, texto, bloque):
+    monkeypatch.setattr(gen, 'BLOQUE_PROYECTOS', bloque)
+    plan = gen.planificar(0.5, seed=7, hoy=HOY)
+    tablas = _generar(plan, texto)
+    for tabla, filas in tablas.items():
+        assert [f[0] for f in filas] == list(range(1, len(filas) + 1)), tabla
+        assert all(len(f) == len(gen.COLUMNAS[tabla]) for f in filas)
+    # Claves foráneas dentro de rango
+    n = plan['proyectos']
+    for tabla in gen.CONTEOS:
+        assert all(1 <= f[1] <= n for f in tablas[tabla]), tabla
+    tareas = {f[0]: f[1] for f in tablas['Tareas']}
+    # Cada registro de tiempo apunta a una tarea de su propio proyecto
+    proyecto_registro = np.repeat(np.arange(1, n + 1), plan['conteos']['registros'])
+    assert all(tareas[f[2]] == proyecto_registro[f[0] - 1] for f in tablas['Registro_Tiempo'])
+
+
+def test_csv_con_nulos_y_barras(tmp_path):
+    ruta = tmp_path / 'Incidencias.csv'
+    filas = [(1, 2, None, 3, 'Alta', 'Abierto', '2025-01-01', 'C:\\tmp, "x"'),
+             (2, 2, 5, 3, 'Baja', 'Abierto', '2025-01-02', 'NULL')]
+    gen._escribir_csv(ruta, 'Incidencias', filas)
+    lineas = ruta.read_text(encoding='utf-8').splitlines()
+    assert lineas[0] == ','.join(gen.COLUMNAS['Incidencias'])
+    # \\N es NULL; el texto "NULL" queda como texto y la barra se duplica
+    assert lineas[1] == '1,2,\\N,3,Alta,Abierto,2025-01-01,"C:\\\\tmp, ""x"""'
+    assert lineas[2] == '2,2,5,3,Baja,Abierto,2025-01-02,NULL'
+
+
+def test_valor_csv():
+    assert gen._valor_csv(None) == gen.NULO_CSV == '\\N'
+    assert (gen._valor_csv(True), gen._valor_csv(False)) == (1, 0)
+    assert gen._valor_csv(2.5) == 2.5
+
+
+@pytest.fixture(scope='module')
+def sf1(texto):
+    plan = gen.planificar(1.0, seed=3, hoy=HOY)
+    return plan, _generar(plan, texto)
+
+
+def test_estado_coherente_con_las_fechas(sf1):
+    plan, tablas = sf1
+    fases = {e: i for i, opciones in enumerate(gen.FASES_PROYECTO) for e in opciones}
+    for p in tablas['Proyectos']:
+        inicio, fin, estado = date.fromisoformat(p[4]), date.fromisoformat(p[5]), p[19]
+        fase = 0 if inicio > HOY else 2 if fin <= HOY else 1
+        assert fases[estado] == fase, p[0]
+        if estado == 'Completado':
+            assert p[11] == 100.0
+    # Hay proyectos de las tres fases
+    assert {fases[p[19]] for p in tablas['Proyectos']} == {0, 1, 2}
+
+
+def test_defectos_dentro_de_la_vida_del_proyecto(sf1):
+    plan, tablas = sf1
+    proyectos = {p[0]: p for p in tablas['Proyectos']}
+    por_proyecto = {}
+    for d in tablas['Defectos']:
+        _, id_proyecto, _, _, estado, _, deteccion, correccion = d
+        p = proyectos[id_proyecto]
+        deteccion = date.fromisoformat(deteccion)
+        assert date.fromisoformat(p[4]) <= deteccion <= min(HOY, date.fromisoformat(p[5]))
+        if estado == 'Corregido':
+            correccion = date.fromisoformat(correccion)
+            assert deteccion < correccion <= HOY
+            assert (correccion - deteccion).days <= gen.DIAS_CORRECCION
+        else:
+            assert correccion is None
+        por_proyecto[id_proyecto] = por_proyecto.get(id_proyecto, 0) + 1
+    # defectos_detectados cuadra y los proyectos sin empezar no tienen defectos
+    for id_proyecto, p in proyectos.items():
+        assert p[20] == por_proyecto.get(id_proyecto, 0)
+        if p[19] == 'Planificación':
+            assert p[20] == 0
@@ -0,0 +1,56 @@
+"""Pruebas de la retícula OLAP (sin base de datos): python -m pytest test_olap_lattice.py"""
+
+import pytest
+
+from olap_lattice import (construir_lattice, drill_down, elegir_cuboide, enumerar_cuboides, nombre,
+                          normalizar, roll_up)
+
+# (cliente, anio, trimestre, mes, metodologia, etapa, severidad, proyectos, ingresos, defectos)
+BASE = [
+    ('A', 2024, 1, 1, 'Scrum', None, None, 1, 100.0, 0),
+    ('A', 2024, 2, 4, 'Kanban', None, None, 1, 50.0, 0),
+    ('B', 2025, 1, 2, 'Scrum', None, None, 1, 80.0, 0),
+    ('A', 2024, 1, 1, 'Scrum', 'Inicio', 'Mayor', 0, 0, 3),
+    ('B', 2025, 1, 2, 'Scrum', 'Cierre', 'Menor', 0, 0, 2),
+]
+
+
+def test_reticula_completa():
+    cuboides = enumerar_cuboides()
+    assert len(cuboides) == 64 == len(set(cuboides))
+    assert set(construir_lattice(BASE)) == set(cuboides)
+
+
+def test_cuboides_suman_lo_mismo_que_la_base():
+    lattice = construir_lattice(BASE)
+    assert lattice[()] == {(None,) * 7: [3.0, 230.0, 5.0]}
+    assert {k[0]: v for k, v in lattice[('cliente',)].items()} == {'A': [2.0, 150.0, 3.0], 'B': [1.0, 80.0, 2.0]}
+    # Con atributos de defecto sólo quedan celdas de defecto
+    assert sum(v[0] for v in lattice[('severidad',)].values()) == 0
+    assert sum(v[2] for v in lattice[('severidad',)].values()) == 5
+
+
+def test_elige_el_cuboide_materializado_mas_pequeno():
+    tamanos = {'*': 1, 'cliente': 2, 'cliente|metodologia': 3, 'cliente|anio': 3, 'cliente|anio|metodologia': 4}
+    assert elegir_cuboide(['cliente'], tamanos) == ('cliente',)
+    assert elegir_cuboide(['metodologia'], tamanos) == ('cliente', 'metodologia')
+    # 'tiempo' es el mes, que arrastra anio y trimestre
+    assert elegir_cuboide(['tiempo'], {'anio|trimestre|mes': 10}) == ('anio', 'trimestre', 'mes')
+
+
+def test_sin_cuboide_de_defecto_para_medidas_de_proyecto():
+    # Un cuboide con severidad perdió las celdas de proyecto: no sirve para 'cliente'
+    tamanos = {nombre(('cliente', 'severidad')): 1, nombre(('cliente', 'metodologia')): 50}
+    assert elegir_cuboide(['cliente'], tamanos) == ('cliente', 'metodologia')
+
+
+def test_roll_up_y_drill_down():
+    assert roll_up(['cliente', 'mes'], 'tiempo') == ('cliente', 'anio', 'trimestre')
+    assert roll_up(['cliente'], 'cliente') == ()
+    assert drill_down(['cliente', 'anio'], 'tiempo') == ('cliente', 'anio', 'trimestre')
+    assert drill_down(['cliente'], 'cliente') is None
+
+
+def test_atributo_desconocido():
+    with pytest.raises(ValueError):
+        normalizar(['proveedor'])
@@ -0,0 +1,62 @@
+"""Pruebas del compilador de consultas OLAP (sin base de datos): python -m pytest test_olap_query.py"""
+
+import pytest
+
+from olap_query import CONSULTAS_FRECUENTES, compilar, preparar, validar
+
+
+def test_compila_sql_parametrizado():
+    sql, params = preparar({
+        'hecho': 'defectos',
+        'dims': ['cliente', 'anio'],
+        'medidas': ['count', 'sum:cantidad'],
+        'filtros': {'metodologia': ['Scrum', 'Kanban'], 'mes': {'min': 1, 'max': 6}, 'anio': 2024},
+        'orden': 'sum_cantidad',
+        'top': 10,
+    })
+    assert sql == (
+        "SELECT dc.nombre AS cliente, t.anio AS anio, COUNT(*) AS count, SUM(fd.cantidad) AS sum_cantidad "
+        "FROM Fact_Defectos fd "
+        "LEFT JOIN Fact_Proyectos fpc ON fd.id_proyecto = fpc.id_proyecto "
+        "LEFT JOIN Dim_Cliente dc ON fpc.id_cliente = dc.id_cliente "
+        "LEFT JOIN Dim_Tiempo t ON fd.id_tiempo = t.id_tiempo "
+        "LEFT JOIN Dim_Proyecto dp ON fd.id_proyecto = dp.id_proyecto "
+        "WHERE t.anio = %s AND t.mes >= %s AND t.mes <= %s AND dp.metodologia IN (%s, %s) "
+        "GROUP BY dc.nombre, t.anio ORDER BY sum_cantidad DESC LIMIT %s")
+    # Filtros en orden alfabético; los valores nunca entran en el SQL
+    assert params == [2024, 1, 6, 'Scrum', 'Kanban', 10]
+
+
+def test_misma_forma_mismo_plan():
+    forma_a, params_a = validar({'dims': ['cliente'], 'filtros': {'anio': 2024}})
+    forma_b, params_b = validar({'dims': ['cliente'], 'filtros': {'anio': 2025}})
+    assert forma_a == forma_b and params_a != params_b
+    assert compilar(forma_a) is compilar(forma_b)
+
+
+@pytest.mark.parametrize('spec', [
+    {'hecho': 'Fact_Proyectos; DROP TABLE x'},
+    {'dims': ['cliente; DROP TABLE x']},
+    {'dims': ['tipo_defecto']},                                  # dimensión de otro hecho
+    {'medidas': ['sum:presupuesto) FROM Dim_Cliente --']},
+    {'medidas': ['max:presupuesto']},
+    {'medidas': ['count:presupuesto']},
+    {'filtros': {'1=1 OR anio': 2024}},
+    {'filtros': {'anio': {'min': 1, 'desde': 2}}},
+    {'filtros': {'anio': []}},
+    {'filtros': {'anio': [{'x': 1}]}},
+    {'orden': 'presupuesto; DROP TABLE x'},
+    {'top': 0},
+    {'top': True},
+    {'top': 10 ** 6},
+    ['cliente'],
+])
+def test_rechaza_lo_que_no_esta_en_la_lista_blanca(spec):
+    with pytest.raises(ValueError):
+        preparar(spec)
+
+
+def test_consultas_frecuentes_validas():
+    for spec in CONSULTAS_FRECUENTES:
+        sql, params = preparar(spec)
+        assert sql.count('%s') == len(params)
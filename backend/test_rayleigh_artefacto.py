@@ -0,0 +1,70 @@
+"""Pruebas del artefacto binario de modelos: python -m pytest test_rayleigh_artefacto.py"""
+
+import numpy as np
+import pytest
+
+from rayleigh_artefacto import ArtefactoModelos, escribir_artefacto
+
+
+def test_ida_y_vuelta_con_claves_de_texto(tmp_path):
+    path = str(tmp_path / 'segmentos.bin')
+    claves = ['metodologia=Scrum', 'global', 'metodologia=Cascada|cliente=3', 'cliente=ñandú']
+    columnas = {'sigma': [2.5, 3.0, 1.25, 4.0], 'n_samples': [10, 200, 3, 7],
+                'curva': ['a', 'bb', 'ccc', '']}
+    escribir_artefacto(path, claves, columnas, meta={'trained_at': '2026-01-02T03:04:05'})
+    art = ArtefactoModelos(path)
+    assert len(art) == 4
+    assert art.meta == {'trained_at': '2026-01-02T03:04:05'}
+    assert [art.clave(i) for i in range(len(art))] == sorted(claves, key=lambda c: c.encode('utf-8'))
+    for i, clave in enumerate(claves):
+        assert clave in art
+        assert art.buscar(clave) == {campo: valores[i] for campo, valores in columnas.items()}
+    assert art.buscar('metodologia=Kanban') is None
+    assert art.buscar('metodologia=Scrum y algo más largo que cualquier clave') is None
+    assert 'metodologia' not in art
+
+
+def test_claves_enteras(tmp_path):
+    path = str(tmp_path / 'pronosticos.bin')
+    escribir_artefacto(path, [30, 10, 20], {'restantes': [3.0, 1.0, 2.0]})
+    art = ArtefactoModelos(path)
+    assert art.posicion(10) == 0 and art.posicion(np.int64(30)) == 2
+    assert art.posicion(15) is None and art.posicion(99) is None
+    np.testing.assert_array_equal(art.columna('restantes'), [1.0, 2.0, 3.0])
+
+
+def test_artefacto_vacio(tmp_path):
+    path = str(tmp_path / 'vacio.bin')
+    escribir_artefacto(path, [], {'sigma': [], 'n_samples': []})
+    art = ArtefactoModelos(path)
+    assert len(art) == 0
+    assert art.buscar('global') is None and art.buscar(1) is None
+    assert 'global' not in art
+    assert art.campos == ('sigma', 'n_samples')
+
+
+def test_reescritura_atomica(tmp_path):
+    path = str(tmp_path / 'segmentos.bin')
+    escribir_artefacto(path, ['global'], {'sigma': [1.0]})
+    anterior = ArtefactoModelos(path)
+    escribir_artefacto(path, ['global'], {'sigma': [2.0]})
+    # El mapeo abierto sigue viendo el archivo anterior
+    assert anterior.buscar('global') == {'sigma': 1.0}
+    assert ArtefactoModelos(path).buscar('global') == {'sigma': 2.0}
+    assert [p.name for p in tmp_path.iterdir()] == ['segmentos.bin']
+
+
+@pytest.mark.parametrize('claves, columnas', [
+    (['a', 'a'], {'sigma': [1.0, 2.0]}),
+    (['a', 'b'], {'sigma': [1.0]}),
+])
+def test_entradas_invalidas(tmp_path, claves, columnas):
+    with pytest.raises(ValueError):
+        escribir_artefacto(str(tmp_path / 'x.bin'), claves, columnas)
+
+
+def test_no_es_un_artefacto(tmp_path):
+    path = tmp_path / 'otro.bin'
+    path.write_bytes(b'{"sigma": 1}')
+    with pytest.raises(ValueError):
+        ArtefactoModelos(str(path))
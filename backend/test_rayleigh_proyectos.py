@@ -0,0 +1,65 @@
+"""Pruebas del ajuste Rayleigh por proyecto: python -m pytest test_rayleigh_proyectos.py"""
+
+import numpy as np
+import pytest
+
+import rayleigh_proyectos
+from rayleigh_proyectos import _cdf, ajustar_proyectos
+
+
+def _curva(K, tm, T):
+    """Defectos esperados por semana (redondeados) de la curva con K y tm, en T semanas."""
+    w = np.arange(T + 1, dtype=float)
+    return np.round(K * np.diff(_cdf(w, tm))).astype(int)
+
+
+def _histograma(curvas):
+    proyecto, semana, defectos = [], [], []
+    for p, y in enumerate(curvas):
+        for w in np.flatnonzero(y):
+            proyecto.append(p)
+            semana.append(w)
+            defectos.append(y[w])
+    return np.array(proyecto), np.array(semana), np.array(defectos)
+
+
+def test_recupera_pico_y_total_conocidos():
+    picos = [4.0, 8.0, 12.0]
+    T = [20, 40, 60]
+    curvas = [_curva(2000, tm, t) for tm, t in zip(picos, T)]
+    res = ajustar_proyectos(T, *_histograma(curvas), segmento_idx=[0, 0, 0], cerrado=[True] * 3, prior=0.0)
+    assert res['pico_semana'] == pytest.approx(picos, rel=0.03)
+    assert res['total_esperado'] == pytest.approx([c.sum() for c in curvas], rel=0.01)
+    assert (res['restantes'] >= 0).all()
+
+
+def test_pronostica_lo_pendiente_a_mitad_de_curva():
+    # Observado hasta la semana 10 de una curva con pico en 10: falta ~61%
+    y = _curva(1000, 10.0, 10)
+    res = ajustar_proyectos([10], *_histograma([y]), segmento_idx=[0], cerrado=[False], prior=0.0)
+    assert res['pico_semana'][0] == pytest.approx(10.0, rel=0.05)
+    assert res['total_esperado'][0] == pytest.approx(1000, rel=0.05)
+    assert res['observados'][0] == y.sum()
+
+
+def test_proyecto_sin_defectos_toma_el_segmento():
+    curvas = [_curva(300, 6.0, 40), _curva(500, 6.0, 40), np.zeros(2, dtype=int)]
+    res = ajustar_proyectos([40, 40, 2], *_histograma(curvas), segmento_idx=[0, 0, 0],
+                            cerrado=[True, True, False])
+    k_seg = (curvas[0].sum() + curvas[1].sum()) / 2
+    f_obs = _cdf(2.0, res['pico_semana'][2])
+    assert res['total_esperado'][2] == pytest.approx(10.0 / (f_obs + 10.0 / k_seg))
+    assert res['pico_semana'][2] == pytest.approx(6.0, rel=0.1)
+
+
+def test_por_bloques_igual_que_de_una_vez(monkeypatch):
+    rng = np.random.default_rng(0)
+    n = 50
+    T = rng.integers(5, 60, n)
+    curvas = [rng.poisson(_curva(rng.integers(20, 400), rng.uniform(3, 20), t)) for t in T]
+    args = (T, *_histograma(curvas), rng.integers(0, 3, n), rng.random(n) < 0.5)
+    completo = ajustar_proyectos(*args)
+    monkeypatch.setattr(rayleigh_proyectos, 'BLOQUE', 7)
+    por_bloques = ajustar_proyectos(*args)
+    for campo, valores in completo.items():
+        np.testing.assert_allclose(por_bloques[campo], valores, rtol=1e-12)
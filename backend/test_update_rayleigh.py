@@ -0,0 +1,45 @@
+"""Pruebas del reentrenamiento incremental de Rayleigh: python -m pytest test_update_rayleigh.py"""
+
+import pytest
+
+from rayleigh_model import fit_rayleigh, update_rayleigh
+
+SERIE = [0, 2, 5, 9, 7, 4, 1, 0, 1]
+
+
+def _aplicar(counts, nuevos):
+    counts = list(counts)
+    for semana, d in nuevos.items():
+        counts.extend([0] * (semana + 1 - len(counts)))
+        counts[semana] += d
+    return counts
+
+
+@pytest.mark.parametrize('nuevos', [
+    {},
+    {3: 2},                  # semana ya existente
+    {0: 1, 8: 4},
+    {12: 3},                 # amplía la serie con ceros intermedios
+    {2: 1, 15: 2, 9: 1},
+])
+def test_incremental_igual_a_reajuste_completo(nuevos):
+    sigma, n, mean_sq = fit_rayleigh(SERIE)
+    inc = update_rayleigh(n, mean_sq, SERIE, nuevos)
+    completa = _aplicar(SERIE, nuevos)
+    assert inc[3] == completa
+    assert inc[:3] == pytest.approx(fit_rayleigh(completa))
+
+
+def test_actualizaciones_encadenadas():
+    sigma, n, mean_sq, counts = update_rayleigh(0, 0.0, [], {2: 3})
+    for nuevos in ({0: 1}, {5: 2}, {2: 1, 7: 1}):
+        sigma, n, mean_sq, counts = update_rayleigh(n, mean_sq, counts, nuevos)
+    assert counts == [1, 0, 4, 0, 0, 2, 0, 1]
+    assert (sigma, n, mean_sq) == pytest.approx(fit_rayleigh(counts))
+    # sum_sq que se guarda en Model_Rayleigh: entero exacto
+    assert round(n * mean_sq) == sum(c * c for c in counts)
+
+
+def test_serie_vacia():
+    with pytest.raises(ValueError):
+        update_rayleigh(0, 0.0, [], {})
@@ -1,23 +1,50 @@
 """
 train_rayleigh.py
 ------------------
-Script para entrenar el modelo Rayleigh usando el historial de incidencias
-almacenado en `SG_Proyectos.Incidencias`. El script realiza:
+Script para entrenar el modelo Rayleigh usando el historial de defectos
+(tiempo hasta la detección, en semanas). El script realiza:
 
-- Conexión a la base de datos de gestión (`SG_Proyectos`).
-- Consulta: conteo de incidencias por proyecto (`GROUP BY id_proyecto`).
+- Conexión al Data Warehouse (`DSS_Proyectos`, hechos ya cargados por el
+    ETL) o, con `--fuente sg`, a la base de gestión (`SG_Proyectos`).
+- Consulta: histograma semanal de defectos agregado por MySQL (una fila
+    por semana y celda de segmento, no una por defecto).
 - Ajuste de sigma (MLE) usando `rayleigh_model.fit_rayleigh`.
 - Guarda el modelo en `rayleigh_model.json`.
 - Opcionalmente persiste los parámetros (sigma, n_samples, mean_sq)
     en la tabla `Model_Rayleigh` del Data Warehouse para trazabilidad.
 
+Además del modelo global se entrenan modelos por segmento (metodología,
+cliente, responsable y sus combinaciones, ver `TRAIN_SEGMENTACIONES`):
+una sola consulta agrupada trae el histograma semanal por celda fina, cada
+segmentación se obtiene sumando celdas y los ajustes se reparten en un pool
+de procesos. Todos los modelos se guardan con un único INSERT por lotes
+(columna `segmento`) y en el artefacto binario `rayleigh_segmentos.bin`
+(memmap con índice ordenado por clave, ver rayleigh_artefacto.py).
+
+Con `--incremental` no se re-ajusta todo el historial: se leen los
+estadísticos (n, mean_sq), la serie semanal y el último id de defecto del
+entrenamiento anterior en `Model_Rayleigh`, se extraen sólo los defectos
+posteriores y se actualiza cada segmento con `update_rayleigh`.
+
+Al final se recalculan los pronósticos de defectos pendientes de los
+proyectos en curso (curva Rayleigh por proyecto, ver rayleigh_proyectos.py)
+y se publican en `rayleigh_proyectos.bin` (mismo formato, clave =
+id_proyecto), que la API sirve tal cual.
+
 La configuración se puede pasar por variables de entorno (ver `README.md`).
 """
+import argparse
 import os
 import json
-from datetime import datetime
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
 import mysql.connector
-from rayleigh_model import fit_rayleigh, expected_value, percentile
+import numpy as np
+import rayleigh_proyectos
+from rayleigh_artefacto import escribir_artefacto
+from rayleigh_model import fit_rayleigh, update_rayleigh, expected_value, percentile
 
 # Config via environment variables for safety (defaults provided for dev)
 SG_DB = {
@@ -36,94 +63,446 @@ DW_DB = {
 }
 
 MODEL_FILE = os.getenv('MODEL_FILE', 'rayleigh_model.json')
+SEGMENT_MODEL_FILE = os.getenv('SEGMENT_MODEL_FILE', 'rayleigh_segmentos.bin')
+
+# Segmentaciones a entrenar además del global ('+' combina atributos)
+ATRIBUTOS_SEGMENTO = ('metodologia', 'cliente', 'responsable')
+SEGMENTACIONES = [s.strip() for s in os.getenv(
+    'TRAIN_SEGMENTACIONES', 'metodologia,cliente,responsable,metodologia+cliente,metodologia+responsable'
+).split(',') if s.strip()]
+TRAIN_WORKERS = int(os.getenv('TRAIN_WORKERS', str(os.cpu_count() or 1)))
+# Segmentos por tarea del pool (amortiza el envío entre procesos)
+SEGMENTOS_POR_TAREA = 256
+# Campos de cada modelo en el artefacto de segmentos (en este orden)
+CAMPOS_MODELO = ('sigma', 'n_samples', 'mean_sq', 'expected', 'p90')
+
+# Pronósticos por proyecto: sólo se publican los proyectos en curso; los
+# cerrados fijan la escala típica (K) de su segmento
+PRONOSTICO_FILE = os.getenv('PRONOSTICO_FILE', 'rayleigh_proyectos.bin')
+TRAIN_PRONOSTICOS = os.getenv('TRAIN_PRONOSTICOS', '1') == '1'
+ESTADOS_EN_CURSO = ('En Progreso', 'Testing')
+ESTADOS_CERRADOS = ('Completado', 'Cancelado')
+CAMPOS_PRONOSTICO = ('nombre', 'metodologia', 'estado', 'semanas_observadas', 'observados',
+                     'total_esperado', 'restantes', 'pico_semana', 'fraccion_observada')
+
+# Origen de cada fuente de entrenamiento: FROM/JOIN, atributos de segmento,
+# semana de detección, medida y filtro. 'dss' lee los hechos del DW ya
+# cargados por el ETL y no toca el sistema transaccional.
+FUENTES = {
+    'sg': {
+        'from': """Defectos d
+        JOIN Proyectos p ON d.id_proyecto = p.id_proyecto""",
+        'atributos': ('p.metodologia', 'p.id_cliente', 'p.id_responsable'),
+        'semana': 'FLOOR(DATEDIFF(d.fecha_deteccion, p.fecha_inicio) / 7)',
+        'defectos': 'COUNT(*)',
+        'id': 'd.id_defecto',
+        'tabla_id': 'Defectos',
+        'proyecto': 'p.id_proyecto',
+        'tabla_proyectos': 'Proyectos',
+        'where': """d.fecha_deteccion IS NOT NULL
+        AND p.fecha_inicio IS NOT NULL
+        AND d.fecha_deteccion >= p.fecha_inicio""",
+    },
+    'dss': {
+        'from': """Fact_Defectos fd
+        JOIN Dim_Tiempo t ON fd.id_tiempo = t.id_tiempo
+        JOIN Dim_Proyecto dp ON fd.id_proyecto = dp.id_proyecto
+        LEFT JOIN Fact_Proyectos fp ON fd.id_proyecto = fp.id_proyecto""",
+        'atributos': ('dp.metodologia', 'fp.id_cliente', 'fp.id_responsable'),
+        'semana': 'FLOOR(DATEDIFF(t.fecha, dp.fecha_inicio) / 7)',
+        'defectos': 'SUM(fd.cantidad)',
+        'id': 'fd.id_defecto',
+        'tabla_id': 'Fact_Defectos',
+        'proyecto': 'dp.id_proyecto',
+        'tabla_proyectos': 'Dim_Proyecto',
+        'where': """dp.fecha_inicio IS NOT NULL
+        AND t.fecha >= dp.fecha_inicio""",
+    },
+}
+TRAIN_FUENTE = os.getenv('TRAIN_FUENTE', 'dss')
+
+
+def _consulta_histograma(fuente, por_celda=True, desde_id=None, hasta_id=None):
+    """Histograma semanal agregado por MySQL (por celda de segmento o sólo por semana).
+
+    desde_id/hasta_id acotan los defectos por id (desde exclusivo, hasta
+    inclusivo); devuelve (sql, params).
+    """
+    f = FUENTES[fuente]
+    atributos = list(f['atributos']) if por_celda else ['NULL', 'NULL', 'NULL']
+    grupo = ', '.join(atributos + ['semana']) if por_celda else 'semana'
+    where, params = f['where'], []
+    if desde_id is not None:
+        where += f"\n        AND {f['id']} > %s"
+        params.append(desde_id)
+    if hasta_id is not None:
+        where += f"\n        AND {f['id']} <= %s"
+        params.append(hasta_id)
+    return f"""
+    SELECT 
+        {', '.join(atributos)},
+        {f['semana']} as semana,
+        {f['defectos']} as defectos
+    FROM 
+        {f['from']}
+    WHERE 
+        {where}
+    GROUP BY 
+        {grupo}
+    """, params
 
-def fetch_defect_counts(conn):
+
+def fetch_defect_counts(conn, fuente='sg'):
     """Extrae el conteo de defectos usando tiempo calendario normalizado.
 
     Calcula semanas transcurridas desde el inicio del proyecto hasta la detección
     del defecto. Esto funciona para CUALQUIER metodología (Scrum, Waterfall, 
     Kanban, RUP, XP, DevOps) sin importar sus fases específicas.
     
+    El histograma lo agrega la base de datos (GROUP BY semana): se transfiere
+    una fila por semana, no una por defecto.
+
     Retorna defectos agrupados por intervalos de tiempo (semanas).
     """
-    query = """
+    hist = histogramas_por_segmento(fetch_defect_cells(conn, fuente, por_celda=False), [])
+    por_semana = hist.get('global')
+    if not por_semana:
+        return []
+    # Incluir semanas sin defectos (0s) para tener serie completa
+    return [por_semana.get(i, 0) for i in range(max(por_semana) + 1)]
+
+
+def fetch_max_defect_id(conn, fuente='sg'):
+    """Último id de defecto de la fuente (0 si no hay defectos)."""
+    cur = conn.cursor()
+    cur.execute(f"SELECT MAX(id_defecto) FROM {FUENTES[fuente]['tabla_id']}")
+    max_id = cur.fetchone()[0]
+    cur.close()
+    return int(max_id or 0)
+
+
+def fetch_defect_cells(conn, fuente='sg', por_celda=True, desde_id=None, hasta_id=None):
+    """Histograma semanal de defectos por celda fina, agregado en una sola consulta.
+
+    Devuelve filas (metodologia, id_cliente, id_responsable, semana, defectos);
+    cualquier segmentación (y el global) se obtiene sumando celdas. Con
+    por_celda=False los atributos vienen en NULL y hay una fila por semana.
+    """
+    cur = conn.cursor()
+    cur.execute(*_consulta_histograma(fuente, por_celda, desde_id, hasta_id))
+    rows = cur.fetchall()
+    cur.close()
+    return rows
+
+
+def fetch_project_weeks(conn, fuente='sg'):
+    """Proyectos con fecha de inicio y su histograma semanal de defectos.
+
+    Devuelve (proyectos, filas) con proyectos = [(id, nombre, metodologia,
+    estado, fecha_inicio, fecha_fin)] y filas = [(id_proyecto, semana, defectos)].
+    """
+    f = FUENTES[fuente]
+    cur = conn.cursor()
+    cur.execute(f"""
+        SELECT id_proyecto, nombre, metodologia, estado, fecha_inicio, fecha_fin
+        FROM {f['tabla_proyectos']}
+        WHERE fecha_inicio IS NOT NULL
+    """)
+    proyectos = cur.fetchall()
+    cur.execute(f"""
     SELECT 
-        p.id_proyecto,
-        p.metodologia,
-        p.fecha_inicio,
-        p.fecha_fin,
-        DATEDIFF(p.fecha_fin, p.fecha_inicio) as duracion_dias,
-        d.fecha_deteccion,
-        FLOOR(DATEDIFF(d.fecha_deteccion, p.fecha_inicio) / 7) as semana_deteccion
+        {f['proyecto']},
+        {f['semana']} as semana,
+        {f['defectos']} as defectos
     FROM 
-        Defectos d
-    JOIN 
-        Proyectos p ON d.id_proyecto = p.id_proyecto
+        {f['from']}
     WHERE 
-        d.fecha_deteccion IS NOT NULL
-        AND p.fecha_inicio IS NOT NULL
-        AND d.fecha_deteccion >= p.fecha_inicio
-    ORDER BY 
-        p.id_proyecto, semana_deteccion
+        {f['where']}
+    GROUP BY 
+        {f['proyecto']}, semana
+    """)
+    filas = cur.fetchall()
+    cur.close()
+    return proyectos, filas
+
+
+def pronosticar_proyectos(proyectos, filas, hoy=None):
+    """Ajusta la curva de todos los proyectos y devuelve el artefacto de pronósticos.
+
+    El segmento del préstamo de fuerza es la metodología. Las semanas
+    observadas de un proyecto abierto llegan hasta `hoy`; las de uno cerrado,
+    hasta su fecha de fin (o su último defecto).
     """
-    cur = conn.cursor()
-    cur.execute(query)
+    hoy = hoy or date.today()
+    indice = {p[0]: i for i, p in enumerate(proyectos)}
+    segmentos = {}
+    segmento_idx = [segmentos.setdefault(p[2], len(segmentos)) for p in proyectos]
+    cerrado = [p[3] in ESTADOS_CERRADOS for p in proyectos]
+
+    filas = [(indice[pid], int(semana), int(defectos)) for pid, semana, defectos in filas
+             if pid in indice and semana is not None and semana >= 0]
+    max_semana = [0] * len(proyectos)
+    for i, semana, _ in filas:
+        max_semana[i] = max(max_semana[i], semana + 1)
+    semanas_obs = []
+    for (_, _, _, estado, inicio, fin), es_cerrado, minimo in zip(proyectos, cerrado, max_semana):
+        corte = (fin or hoy) if es_cerrado else hoy
+        semanas_obs.append(max((corte - inicio).days // 7 + 1, minimo, 1))
+
+    proyecto_idx, semana_idx, defectos = zip(*filas) if filas else ((), (), ())
+    res = rayleigh_proyectos.ajustar_proyectos(semanas_obs, proyecto_idx, semana_idx, defectos,
+                                               segmento_idx, cerrado)
+    en_curso = np.array([p[3] in ESTADOS_EN_CURSO for p in proyectos], dtype=bool)
+    texto = {campo: [p[j] or '' for p, activo in zip(proyectos, en_curso) if activo]
+             for j, campo in ((1, 'nombre'), (2, 'metodologia'), (3, 'estado'))}
+    columnas = dict(texto, **{
+        'semanas_observadas': np.asarray(semanas_obs)[en_curso],
+        'observados': res['observados'][en_curso].astype(np.int64),
+        'total_esperado': res['total_esperado'][en_curso].round(2),
+        'restantes': res['restantes'][en_curso].round(2),
+        'pico_semana': res['pico_semana'][en_curso].round(2),
+        'fraccion_observada': res['fraccion_observada'][en_curso].round(4),
+    })
+    return {
+        'generado': datetime.now().isoformat(),
+        'fecha_corte': hoy.isoformat(),
+        'claves': [p[0] for p, activo in zip(proyectos, en_curso) if activo],
+        'columnas': {campo: columnas[campo] for campo in CAMPOS_PRONOSTICO},
+    }
+
+
+def actualizar_pronosticos(fuente=TRAIN_FUENTE, path=PRONOSTICO_FILE):
+    """Recalcula y publica (escritura atómica) los pronósticos de los proyectos en curso."""
+    conn = mysql.connector.connect(**(DW_DB if fuente == 'dss' else SG_DB))
+    proyectos, filas = fetch_project_weeks(conn, fuente)
+    conn.close()
+    if not proyectos:
+        print("Sin proyectos para pronosticar.")
+        return
+    artefacto = pronosticar_proyectos(proyectos, filas)
+    escribir_artefacto(path, artefacto['claves'], artefacto['columnas'],
+                       meta={'generado': artefacto['generado'], 'fecha_corte': artefacto['fecha_corte']})
+    print(f"Pronósticos de {len(artefacto['claves'])} proyectos en curso guardados en {path}")
+
+
+def segment_key(atributos, valores):
+    """Clave de segmento: 'metodologia=Scrum|cliente=3' ('global' sin atributos)."""
+    return '|'.join(f"{a}={v}" for a, v in zip(atributos, valores)) or 'global'
+
+
+def histogramas_por_segmento(celdas, segmentaciones=SEGMENTACIONES):
+    """{segmento: {semana: defectos}} para 'global' y cada segmentación.
+
+    Lanza:
+        ValueError si una segmentación usa un atributo desconocido.
+    """
+    indices = {a: i for i, a in enumerate(ATRIBUTOS_SEGMENTO)}
+    specs = []
+    for nombre in segmentaciones:
+        atributos = nombre.split('+')
+        desconocidos = [a for a in atributos if a not in indices]
+        if desconocidos:
+            raise ValueError(f"Atributo de segmento desconocido: {', '.join(desconocidos)}")
+        specs.append((atributos, [indices[a] for a in atributos]))
+
+    hist = defaultdict(lambda: defaultdict(int))
+    for *valores, semana, defectos in celdas:
+        semana = int(semana) if semana is not None and semana >= 0 else 0
+        defectos = int(defectos)
+        hist['global'][semana] += defectos
+        for atributos, idx in specs:
+            hist[segment_key(atributos, [valores[i] for i in idx])][semana] += defectos
+    return {segmento: dict(por_semana) for segmento, por_semana in hist.items()}
+
+
+def _ajustar_segmentos(lote):
+    """Ajusta cada (segmento, {semana: defectos}) del lote; corre en el pool de procesos."""
+    modelos = []
+    for segmento, por_semana in lote:
+        # Serie completa con semanas sin defectos, como en el modelo global
+        samples = [por_semana.get(i, 0) for i in range(max(por_semana) + 1)]
+        sigma, n, mean_sq = fit_rayleigh(samples)
+        modelos.append((segmento, sigma, n, mean_sq, expected_value(sigma), percentile(sigma, 0.9)))
+    return modelos
+
+
+def ajustar_segmentos(histogramas, workers=TRAIN_WORKERS):
+    """Ajusta todos los segmentos; devuelve {segmento: (sigma, n, mean_sq, expected, p90)}."""
+    items = sorted(histogramas.items())
+    lotes = [items[i:i + SEGMENTOS_POR_TAREA] for i in range(0, len(items), SEGMENTOS_POR_TAREA)]
+    if workers <= 1 or len(lotes) <= 1:
+        resultados = map(_ajustar_segmentos, lotes)
+        return {m[0]: m[1:] for lote in resultados for m in lote}
+    with ProcessPoolExecutor(max_workers=min(workers, len(lotes))) as pool:
+        return {m[0]: m[1:] for lote in pool.map(_ajustar_segmentos, lotes) for m in lote}
+
+
+def segmentacion_de(segmento):
+    """Segmentación a la que pertenece una clave ('metodologia=Scrum|cliente=3' -> 'metodologia+cliente')."""
+    if segmento == 'global':
+        return 'global'
+    return '+'.join(parte.split('=', 1)[0] for parte in segmento.split('|'))
+
+
+def serie_semanal(por_semana):
+    """Serie completa (semanas sin defectos en 0) a partir de {semana: defectos}."""
+    return [por_semana.get(i, 0) for i in range(max(por_semana) + 1)] if por_semana else []
+
+
+def cargar_ultimo_entrenamiento(dw_conn, segmentaciones=SEGMENTACIONES):
+    """Estadísticos del último entrenamiento persistido, o None si no sirven.
+
+    Devuelve {'trained_at', 'ultimo_id', 'segmentos': {segmento: (n, mean_sq, serie)}}.
+    Es None si no hay entrenamiento previo, si es anterior a las columnas
+    sum_sq/histograma/ultimo_id_defecto o si no cubre todas las segmentaciones.
+    Una ejecución se identifica por su trained_at (DATETIME(6), con
+    microsegundos): dos ejecuciones en el mismo segundo no se mezclan.
+    """
+    cur = dw_conn.cursor()
+    cur.execute("""
+        SELECT segmento, n_samples, sum_sq, histograma, ultimo_id_defecto, trained_at
+        FROM Model_Rayleigh
+        WHERE trained_at = (SELECT MAX(trained_at) FROM Model_Rayleigh)
+    """)
     rows = cur.fetchall()
     cur.close()
-    
-    if len(rows) == 0:
-        return []
-    
-    # Agrupar defectos por semana (tiempo normalizado)
-    # Esto crea un histograma de defectos por unidad de tiempo
-    from collections import defaultdict
-    defectos_por_semana = defaultdict(int)
-    
-    for row in rows:
-        semana = int(row[6]) if row[6] is not None and row[6] >= 0 else 0
-        defectos_por_semana[semana] += 1
-    
-    # Convertir a lista ordenada de conteos
-    # Incluir semanas sin defectos (0s) para tener serie completa
-    if defectos_por_semana:
-        max_semana = max(defectos_por_semana.keys())
-        samples = [defectos_por_semana.get(i, 0) for i in range(max_semana + 1)]
-    else:
-        samples = []
-    
-    return samples
+    if not rows or any(r[2] is None or r[3] is None or r[4] is None for r in rows):
+        return None
+    configuradas = {'global', *segmentaciones}
+    if not configuradas <= {segmentacion_de(r[0]) for r in rows}:
+        return None
+    segmentos = {}
+    for segmento, n, sum_sq, histograma, _, _ in rows:
+        if segmentacion_de(segmento) not in configuradas:
+            continue  # Segmentación que ya no se entrena
+        # mean_sq se deriva de sum(x^2), guardado exacto (entero)
+        n = int(n)
+        segmentos[segmento] = (n, int(sum_sq) / n if n else 0.0, json.loads(histograma))
+    return {'trained_at': rows[0][5], 'ultimo_id': min(int(r[4]) for r in rows), 'segmentos': segmentos}
+
+
+def actualizar_segmentos(previos, nuevos):
+    """Actualiza cada segmento con sus defectos nuevos (O(semanas con cambios)).
+
+    Devuelve ({segmento: (sigma, n, mean_sq, expected, p90)}, {segmento: serie}).
+    """
+    modelos, series = {}, {}
+    for segmento in set(previos) | set(nuevos):
+        n, mean_sq, serie = previos.get(segmento, (0, 0.0, []))
+        sigma, n, mean_sq, serie = update_rayleigh(n, mean_sq, serie, nuevos.get(segmento, {}))
+        modelos[segmento] = (sigma, n, mean_sq, expected_value(sigma), percentile(sigma, 0.9))
+        series[segmento] = serie
+    return modelos, series
 
 
-def persist_model_to_dw(dw_conn, sigma, n, mean_sq):
-    """Persiste los parámetros del modelo en `DSS_Proyectos.Model_Rayleigh`.
+def escribir_json_atomico(path, obj, **opciones):
+    """Escribe `obj` en un temporal del mismo directorio y lo publica con os.replace.
 
-    Nota: asume que la tabla ya existe (se añadió al DDL del DW).
+    Quien lea `path` (la API) ve el archivo anterior o el nuevo, nunca uno a medias.
     """
+    directorio = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix='.tmp_', suffix='.json', dir=directorio)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, **opciones)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def guardar_artefacto_segmentos(modelos, trained_at, path=SEGMENT_MODEL_FILE):
+    """Artefacto binario: un registro (CAMPOS_MODELO) por segmento, indexado por su clave."""
+    segmentos = sorted(modelos)
+    columnas = {campo: [modelos[seg][j] for seg in segmentos] for j, campo in enumerate(CAMPOS_MODELO)}
+    columnas['n_samples'] = [int(n) for n in columnas['n_samples']]
+    escribir_artefacto(path, segmentos, columnas, meta={'trained_at': trained_at.isoformat()})
+
+
+def persist_models_to_dw(dw_conn, modelos, trained_at, fuente=TRAIN_FUENTE, series=None, ultimo_id=None,
+                         incremental=False):
+    """Persiste todos los modelos en `DSS_Proyectos.Model_Rayleigh` con un INSERT por lotes.
+
+    Con cada modelo se guarda su serie semanal y el último id de defecto
+    incluido: son los estadísticos de partida de un reentrenamiento incremental.
+
+    Nota: asume que la tabla ya existe con las columnas `segmento`, `sum_sq`,
+    `histograma` y `ultimo_id_defecto`.
+    """
+    series = series or {}
     cur = dw_conn.cursor()
-    sql = "INSERT INTO Model_Rayleigh (sigma, n_samples, mean_sq, trained_at, notes) VALUES (%s,%s,%s,%s,%s)"
-    notes = 'Entrenado desde SG_Proyectos.Defectos usando tiempo calendario (semanas) - Compatible con todas las metodologías'
-    cur.execute(sql, (float(sigma), int(n), float(mean_sq), datetime.now(), notes))
+    sql = ("INSERT INTO Model_Rayleigh (segmento, sigma, n_samples, mean_sq, sum_sq, histograma, ultimo_id_defecto, trained_at, notes) "
+           "VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)")
+    origen = 'DSS_Proyectos.Fact_Defectos' if fuente == 'dss' else 'SG_Proyectos.Defectos'
+    notes = f'Entrenado desde {origen} usando tiempo calendario (semanas) - Compatible con todas las metodologías'
+    if incremental:
+        notes += ' - Reentrenamiento incremental'
+    # Los conteos son enteros: round(n * mean_sq) es sum(x^2) exacto
+    cur.executemany(sql, [(seg, float(sigma), int(n), float(mean_sq), int(round(n * mean_sq)),
+                           json.dumps(series[seg], separators=(',', ':')) if seg in series else None,
+                           ultimo_id, trained_at, notes)
+                          for seg, (sigma, n, mean_sq, _, _) in sorted(modelos.items())])
     dw_conn.commit()
     cur.close()
 
 
-def main(persist_to_dw=True):
-    # 1) Conectar a SG y extraer conteos por tiempo (semanas)
-    print("Conectando a SG_Proyectos para obtener defectos por tiempo calendario...")
-    sg = mysql.connector.connect(**SG_DB)
-    samples = fetch_defect_counts(sg)
-    sg.close()
+def main(persist_to_dw=True, segmentaciones=SEGMENTACIONES, workers=TRAIN_WORKERS, fuente=TRAIN_FUENTE,
+         incremental=False):
+    # 0) Incremental: estadísticos del último entrenamiento persistido
+    previo = None
+    if incremental:
+        dw = mysql.connector.connect(**DW_DB)
+        previo = cargar_ultimo_entrenamiento(dw, segmentaciones)
+        dw.close()
+        if previo is None:
+            print("Sin estadísticos previos compatibles en Model_Rayleigh: se entrena con todo el historial.")
+        else:
+            print(f"Reentrenamiento incremental desde {previo['trained_at']} (defectos con id > {previo['ultimo_id']})")
 
-    print(f"Muestras obtenidas: {len(samples)} períodos de tiempo (semanas)")
-    print(f"Distribución de defectos: {samples}")
-    if len(samples) == 0:
+    # 1) Extraer el histograma semanal por celda (una consulta agregada en el servidor)
+    if fuente == 'dss':
+        print("Conectando a DSS_Proyectos para obtener defectos por tiempo calendario (Fact_Defectos)...")
+        conn = mysql.connector.connect(**DW_DB)
+    else:
+        print("Conectando a SG_Proyectos para obtener defectos por tiempo calendario...")
+        conn = mysql.connector.connect(**SG_DB)
+    # Corte fijo: lo que llegue durante el entrenamiento queda para la próxima vez
+    ultimo_id = fetch_max_defect_id(conn, fuente)
+    # Sin segmentaciones basta una fila por semana
+    celdas = fetch_defect_cells(conn, fuente, por_celda=bool(segmentaciones),
+                                desde_id=previo['ultimo_id'] if previo else None, hasta_id=ultimo_id)
+    conn.close()
+
+    histogramas = histogramas_por_segmento(celdas, segmentaciones)
+    if previo and not histogramas:
+        print("Sin defectos nuevos desde el último entrenamiento: el modelo sigue vigente.")
+        if TRAIN_PRONOSTICOS:
+            # Las semanas observadas de los proyectos en curso avanzan igualmente
+            actualizar_pronosticos(fuente)
+        return
+    if not previo and 'global' not in histogramas:
         print("No hay datos para entrenar.")
         return
 
-    # 2) Ajustar el modelo Rayleigh usando las muestras extraídas
-    sigma, n, mean_sq = fit_rayleigh(samples)
-    expected = expected_value(sigma)
-    p90 = percentile(sigma, 0.9)
+    trained_at = datetime.now()
+    if previo:
+        # 2) Actualizar los estadísticos de cada segmento con los defectos nuevos
+        print(f"Defectos nuevos en {len(histogramas)} segmentos ({sum(histogramas.get('global', {}).values())} defectos)")
+        modelos, series = actualizar_segmentos(previo['segmentos'], histogramas)
+        samples = series['global']
+        print(f"Muestras: {len(samples)} períodos de tiempo (semanas)")
+    else:
+        samples = serie_semanal(histogramas['global'])
+        print(f"Muestras obtenidas: {len(samples)} períodos de tiempo (semanas)")
+        print(f"Distribución de defectos: {samples}")
+        print(f"Segmentos a ajustar: {len(histogramas)} ({', '.join(['global'] + list(segmentaciones))})")
+
+        # 2) Ajustar el modelo Rayleigh de cada segmento (pool de procesos)
+        modelos = ajustar_segmentos(histogramas, workers)
+        series = {seg: serie_semanal(por_semana) for seg, por_semana in histogramas.items()}
+    sigma, n, mean_sq, expected, p90 = modelos['global']
 
     model = {
         'sigma': sigma,
@@ -131,26 +510,45 @@ def main(persist_to_dw=True):
         'mean_sq': mean_sq,
         'expected': expected,
         'p90': p90,
-        'trained_at': datetime.now().isoformat()
+        'trained_at': trained_at.isoformat()
     }
 
-    # 3) Guardar localmente el modelo en formato JSON
-    with open(MODEL_FILE, 'w', encoding='utf-8') as f:
-        json.dump(model, f, indent=2)
+    # 3) Guardar localmente el artefacto de segmentos y el modelo global
+    #    (escritura atómica: la API puede estar leyéndolos)
+    guardar_artefacto_segmentos(modelos, trained_at)
+    escribir_json_atomico(MODEL_FILE, model, indent=2)
 
-    print(f"Modelo guardado en {MODEL_FILE}")
+    print(f"Modelo guardado en {MODEL_FILE} ({len(modelos)} segmentos en {SEGMENT_MODEL_FILE})")
 
     # 4) Persistir en DW (opcional) para trazabilidad/versionado
     if persist_to_dw:
         print("Persistiendo parámetros en DW (Model_Rayleigh)...")
         dw = mysql.connector.connect(**DW_DB)
-        persist_model_to_dw(dw, sigma, n, mean_sq)
+        persist_models_to_dw(dw, modelos, trained_at, fuente, series, ultimo_id, incremental=previo is not None)
         dw.close()
         print("Persistencia en DW completada.")
 
+    # 5) Pronósticos de defectos pendientes por proyecto en curso
+    if TRAIN_PRONOSTICOS:
+        actualizar_pronosticos(fuente)
+
     print("Resumen del modelo:")
     print(json.dumps(model, indent=2))
 
 
 if __name__ == '__main__':
-    main(persist_to_dw=True)
+    parser = argparse.ArgumentParser(description='Entrenamiento del modelo Rayleigh (global y por segmento)')
+    parser.add_argument('--segmentaciones', default=','.join(SEGMENTACIONES),
+                        help="lista separada por comas; '+' combina atributos (metodologia, cliente, responsable)")
+    parser.add_argument('--workers', type=int, default=TRAIN_WORKERS, help='procesos para los ajustes')
+    parser.add_argument('--sin-dw', action='store_true', help='no persistir en Model_Rayleigh')
+    parser.add_argument('--fuente', choices=sorted(FUENTES), default=TRAIN_FUENTE,
+                        help='dss = hechos del DW (Fact_Defectos, por defecto); sg = sistema transaccional')
+    parser.add_argument('--incremental', action='store_true',
+                        help='actualiza el último modelo de Model_Rayleigh sólo con los defectos nuevos')
+    args = parser.parse_args()
+    if args.incremental and args.sin_dw:
+        parser.error('--incremental necesita Model_Rayleigh (no se puede combinar con --sin-dw)')
+    main(persist_to_dw=not args.sin_dw,
+         segmentaciones=[s.strip() for s in args.segmentaciones.split(',') if s.strip()],
+         workers=args.workers, fuente=args.fuente, incremental=args.incremental)